@@ -3,6 +3,10 @@ ASGI config for config project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+The live agenda stream (/api/stream/agenda/) keeps one connection open per
+screen, so it must be served through this application with an ASGI server,
+e.g. ``uvicorn config.asgi:application``.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.0/howto/deployment/asgi/
 """
@@ -12,5 +16,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+# Solo bajo ASGI el canal en vivo no retiene un hilo por pantalla (ver AGENDA_SSE_HABILITADO)
+os.environ.setdefault('AGENDA_SSE_HABILITADO', 'True')
 
 application = get_asgi_application()
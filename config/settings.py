@@ -49,6 +49,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'eventos.perf.RendimientoMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -56,13 +57,15 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'eventos.middleware.reloj_solicitud_middleware',
 ]
 
 ROOT_URLCONF = 'config.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates que además mide el render para eventos.perf
+        'BACKEND': 'eventos.perf.PlantillasMedidas',
         'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -71,6 +74,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'eventos.context_processors.agenda_en_vivo',
             ],
         },
     },
@@ -90,6 +94,66 @@ DATABASES = {
     }
 }
 
+# Caché (en producción usar un backend compartido entre procesos, p. ej. Redis)
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='agenda-gobernador'),
+    }
+}
+
+# Segundos máximos que vive un fragmento cacheado de la agenda
+AGENDA_CACHE_TIMEOUT = config('AGENDA_CACHE_TIMEOUT', default=60, cast=int)
+
+# Notificaciones en vivo (SSE): usar BroadcasterPostgres con varios workers
+AGENDA_BROADCASTER = config('AGENDA_BROADCASTER', default='eventos.broadcast.BroadcasterLocal')
+
+# El canal SSE solo se habilita bajo ASGI (config/asgi.py lo activa): en WSGI cada
+# pantalla abierta retendría un hilo del servidor y las páginas recurren al sondeo
+AGENDA_SSE_HABILITADO = config('AGENDA_SSE_HABILITADO', default=False, cast=bool)
+
+# Instrumentación de rendimiento (eventos.perf): umbral de solicitud lenta y
+# muestras por vista para los percentiles de /debug/perf/
+PERF_UMBRAL_LENTO_MS = config('PERF_UMBRAL_LENTO_MS', default=500, cast=int)
+PERF_VENTANA_MUESTRAS = config('PERF_VENTANA_MUESTRAS', default=500, cast=int)
+PERF_LOG_FILE = Path(config('PERF_LOG_FILE', default=str(BASE_DIR / 'logs' / 'solicitudes_lentas.log')))
+PERF_LOG_FILE.parent.mkdir(parents=True, exist_ok=True)
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'simple': {
+            'format': '%(asctime)s %(levelname)s %(name)s %(message)s',
+        },
+    },
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'simple',
+        },
+        'solicitudes_lentas': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': PERF_LOG_FILE,
+            'maxBytes': 5 * 1024 * 1024,
+            'backupCount': 5,
+            'encoding': 'utf-8',
+            'formatter': 'simple',
+        },
+    },
+    'loggers': {
+        'eventos': {
+            'handlers': ['console'],
+            'level': config('EVENTOS_LOG_LEVEL', default='INFO'),
+        },
+        'eventos.perf': {
+            'handlers': ['solicitudes_lentas'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
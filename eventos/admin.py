@@ -58,9 +58,13 @@ class EventoAdmin(admin.ModelAdmin):
     
     readonly_fields = ['fecha_finalizacion_manual']
     
+    def get_queryset(self, request):
+        """Anotar el estado vigente para mostrarlo sin escribir en la base"""
+        return super().get_queryset(request).select_related('municipio').con_estado_efectivo()
+    
     def estado_calculado_display(self, obj):
         """Muestra el estado calculado automáticamente con colores"""
-        estado = obj.actualizar_estado_automatico()
+        estado = obj.estado_calculado
         
         colors = {
             'programado': '#17a2b8',  # Info
@@ -74,11 +78,11 @@ class EventoAdmin(admin.ModelAdmin):
         return format_html(
             '<span style="background-color: {}; color: white; padding: 3px 8px; border-radius: 3px; font-size: 11px; font-weight: bold;">{}</span>',
             color,
-            obj.get_estado_display()
+            obj.get_estado_calculado_display()
         )
     
     estado_calculado_display.short_description = 'Estado Actual'
-    estado_calculado_display.admin_order_field = 'estado'
+    estado_calculado_display.admin_order_field = 'estado_efectivo'
     
     def save_model(self, request, obj, form, change):
         """Asignar automáticamente el usuario que crea el evento"""
@@ -115,12 +119,7 @@ class EventoAdmin(admin.ModelAdmin):
     
     def actualizar_estados(self, request, queryset):
         """Acción para actualizar estados automáticamente"""
-        count = 0
-        for evento in queryset:
-            estado_anterior = evento.estado
-            evento.actualizar_estado_automatico()
-            if evento.estado != estado_anterior:
-                count += 1
+        count = sum(queryset.sincronizar_estados().values())
         
         self.message_user(
             request,
@@ -4,4 +4,7 @@ from django.apps import AppConfig
 class EventosConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'eventos'
-    verbose_name = 'Gestión de Eventos'
\ No newline at end of file
+    verbose_name = 'Gestión de Eventos'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,160 @@
+# eventos/broadcast.py
+"""Difusión de cambios de la agenda hacia las pantallas conectadas (Server-Sent Events).
+
+El backend se elige con ``settings.AGENDA_BROADCASTER``:
+
+* ``eventos.broadcast.BroadcasterLocal`` (por defecto): solo alcanza a los clientes
+  conectados al mismo proceso.
+* ``eventos.broadcast.BroadcasterPostgres``: usa LISTEN/NOTIFY de PostgreSQL para que
+  todos los workers (y el programador de estados) compartan las notificaciones.
+"""
+import asyncio
+import json
+import logging
+import select
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+_broadcaster = None
+_broadcaster_lock = threading.Lock()
+
+
+class BroadcasterLocal:
+    """Difunde mensajes a los suscriptores del mismo proceso"""
+
+    # Mensajes pendientes por suscriptor antes de descartar (cliente lento)
+    max_pendientes = 100
+
+    def __init__(self):
+        self._suscriptores = set()
+        self._lock = threading.Lock()
+
+    def publicar(self, mensaje):
+        """Envía un mensaje (dict serializable a JSON) a todos los suscriptores"""
+        self._difundir(mensaje)
+
+    def _difundir(self, mensaje):
+        with self._lock:
+            suscriptores = list(self._suscriptores)
+        for loop, cola in suscriptores:
+            try:
+                loop.call_soon_threadsafe(self._entregar, cola, mensaje)
+            except RuntimeError:
+                # El loop del suscriptor ya se cerró
+                self._cancelar(loop, cola)
+
+    @staticmethod
+    def _entregar(cola, mensaje):
+        try:
+            cola.put_nowait(mensaje)
+        except asyncio.QueueFull:
+            pass
+
+    def _cancelar(self, loop, cola):
+        with self._lock:
+            self._suscriptores.discard((loop, cola))
+
+    async def suscribir(self, latido=15):
+        """Generador asíncrono de mensajes; produce None cada ``latido`` segundos sin actividad"""
+        suscriptor = (asyncio.get_running_loop(), asyncio.Queue(self.max_pendientes))
+        with self._lock:
+            self._suscriptores.add(suscriptor)
+        try:
+            while True:
+                try:
+                    yield await asyncio.wait_for(suscriptor[1].get(), timeout=latido)
+                except asyncio.TimeoutError:
+                    yield None
+        finally:
+            self._cancelar(*suscriptor)
+
+
+class BroadcasterPostgres(BroadcasterLocal):
+    """Comparte los mensajes entre procesos con LISTEN/NOTIFY de PostgreSQL"""
+
+    canal = 'agenda_cambios'
+
+    # Segundos entre reintentos de la escucha (se duplica con cada fallo consecutivo)
+    espera_minima = 1
+    espera_maxima = 60
+
+    def __init__(self):
+        super().__init__()
+        self._escucha = None
+
+    def publicar(self, mensaje):
+        with connections['default'].cursor() as cursor:
+            cursor.execute('SELECT pg_notify(%s, %s)', [self.canal, json.dumps(mensaje)])
+
+    async def suscribir(self, latido=15):
+        self._iniciar_escucha()
+        async for mensaje in super().suscribir(latido):
+            yield mensaje
+
+    def _iniciar_escucha(self):
+        with self._lock:
+            if self._escucha is None:
+                self._escucha = threading.Thread(
+                    target=self._escuchar, name='agenda-listen', daemon=True
+                )
+                self._escucha.start()
+
+    def _escuchar(self):
+        """Hilo que recibe las notificaciones de PostgreSQL y las difunde localmente.
+
+        Si la conexión falla se registra el error, se cierra y se reintenta con espera
+        exponencial (``espera_minima`` a ``espera_maxima`` segundos).
+        """
+        import psycopg2
+        import psycopg2.extensions
+
+        espera = self.espera_minima
+        while True:
+            conexion = None
+            try:
+                parametros = connections['default'].get_connection_params()
+                conexion = psycopg2.connect(**parametros)
+                conexion.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+                with conexion.cursor() as cursor:
+                    cursor.execute(f'LISTEN {self.canal};')
+                # Escuchando: el siguiente fallo vuelve a empezar con la espera mínima
+                espera = self.espera_minima
+                while True:
+                    if select.select([conexion], [], [], 5) == ([], [], []):
+                        continue
+                    conexion.poll()
+                    while conexion.notifies:
+                        notificacion = conexion.notifies.pop(0)
+                        self._difundir(json.loads(notificacion.payload))
+            except Exception:
+                logger.exception('Error en la escucha de %s; reintento en %s s', self.canal, espera)
+            finally:
+                if conexion is not None:
+                    try:
+                        conexion.close()
+                    except Exception:
+                        pass
+            time.sleep(espera)
+            espera = min(espera * 2, self.espera_maxima)
+
+def get_broadcaster():
+    """Instancia única del backend configurado en AGENDA_BROADCASTER"""
+    global _broadcaster
+    if _broadcaster is None:
+        with _broadcaster_lock:
+            if _broadcaster is None:
+                ruta = getattr(settings, 'AGENDA_BROADCASTER', 'eventos.broadcast.BroadcasterLocal')
+                _broadcaster = import_string(ruta)()
+    return _broadcaster
+
+
+def publicar_cambio_agenda(tipo, **datos):
+    """Publica un cambio de la agenda cuando se confirme la transacción actual"""
+    mensaje = {'tipo': tipo, **datos}
+    transaction.on_commit(lambda: get_broadcaster().publicar(mensaje))
@@ -0,0 +1,83 @@
+# eventos/busqueda.py
+"""Búsqueda de texto completo en eventos.
+
+* PostgreSQL: columna ``busqueda`` (tsvector, configuración ``espanol_sin_acentos``)
+  mantenida por trigger, con índice GIN y ranking por ``ts_rank``.
+* SQLite: tabla virtual FTS5 ``eventos_evento_fts`` sin acentos, ranking por ``bm25``.
+* Otros motores: ``icontains`` sobre los mismos campos.
+
+Cada palabra se busca como prefijo ("tux" encuentra "Tuxtla"); por defecto todas deben
+aparecer y con ``cualquiera=True`` basta con una (el ranking favorece a las que tienen más).
+"""
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connection
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+CONFIGURACION_TEXTO = 'espanol_sin_acentos'
+
+CAMPOS_BUSQUEDA = (
+    'nombre', 'lugar', 'responsable', 'municipio__nombre',
+    'representante', 'descripcion', 'observaciones',
+)
+
+
+def _terminos(texto):
+    return re.findall(r'\w+', texto or '')
+
+
+def _filtro_icontains(texto):
+    filtro = Q()
+    for campo in CAMPOS_BUSQUEDA:
+        filtro |= Q(**{f'{campo}__icontains': texto})
+    return filtro
+
+
+def _consulta_postgres(terminos, cualquiera):
+    prefijos = (' | ' if cualquiera else ' & ').join(f'{termino}:*' for termino in terminos)
+    return SearchQuery(prefijos, config=CONFIGURACION_TEXTO, search_type='raw')
+
+
+def _consulta_fts5(terminos, cualquiera):
+    return (' OR ' if cualquiera else ' ').join('"{}"*'.format(termino) for termino in terminos)
+
+
+def buscar_eventos(queryset, texto, ordenar_por_relevancia=False, cualquiera=False):
+    """Filtra ``queryset`` por ``texto`` y anota ``relevancia`` (mayor es mejor)"""
+    terminos = _terminos(texto)
+    if not terminos:
+        return queryset
+
+    if connection.vendor == 'postgresql':
+        consulta = _consulta_postgres(terminos, cualquiera)
+        queryset = queryset.filter(busqueda=consulta).annotate(
+            relevancia=SearchRank(F('busqueda'), consulta)
+        )
+    elif connection.vendor == 'sqlite':
+        consulta = _consulta_fts5(terminos, cualquiera)
+        queryset = queryset.filter(
+            id__in=RawSQL(
+                'SELECT rowid FROM eventos_evento_fts WHERE eventos_evento_fts MATCH %s', (consulta,)
+            )
+        ).annotate(
+            relevancia=RawSQL(
+                'SELECT -bm25(eventos_evento_fts) FROM eventos_evento_fts '
+                'WHERE eventos_evento_fts MATCH %s AND rowid = eventos_evento.id',
+                (consulta,),
+                output_field=FloatField(),
+            )
+        )
+    else:
+        filtros = [_filtro_icontains(termino) for termino in terminos]
+        filtro = filtros[0]
+        for siguiente in filtros[1:]:
+            filtro = (filtro | siguiente) if cualquiera else (filtro & siguiente)
+        queryset = queryset.filter(filtro).annotate(
+            relevancia=Value(1.0, output_field=FloatField())
+        )
+
+    if ordenar_por_relevancia:
+        queryset = queryset.order_by('-relevancia', '-fecha_evento')
+    return queryset
@@ -0,0 +1,41 @@
+# eventos/cache.py
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+CLAVE_VERSION_AGENDA = 'agenda:version'
+
+
+def _version_inicial():
+    """Versión basada en el reloj para no reutilizar claves si la caché pierde el contador"""
+    return int(time.time() * 1000)
+
+
+def obtener_version_agenda():
+    """Retorna la versión global de los datos de la agenda"""
+    version = cache.get(CLAVE_VERSION_AGENDA)
+    if version is None:
+        cache.add(CLAVE_VERSION_AGENDA, _version_inicial(), None)
+        version = cache.get(CLAVE_VERSION_AGENDA)
+    return version
+
+
+def incrementar_version_agenda():
+    """Invalida todo lo cacheado de la agenda incrementando su versión"""
+    try:
+        return cache.incr(CLAVE_VERSION_AGENDA)
+    except ValueError:
+        version = _version_inicial()
+        cache.set(CLAVE_VERSION_AGENDA, version, None)
+        return version
+
+
+def clave_agenda(prefijo, *partes):
+    """Construye una clave de caché ligada a la versión actual de la agenda"""
+    return ':'.join(str(parte) for parte in (prefijo, obtener_version_agenda(), *partes))
+
+
+def get_agenda_cache_timeout():
+    """Tiempo máximo (segundos) que vive un fragmento aunque no cambie la versión"""
+    return getattr(settings, 'AGENDA_CACHE_TIMEOUT', 60)
@@ -1,8 +1,9 @@
 # eventos/chatbot.py
-from django.db.models import Q, Count
+from django.db.models import Count
 from datetime import datetime, timedelta, date
 import re
 from .models import Evento, Municipio
+from .utils import filtro_fechas_mexico, get_current_mexico_time
 
 class ChatbotAgenda:
     """Chatbot básico para consultas de la agenda del gobernador"""
@@ -94,7 +95,7 @@ class ChatbotAgenda:
             'jul': 7, 'ago': 8, 'sep': 9, 'oct': 10, 'nov': 11, 'dic': 12
         }
         
-        año_actual = date.today().year
+        año_actual = get_current_mexico_time().year
         
         # Patrón 1: dd/mm/yyyy o dd-mm-yyyy
         match = re.search(r'(\d{1,2})[/-](\d{1,2})[/-](\d{4})', mensaje)
@@ -161,7 +162,7 @@ class ChatbotAgenda:
             return "No pude entender la fecha. Puedes usar formatos como:\n• 15/01/2024\n• 15 de enero\n• 2024-01-15"
         
         # Buscar eventos en esa fecha
-        eventos = Evento.objects.filter(fecha_evento__date=fecha_objetivo)
+        eventos = Evento.objects.para_listado().filter(fecha_evento__dia_mx=fecha_objetivo)
         
         # Formatear la fecha para mostrar
         fecha_str = fecha_objetivo.strftime('%d de %B de %Y')
@@ -176,7 +177,7 @@ class ChatbotAgenda:
         
         if not eventos.exists():
             # Verificar si es una fecha futura o pasada para dar mejor contexto
-            hoy = date.today()
+            hoy = get_current_mexico_time().date()
             if fecha_objetivo > hoy:
                 return f"📅 No hay eventos programados para el **{fecha_str}**.\n\n¿Te gustaría que revise fechas cercanas?"
             else:
@@ -222,51 +223,44 @@ class ChatbotAgenda:
             return self._consultar_fecha_exacta(mensaje)
         
         # Si no es fecha exacta, usar la lógica existente para fechas relativas
-        hoy = date.today()
+        hoy = get_current_mexico_time().date()
         
         # Eventos de hoy
         if any(patron in mensaje for patron in self.patrones_fecha['hoy']):
-            eventos = Evento.objects.filter(fecha_evento__date=hoy)
+            eventos = Evento.objects.para_listado().filter(fecha_evento__dia_mx=hoy)
             return self._formatear_eventos_fecha(eventos, "hoy")
         
         # Eventos de mañana
         elif any(patron in mensaje for patron in self.patrones_fecha['mañana']):
             manana = hoy + timedelta(days=1)
-            eventos = Evento.objects.filter(fecha_evento__date=manana)
+            eventos = Evento.objects.para_listado().filter(fecha_evento__dia_mx=manana)
             return self._formatear_eventos_fecha(eventos, "mañana")
         
         # Eventos de ayer
         elif any(patron in mensaje for patron in self.patrones_fecha['ayer']):
             ayer = hoy - timedelta(days=1)
-            eventos = Evento.objects.filter(fecha_evento__date=ayer)
+            eventos = Evento.objects.para_listado().filter(fecha_evento__dia_mx=ayer)
             return self._formatear_eventos_fecha(eventos, "ayer")
         
         # Eventos de esta semana
         elif any(patron in mensaje for patron in self.patrones_fecha['esta_semana']):
             inicio_semana = hoy - timedelta(days=hoy.weekday())
             fin_semana = inicio_semana + timedelta(days=6)
-            eventos = Evento.objects.filter(
-                fecha_evento__date__gte=inicio_semana,
-                fecha_evento__date__lte=fin_semana
-            )
+            eventos = Evento.objects.para_listado().filter(**filtro_fechas_mexico(inicio_semana, fin_semana))
             return self._formatear_eventos_fecha(eventos, "esta semana")
         
         # Eventos de próxima semana
         elif any(patron in mensaje for patron in self.patrones_fecha['proxima_semana']):
             inicio_proxima = hoy + timedelta(days=7-hoy.weekday())
             fin_proxima = inicio_proxima + timedelta(days=6)
-            eventos = Evento.objects.filter(
-                fecha_evento__date__gte=inicio_proxima,
-                fecha_evento__date__lte=fin_proxima
-            )
+            eventos = Evento.objects.para_listado().filter(**filtro_fechas_mexico(inicio_proxima, fin_proxima))
             return self._formatear_eventos_fecha(eventos, "la próxima semana")
         
         # Eventos de este mes
         elif any(patron in mensaje for patron in self.patrones_fecha['este_mes']):
-            eventos = Evento.objects.filter(
-                fecha_evento__year=hoy.year,
-                fecha_evento__month=hoy.month
-            )
+            inicio_mes = hoy.replace(day=1)
+            fin_mes = (inicio_mes + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+            eventos = Evento.objects.para_listado().filter(**filtro_fechas_mexico(inicio_mes, fin_mes))
             return self._formatear_eventos_fecha(eventos, "este mes")
         
         return "No pude entender qué fecha específica buscas. Puedes usar:\n• Fechas relativas: 'hoy', 'mañana', 'esta semana'\n• Fechas exactas: '15/01/2024', '15 de enero', '2024-01-15'"
@@ -291,7 +285,7 @@ class ChatbotAgenda:
             
             try:
                 municipio_obj = Municipio.objects.get(nombre__icontains=nombre_municipio)
-                eventos = Evento.objects.filter(municipio=municipio_obj).order_by('-fecha_evento')[:10]
+                eventos = Evento.objects.para_listado().filter(municipio=municipio_obj).order_by('-fecha_evento')[:10]
                 
                 if eventos.exists():
                     respuesta = f"📍 **Eventos en {municipio_obj.nombre}** (últimos 10):\n\n"
@@ -359,16 +353,16 @@ class ChatbotAgenda:
         if not palabras:
             return "¿Qué eventos específicos buscas? Puedes mencionar nombres, lugares o responsables."
         
-        # Buscar en nombre, lugar y responsable
-        query = Q()
-        for palabra in palabras:
-            query |= Q(nombre__icontains=palabra)
-            query |= Q(lugar__icontains=palabra)
-            query |= Q(responsable__icontains=palabra)
+        # Búsqueda de texto completo, los más relevantes primero
+        eventos = list(
+            Evento.objects.para_listado()
+            .buscar(' '.join(palabras), ordenar_por_relevancia=True, cualquiera=True)[:5]
+        )
+        if not eventos:
+            # Tolerante a acentos y errores de escritura en lugares, personas y municipios
+            eventos = list(Evento.objects.para_listado().buscar_similar(' '.join(palabras))[:5])
         
-        eventos = Evento.objects.filter(query).order_by('-fecha_evento')[:5]
-        
-        if eventos.exists():
+        if eventos:
             respuesta = f"🔍 **Eventos encontrados** (relacionados con: {', '.join(palabras)}):\n\n"
             for evento in eventos:
                 fecha_str = evento.get_fecha_mexico().strftime('%d/%m/%Y %H:%M')
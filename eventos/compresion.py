@@ -0,0 +1,90 @@
+# eventos/compresion.py
+"""Compresión negociada (brotli o gzip) de las respuestas de las APIs JSON.
+
+Se aplica por vista con ``@comprimir_json`` en lugar de ``GZipMiddleware`` para no
+tocar el stream SSE ni las páginas HTML. brotli es opcional: sin el paquete se usa gzip.
+"""
+from functools import wraps
+
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_string
+
+try:
+    import brotli
+except ImportError:  # brotli es opcional: se negocia solo gzip
+    brotli = None
+
+# Respuestas más pequeñas no compensan el costo de comprimir
+TAMANO_MINIMO_COMPRESION = 200
+
+
+def codificaciones_aceptadas(cabecera):
+    """Codificaciones de ``Accept-Encoding`` con su peso q: {'gzip': 1.0, 'br': 0.5}"""
+    aceptadas = {}
+    for parte in (cabecera or '').split(','):
+        nombre, _, parametros = parte.partition(';')
+        nombre = nombre.strip().lower()
+        if not nombre:
+            continue
+        peso = 1.0
+        parametros = parametros.strip().replace(' ', '')
+        if parametros.startswith('q='):
+            try:
+                peso = float(parametros[2:])
+            except ValueError:
+                peso = 0.0
+        aceptadas[nombre] = peso
+    return aceptadas
+
+
+def elegir_codificacion(cabecera):
+    """'br', 'gzip' o None según lo que acepta el cliente y lo disponible en el servidor"""
+    aceptadas = codificaciones_aceptadas(cabecera)
+    comodin = aceptadas.get('*', 0.0)
+    candidatas = ['br', 'gzip'] if brotli is not None else ['gzip']
+    pesos = {codificacion: aceptadas.get(codificacion, comodin) for codificacion in candidatas}
+    mejor = max(candidatas, key=lambda codificacion: pesos[codificacion])
+    return mejor if pesos[mejor] > 0 else None
+
+
+def comprimir_respuesta(request, response):
+    """Comprime ``response`` si es JSON, completa y el cliente acepta brotli o gzip"""
+    if response.streaming:
+        return response
+    # También en los 304: la representación cacheada depende de Accept-Encoding
+    patch_vary_headers(response, ('Accept-Encoding',))
+    if (
+        response.status_code != 200 or
+        response.has_header('Content-Encoding') or
+        not response.get('Content-Type', '').startswith('application/json') or
+        len(response.content) < TAMANO_MINIMO_COMPRESION
+    ):
+        return response
+
+    codificacion = elegir_codificacion(request.META.get('HTTP_ACCEPT_ENCODING'))
+    if codificacion is None:
+        return response
+
+    if codificacion == 'br':
+        comprimido = brotli.compress(response.content, quality=5)
+    else:
+        comprimido = compress_string(response.content)
+    if len(comprimido) >= len(response.content):
+        return response
+
+    response.content = comprimido
+    response['Content-Length'] = str(len(comprimido))
+    response['Content-Encoding'] = codificacion
+    # Mismo criterio que GZipMiddleware: el cuerpo comprimido ya no es idéntico byte a byte
+    etag = response.get('ETag')
+    if etag and etag.startswith('"'):
+        response['ETag'] = 'W/' + etag
+    return response
+
+
+def comprimir_json(vista):
+    """Decorador: comprime la respuesta JSON de ``vista`` según ``Accept-Encoding``"""
+    @wraps(vista)
+    def envoltura(request, *args, **kwargs):
+        return comprimir_respuesta(request, vista(request, *args, **kwargs))
+    return envoltura
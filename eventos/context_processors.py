@@ -0,0 +1,7 @@
+# eventos/context_processors.py
+from django.conf import settings
+
+
+def agenda_en_vivo(request):
+    """Indica a las plantillas si está disponible el canal SSE de la agenda"""
+    return {'agenda_sse_habilitado': settings.AGENDA_SSE_HABILITADO}
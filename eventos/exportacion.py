@@ -0,0 +1,138 @@
+# eventos/exportacion.py
+"""Exportación de eventos en CSV y JSON Lines para análisis externo.
+
+Los generadores emiten el encabezado antes de consultar (el primer byte sale de
+inmediato) y después bloques de filas leídas con ``iterator()``, que en PostgreSQL usa
+un cursor del servidor: la memoria no depende del número de eventos. ``comprimir_gzip``
+envuelve cualquiera de ellos para descargar el archivo comprimido.
+
+Bajo ASGI Django consume un iterador síncrono con ``sync_to_async(list)``, es decir,
+junta el archivo completo en memoria antes de enviar el primer byte; ``transmitir``
+convierte el contenido de la respuesta en un iterador asíncrono que pide cada bloque
+por separado.
+"""
+import csv
+import io
+import zlib
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+
+from .serializacion import dumps
+from .utils import MEXICO_TZ
+
+# Columnas exportadas, en orden; las fechas van en hora de México con su desfase (ISO 8601)
+COLUMNAS_EXPORTACION = (
+    'id', 'nombre', 'fecha_evento', 'municipio__nombre', 'lugar', 'responsable', 'estado',
+    'asistio_gobernador', 'representante', 'es_festivo', 'descripcion', 'observaciones',
+    'fecha_creacion', 'fecha_actualizacion',
+)
+
+CAMPOS_FECHA = ('fecha_evento', 'fecha_creacion', 'fecha_actualizacion')
+
+# Filas por bloque del cursor y por parte de la respuesta
+TAMANO_BLOQUE_EXPORTACION = 2000
+
+# Prefijos que Excel interpreta como fórmula al abrir un CSV (inyección de fórmulas)
+PREFIJOS_FORMULA = ('=', '+', '-', '@', '\t', '\r')
+
+
+def _filas(eventos):
+    """Tuplas de ``COLUMNAS_EXPORTACION`` con las fechas ya en hora de México (ISO 8601)"""
+    posiciones = [COLUMNAS_EXPORTACION.index(campo) for campo in CAMPOS_FECHA]
+    for fila in eventos.values_list(*COLUMNAS_EXPORTACION).iterator(chunk_size=TAMANO_BLOQUE_EXPORTACION):
+        fila = list(fila)
+        for posicion in posiciones:
+            if fila[posicion] is not None:
+                fila[posicion] = fila[posicion].astimezone(MEXICO_TZ).isoformat()
+        yield fila
+
+
+def _en_bloques(lineas):
+    """Agrupa las líneas en partes de ``TAMANO_BLOQUE_EXPORTACION`` para no emitir una por fila.
+
+    La primera línea sale sola para que el cliente reciba datos sin esperar un bloque.
+    """
+    lineas = iter(lineas)
+    primera = next(lineas, None)
+    if primera is None:
+        return
+    yield primera
+    bloque = []
+    for linea in lineas:
+        bloque.append(linea)
+        if len(bloque) == TAMANO_BLOQUE_EXPORTACION:
+            yield b''.join(bloque)
+            bloque = []
+    if bloque:
+        yield b''.join(bloque)
+
+
+def celda_csv(valor):
+    """Valor para el CSV: booleanos como true/false y texto que parece fórmula precedido de '"""
+    if valor is True:
+        return 'true'
+    if valor is False:
+        return 'false'
+    if isinstance(valor, str) and valor.startswith(PREFIJOS_FORMULA):
+        return "'" + valor
+    return valor
+
+
+def generar_csv(eventos):
+    """CSV (UTF-8, separado por comas) con encabezado, seguro de abrir en Excel (``celda_csv``)"""
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+
+    def linea(valores):
+        escritor.writerow(valores)
+        texto = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return texto.encode()
+
+    yield linea(COLUMNAS_EXPORTACION)
+    yield from _en_bloques(
+        linea([celda_csv(valor) for valor in fila])
+        for fila in _filas(eventos)
+    )
+
+
+def generar_jsonl(eventos):
+    """Un objeto JSON por línea con las claves de ``COLUMNAS_EXPORTACION``"""
+    yield from _en_bloques(
+        dumps(dict(zip(COLUMNAS_EXPORTACION, fila))) + b'\n' for fila in _filas(eventos)
+    )
+
+
+def comprimir_gzip(partes):
+    """Comprime en gzip las partes de un generador, sin esperar al final del archivo"""
+    compresor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    for parte in partes:
+        # Z_SYNC_FLUSH: cada parte llega al cliente en cuanto se genera
+        yield compresor.compress(parte) + compresor.flush(zlib.Z_SYNC_FLUSH)
+    yield compresor.flush()
+
+
+async def partes_asincronas(partes):
+    """Las partes de un iterador síncrono, cada una leída con ``sync_to_async``.
+
+    Todas corren en el mismo hilo (``thread_sensitive``), así que el cursor del servidor
+    y la conexión de la base de datos son los mismos de un bloque al siguiente.
+    """
+    partes = iter(partes)
+    siguiente = sync_to_async(next)
+    fin = object()
+    try:
+        while (parte := await siguiente(partes, fin)) is not fin:
+            yield parte
+    finally:
+        if hasattr(partes, 'close'):
+            await sync_to_async(partes.close)()
+
+
+def transmitir(request, response):
+    """Bajo ASGI, reemplaza el contenido síncrono de ``response`` por ``partes_asincronas``"""
+    if isinstance(request, ASGIRequest) and not response.is_async:
+        response.streaming_content = partes_asincronas(response.streaming_content)
+    return response
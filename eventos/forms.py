@@ -3,8 +3,8 @@ from django import forms
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 from .models import Evento, Municipio
-import pytz
-from datetime import datetime
+from .utils import convert_to_mexico_time, localizar_mexico, obtener_ahora
+from datetime import datetime, timezone as dt_timezone
 
 # eventos/forms.py - Reemplaza la clase EventoForm con esta versión corregida
 
@@ -79,8 +79,7 @@ class EventoForm(forms.ModelForm):
         
         # SOLUCIÓN PARA EL PROBLEMA: Convertir fecha a timezone de México para mostrar
         if self.instance and self.instance.pk and self.instance.fecha_evento:
-            mexico_tz = pytz.timezone('America/Mexico_City')
-            fecha_mexico = self.instance.fecha_evento.astimezone(mexico_tz)
+            fecha_mexico = convert_to_mexico_time(self.instance.fecha_evento)
             # Convertir a formato datetime-local (sin timezone)
             fecha_local_str = fecha_mexico.strftime('%Y-%m-%dT%H:%M')
             self.initial['fecha_evento'] = fecha_local_str
@@ -89,21 +88,19 @@ class EventoForm(forms.ModelForm):
         """Validar que la fecha sea válida y convertir a UTC"""
         fecha = self.cleaned_data.get('fecha_evento')
         if fecha:
-            mexico_tz = pytz.timezone('America/Mexico_City')
-            
             # Si la fecha no tiene zona horaria, asumimos que es en zona de México
             if timezone.is_naive(fecha):
-                fecha = mexico_tz.localize(fecha)
+                fecha = localizar_mexico(fecha)
             
             # Permitir fechas hasta 1 año atrás
-            ahora = timezone.now()
+            ahora = obtener_ahora()
             fecha_limite = ahora - timezone.timedelta(days=365)
             
             if fecha < fecha_limite:
                 raise ValidationError("La fecha del evento no puede ser mayor a 1 año atrás.")
             
             # Convertir a UTC para almacenamiento
-            fecha_utc = fecha.astimezone(pytz.UTC)
+            fecha_utc = fecha.astimezone(dt_timezone.utc)
             return fecha_utc
         
         return fecha
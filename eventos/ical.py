@@ -0,0 +1,117 @@
+# eventos/ical.py
+"""Feed iCalendar (RFC 5545) de la agenda para suscripciones desde el teléfono.
+
+El calendario se genera por partes: encabezado, un VEVENT por fila de un ``iterator()``
+por bloques y cierre, de modo que la memoria no crece con el número de eventos. Las
+horas van en UTC (sufijo Z); así no hace falta declarar un VTIMEZONE.
+"""
+from datetime import timezone
+
+from .models import DURACION_EVENTO
+
+NOMBRE_CALENDARIO = 'Agenda del Gobernador'
+
+# Columnas que necesita cada VEVENT, en orden (ver ``vevento``)
+COLUMNAS_FEED = (
+    'id', 'nombre', 'fecha_evento', 'lugar', 'municipio__nombre', 'responsable',
+    'estado', 'asistio_gobernador', 'representante', 'descripcion', 'fecha_actualizacion',
+)
+
+# Eventos por bloque del iterator() del feed
+TAMANO_BLOQUE_FEED = 500
+
+ESTADOS_ICAL = {'cancelado': 'CANCELLED'}
+
+
+def escapar(texto):
+    """Texto de una propiedad con ``\\``, ``;``, ``,`` y saltos de línea escapados"""
+    return (
+        (texto or '')
+        .replace('\\', '\\\\')
+        .replace(';', '\\;')
+        .replace(',', '\\,')
+        .replace('\r\n', '\\n')
+        .replace('\n', '\\n')
+    )
+
+
+def plegar(linea):
+    """Línea de contenido plegada a 75 octetos, sin partir caracteres UTF-8, terminada en CRLF"""
+    if len(linea.encode()) <= 75:
+        return linea + '\r\n'
+    partes = []
+    actual, octetos = '', 0
+    for caracter in linea:
+        tamano = len(caracter.encode())
+        # Las líneas de continuación empiezan con un espacio, que cuenta en el límite
+        if octetos + tamano > (75 if not partes else 74):
+            partes.append(actual)
+            actual, octetos = '', 0
+        actual += caracter
+        octetos += tamano
+    partes.append(actual)
+    return '\r\n '.join(partes) + '\r\n'
+
+
+def fecha_utc(instante):
+    """Instante como DATE-TIME UTC de iCalendar (20250807T180000Z)"""
+    return instante.astimezone(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def encabezado():
+    return ''.join(plegar(linea) for linea in (
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        'PRODID:-//Gobierno de Chiapas//Agenda del Gobernador//ES',
+        'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH',
+        f'X-WR-CALNAME:{escapar(NOMBRE_CALENDARIO)}',
+        'X-WR-TIMEZONE:America/Mexico_City',
+        # Sugerencia de frecuencia de actualización para los clientes que la respetan
+        'REFRESH-INTERVAL;VALUE=DURATION:PT15M',
+        'X-PUBLISHED-TTL:PT15M',
+    ))
+
+
+def cierre():
+    return plegar('END:VCALENDAR')
+
+
+def vevento(fila, dominio):
+    """VEVENT de una fila de ``COLUMNAS_FEED``"""
+    (
+        pk, nombre, fecha_evento, lugar, municipio, responsable,
+        estado, asistio_gobernador, representante, descripcion, fecha_actualizacion,
+    ) = fila
+    asistencia = 'Asiste el Gobernador' if asistio_gobernador else f'Asiste representante: {representante or "por definir"}'
+    detalle = '\n'.join(parte for parte in (
+        f'Responsable: {responsable}', asistencia, descripcion,
+    ) if parte)
+    lineas = [
+        'BEGIN:VEVENT',
+        f'UID:evento-{pk}@{dominio}',
+        f'DTSTAMP:{fecha_utc(fecha_actualizacion)}',
+        f'LAST-MODIFIED:{fecha_utc(fecha_actualizacion)}',
+        f'DTSTART:{fecha_utc(fecha_evento)}',
+        f'DTEND:{fecha_utc(fecha_evento + DURACION_EVENTO)}',
+        f'SUMMARY:{escapar(nombre)}',
+        f'LOCATION:{escapar(f"{lugar}, {municipio}")}',
+        f'DESCRIPTION:{escapar(detalle)}',
+        f'STATUS:{ESTADOS_ICAL.get(estado, "CONFIRMED")}',
+        'END:VEVENT',
+    ]
+    return ''.join(plegar(linea) for linea in lineas)
+
+
+def generar_feed(eventos, dominio):
+    """Generador del calendario completo para ``StreamingHttpResponse`` (bytes UTF-8)"""
+    yield encabezado().encode()
+    bloque = []
+    for fila in eventos.values_list(*COLUMNAS_FEED).iterator(chunk_size=TAMANO_BLOQUE_FEED):
+        bloque.append(vevento(fila, dominio))
+        if len(bloque) == TAMANO_BLOQUE_FEED:
+            yield ''.join(bloque).encode()
+            bloque = []
+    if bloque:
+        yield ''.join(bloque).encode()
+    yield cierre().encode()
@@ -0,0 +1,32 @@
+# eventos/lookups.py
+from datetime import date, datetime
+
+from django.db import models
+from django.db.models.lookups import GreaterThanOrEqual, LessThan
+
+from .utils import rango_dia_mexico
+
+
+@models.DateTimeField.register_lookup
+class DiaMexico(models.Lookup):
+    """``campo__dia_mx=fecha``: eventos del día local de México como rango [inicio, fin).
+
+    A diferencia de ``__date`` no convierte la columna, por lo que usa los índices sobre ella.
+    """
+    lookup_name = 'dia_mx'
+    prepare_rhs = False
+
+    def get_prep_lookup(self):
+        if isinstance(self.rhs, datetime):
+            return self.rhs.date()
+        if isinstance(self.rhs, date):
+            return self.rhs
+        return date.fromisoformat(str(self.rhs))
+
+    def as_sql(self, compiler, connection):
+        inicio, fin = rango_dia_mexico(self.rhs)
+        sql_inicio, params_inicio = compiler.compile(GreaterThanOrEqual(self.lhs, inicio))
+        if fin is None:
+            return sql_inicio, params_inicio
+        sql_fin, params_fin = compiler.compile(LessThan(self.lhs, fin))
+        return f'({sql_inicio} AND {sql_fin})', (*params_inicio, *params_fin)
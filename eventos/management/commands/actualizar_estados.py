@@ -2,7 +2,7 @@
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 from eventos.models import Evento
-import pytz
+from eventos.utils import get_current_mexico_time, get_mexico_timezone
 
 class Command(BaseCommand):
     help = 'Actualiza los estados de todos los eventos automáticamente'
@@ -30,8 +30,8 @@ class Command(BaseCommand):
         solo_hoy = options['solo_hoy']
         
         # Configurar zona horaria de México
-        mexico_tz = pytz.timezone('America/Mexico_City')
-        ahora_mexico = timezone.now().astimezone(mexico_tz)
+        mexico_tz = get_mexico_timezone()
+        ahora_mexico = get_current_mexico_time()
         hoy = ahora_mexico.date()
         
         self.stdout.write('=' * 60)
@@ -45,54 +45,34 @@ class Command(BaseCommand):
         
         # Obtener eventos
         if solo_hoy:
-            eventos = Evento.objects.filter(fecha_evento__date=hoy).order_by('fecha_evento')
+            eventos = Evento.objects.filter(fecha_evento__dia_mx=hoy).order_by('fecha_evento')
             self.stdout.write(f'Procesando solo eventos de hoy...')
         else:
             eventos = Evento.objects.all().order_by('fecha_evento')
             self.stdout.write(f'Procesando todos los eventos...')
         
         total_eventos = eventos.count()
-        cambios = 0
         
         self.stdout.write(f'Total de eventos a revisar: {total_eventos}')
         self.stdout.write('-' * 60)
         
-        for evento in eventos:
-            estado_anterior = evento.estado
-            fecha_evento_mexico = evento.fecha_evento.astimezone(mexico_tz)
-            
-            if not dry_run:
-                nuevo_estado = evento.actualizar_estado_automatico()
-            else:
-                # Simular el cálculo sin guardar
-                if evento.fecha_finalizacion_manual:
-                    nuevo_estado = evento.estado
-                elif ahora_mexico < fecha_evento_mexico:
-                    nuevo_estado = 'programado'
-                elif ahora_mexico >= fecha_evento_mexico and ahora_mexico < (fecha_evento_mexico + timezone.timedelta(hours=1)):
-                    nuevo_estado = 'en_curso'
-                else:
-                    nuevo_estado = 'finalizado'
-            
-            # Verificar si es evento de hoy
-            es_hoy = fecha_evento_mexico.date() == hoy
-            marca_hoy = "📅 HOY" if es_hoy else ""
-            
-            if estado_anterior != nuevo_estado:
-                cambios += 1
-                if verbose or dry_run:
-                    self.stdout.write(
-                        f'{marca_hoy} {evento.nombre} | '
-                        f'{fecha_evento_mexico.strftime("%d/%m/%Y %H:%M")} | '
-                        f'{estado_anterior} → {nuevo_estado}'
-                    )
-            elif verbose:
+        # Listar los eventos que cambiarán antes de aplicar el UPDATE en bloque
+        if verbose or dry_run:
+            for evento in eventos.con_cambio_estado(ahora_mexico):
+                fecha_evento_mexico = evento.fecha_evento.astimezone(mexico_tz)
+                marca_hoy = "📅 HOY" if fecha_evento_mexico.date() == hoy else ""
                 self.stdout.write(
                     f'{marca_hoy} {evento.nombre} | '
                     f'{fecha_evento_mexico.strftime("%d/%m/%Y %H:%M")} | '
-                    f'{nuevo_estado} (sin cambios)'
+                    f'{evento.estado} → {evento.nuevo_estado}'
                 )
         
+        if dry_run:
+            conteos = eventos.contar_cambios_estado(ahora_mexico)
+        else:
+            conteos = eventos.sincronizar_estados(ahora_mexico)
+        cambios = sum(conteos.values())
+        
         self.stdout.write('-' * 60)
         
         if dry_run:
@@ -103,6 +83,9 @@ class Command(BaseCommand):
             self.stdout.write(
                 self.style.SUCCESS(f'✓ Actualizados {cambios} eventos de {total_eventos}')
             )
+        for estado_key, estado_nombre in Evento.ESTADO_CHOICES:
+            if conteos.get(estado_key):
+                self.stdout.write(f'  → {estado_nombre}: {conteos[estado_key]}')
         
         # Mostrar estadísticas actuales
         self.stdout.write('\n📊 ESTADÍSTICAS ACTUALES')
@@ -112,7 +95,7 @@ class Command(BaseCommand):
             self.stdout.write(f'{estado_nombre}: {count} eventos')
         
         # Mostrar eventos de hoy
-        eventos_hoy = eventos.filter(fecha_evento__date=hoy)
+        eventos_hoy = eventos.filter(fecha_evento__dia_mx=hoy)
         
         self.stdout.write(f'\n📅 EVENTOS DE HOY ({hoy.strftime("%d/%m/%Y")})')
         self.stdout.write('=' * 40)
@@ -145,7 +128,7 @@ class Command(BaseCommand):
         
         # Mostrar próximos eventos
         manana = hoy + timezone.timedelta(days=1)
-        eventos_manana = Evento.objects.filter(fecha_evento__date=manana)
+        eventos_manana = Evento.objects.filter(fecha_evento__dia_mx=manana)
         
         if eventos_manana.exists():
             self.stdout.write(f'\n📅 EVENTOS DE MAÑANA ({manana.strftime("%d/%m/%Y")})')
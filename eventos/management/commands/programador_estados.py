@@ -0,0 +1,176 @@
+# eventos/management/commands/programador_estados.py
+import heapq
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, close_old_connections, connection
+from django.db.models import Max
+from django.utils import timezone
+from eventos.models import DURACION_EVENTO, Evento
+
+
+class Command(BaseCommand):
+    help = (
+        'Proceso continuo que aplica los cambios de estado de los eventos '
+        'justo en el instante en que ocurren (inicio y fin de cada evento)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--intervalo-refresco',
+            type=int,
+            default=30,
+            help='Segundos máximos entre revisiones de eventos creados o editados (default: 30)',
+        )
+        parser.add_argument(
+            '--horizonte-horas',
+            type=int,
+            default=48,
+            help='Horas hacia adelante cuyos cambios se mantienen en memoria (default: 48)',
+        )
+        parser.add_argument(
+            '--margen-marca',
+            type=int,
+            default=120,
+            help=(
+                'Segundos que se releen antes de la marca de agua para incluir transacciones '
+                'confirmadas tarde (default: 120)'
+            ),
+        )
+        parser.add_argument(
+            '--una-vez',
+            action='store_true',
+            help='Aplica los cambios pendientes y termina (útil para cron o pruebas)',
+        )
+
+    def handle(self, *args, **options):
+        self.intervalo_refresco = timezone.timedelta(seconds=options['intervalo_refresco'])
+        self.horizonte = timezone.timedelta(hours=options['horizonte_horas'])
+        self.margen_marca = timezone.timedelta(seconds=options['margen_marca'])
+        self.heap = []
+        self.programados = set()
+
+        ahora = timezone.now()
+
+        # Ponerse al día con una sola sincronización en bloque
+        conteos = Evento.objects.sincronizar_estados(ahora)
+        self.stdout.write(f'Sincronización inicial: {self._formatear_conteos(conteos)}')
+
+        self.marca_agua = Evento.objects.aggregate(ultima=Max('fecha_actualizacion'))['ultima']
+        self.limite_cargado = ahora
+        self._extender_horizonte(ahora)
+        self.stdout.write(f'Transiciones en memoria: {len(self.heap)}')
+
+        if options['una_vez']:
+            self._aplicar_vencidos(timezone.now())
+            return
+
+        try:
+            while True:
+                self._dormir_hasta_siguiente()
+                # Descarta conexiones caídas o vencidas (CONN_MAX_AGE) antes de consultar
+                close_old_connections()
+                ahora = timezone.now()
+                try:
+                    self._refrescar(ahora)
+                    self._aplicar_vencidos(ahora)
+                except DatabaseError as error:
+                    # La siguiente vuelta reconecta; las fronteras pendientes siguen en el heap
+                    self.stderr.write(f'Error de base de datos, se reintentará: {error}')
+                    connection.close()
+        except KeyboardInterrupt:
+            self.stdout.write('\nProgramador de estados detenido.')
+
+    def _programar(self, pk, fecha_evento, ahora):
+        """Agrega al heap las fronteras futuras (inicio y fin) de un evento"""
+        for instante in (fecha_evento, fecha_evento + DURACION_EVENTO):
+            if instante > ahora and (instante, pk) not in self.programados:
+                heapq.heappush(self.heap, (instante, pk))
+                self.programados.add((instante, pk))
+
+    def _cargar(self, eventos, ahora):
+        for pk, fecha_evento in eventos.filter(
+            fecha_finalizacion_manual__isnull=True
+        ).values_list('pk', 'fecha_evento'):
+            self._programar(pk, fecha_evento, ahora)
+
+    def _extender_horizonte(self, ahora):
+        """Carga las fronteras de los eventos que entran al horizonte"""
+        nuevo_limite = ahora + self.horizonte
+        self._cargar(
+            Evento.objects.filter(
+                fecha_evento__gt=self.limite_cargado - DURACION_EVENTO,
+                fecha_evento__lte=nuevo_limite,
+            ),
+            ahora,
+        )
+        self.limite_cargado = nuevo_limite
+
+    def _refrescar(self, ahora):
+        """Incorpora eventos creados o editados desde la última marca de agua.
+
+        ``fecha_actualizacion`` se fija antes del commit: una transacción que confirma
+        después de la revisión anterior puede traer una fecha menor que la marca, así que
+        se relee un margen hacia atrás; ``programados`` evita duplicar fronteras en el heap.
+        """
+        if self.marca_agua is None:
+            cambiados = Evento.objects.all()
+        else:
+            cambiados = Evento.objects.filter(fecha_actualizacion__gt=self.marca_agua - self.margen_marca)
+
+        ultima = cambiados.aggregate(ultima=Max('fecha_actualizacion'))['ultima']
+        if ultima is not None:
+            lote = cambiados.filter(fecha_actualizacion__lte=ultima)
+            # Eventos creados o editados con fronteras ya pasadas no entran al heap:
+            # su estado se corrige aquí mismo
+            conteos = lote.sincronizar_estados(ahora)
+            if any(conteos.values()):
+                self.stdout.write(
+                    f'[{timezone.localtime(ahora):%d/%m/%Y %H:%M:%S}] '
+                    f'Eventos editados: {self._formatear_conteos(conteos)}'
+                )
+            self._cargar(
+                lote.filter(
+                    fecha_evento__gt=ahora - DURACION_EVENTO,
+                    fecha_evento__lte=self.limite_cargado,
+                ),
+                ahora,
+            )
+            self.marca_agua = max(ultima, self.marca_agua) if self.marca_agua else ultima
+
+        if ahora + self.horizonte - self.limite_cargado >= self.intervalo_refresco:
+            self._extender_horizonte(ahora)
+
+    def _aplicar_vencidos(self, ahora):
+        """Sincroniza solo los eventos cuyas fronteras ya se alcanzaron"""
+        vencidos = set()
+        while self.heap and self.heap[0][0] <= ahora:
+            entrada = heapq.heappop(self.heap)
+            self.programados.discard(entrada)
+            vencidos.add(entrada[1])
+
+        if not vencidos:
+            return
+
+        conteos = Evento.objects.filter(pk__in=vencidos).sincronizar_estados(ahora)
+        if any(conteos.values()):
+            self.stdout.write(
+                f'[{timezone.localtime(ahora):%d/%m/%Y %H:%M:%S}] '
+                f'{self._formatear_conteos(conteos)}'
+            )
+
+    def _dormir_hasta_siguiente(self):
+        ahora = timezone.now()
+        despertar = ahora + self.intervalo_refresco
+        if self.heap:
+            despertar = min(despertar, self.heap[0][0])
+        segundos = (despertar - ahora).total_seconds()
+        if segundos > 0:
+            time.sleep(segundos)
+
+    def _formatear_conteos(self, conteos):
+        cambios = sum(conteos.values())
+        if not cambios:
+            return 'sin cambios'
+        detalle = ', '.join(f'{estado}: {total}' for estado, total in conteos.items() if total)
+        return f'{cambios} eventos actualizados ({detalle})'
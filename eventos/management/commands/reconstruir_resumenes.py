@@ -0,0 +1,39 @@
+# eventos/management/commands/reconstruir_resumenes.py
+from django.core.management.base import BaseCommand, CommandError
+
+from eventos.resumenes import diferencias_resumenes, reconstruir_resumenes
+
+
+class Command(BaseCommand):
+    help = 'Recalcula los resúmenes diarios de eventos (EventoResumenDia) o verifica que estén al día'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verificar',
+            action='store_true',
+            help='Solo compara los resúmenes con los eventos y reporta diferencias, sin escribir',
+        )
+        parser.add_argument(
+            '--max-diferencias',
+            type=int,
+            default=20,
+            help='Diferencias a mostrar al verificar (default: 20)',
+        )
+
+    def handle(self, *args, **options):
+        if options['verificar']:
+            diferencias = diferencias_resumenes()
+            for (fecha, municipio_id), guardado, esperado in diferencias[:options['max_diferencias']]:
+                self.stdout.write(
+                    f'{fecha.isoformat()} municipio={municipio_id}: '
+                    f'guardado={guardado or "-"} esperado={esperado or "-"}'
+                )
+            if diferencias:
+                raise CommandError(
+                    f'{len(diferencias)} resúmenes no coinciden; ejecute reconstruir_resumenes sin --verificar'
+                )
+            self.stdout.write(self.style.SUCCESS('Los resúmenes coinciden con los eventos'))
+            return
+
+        total = reconstruir_resumenes()
+        self.stdout.write(self.style.SUCCESS(f'Resúmenes reconstruidos: {total} días/municipio'))
@@ -0,0 +1,23 @@
+# eventos/middleware.py
+from asgiref.sync import iscoroutinefunction
+from django.utils.decorators import sync_and_async_middleware
+
+from .utils import instantanea_reloj
+
+
+@sync_and_async_middleware
+def reloj_solicitud_middleware(get_response):
+    """Fija un único "ahora" por solicitud para modelos, filtros, formularios y vistas.
+
+    Así todas las filas de una página se evalúan contra el mismo instante y no se
+    consulta el reloj en cada propiedad.
+    """
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            with instantanea_reloj():
+                return await get_response(request)
+    else:
+        def middleware(request):
+            with instantanea_reloj():
+                return get_response(request)
+    return middleware
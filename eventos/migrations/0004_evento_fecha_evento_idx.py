@@ -0,0 +1,25 @@
+# Generated by Django 5.0.6 on 2026-10-17 01:01
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('eventos', '0003_auto_20250806_2217'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # Reemplaza el índice de fecha_evento creado con SQL en 0003 por uno declarado en el
+        # modelo, para no mantener dos b-trees idénticos sobre la misma columna
+        migrations.RunSQL(
+            "DROP INDEX IF EXISTS eventos_evento_fecha_evento_idx;",
+            reverse_sql="CREATE INDEX IF NOT EXISTS eventos_evento_fecha_evento_idx ON eventos_evento (fecha_evento);",
+        ),
+        migrations.AddIndex(
+            model_name='evento',
+            index=models.Index(fields=['fecha_evento'], name='evento_fecha_evento_idx'),
+        ),
+    ]
@@ -0,0 +1,135 @@
+import django.contrib.postgres.search
+from django.db import migrations
+
+# PostgreSQL: columna tsvector (español sin acentos) mantenida por trigger + índice GIN
+SQL_POSTGRES = [
+    "CREATE EXTENSION IF NOT EXISTS unaccent;",
+    """
+    DO $$ BEGIN
+        CREATE TEXT SEARCH CONFIGURATION espanol_sin_acentos (COPY = spanish);
+        ALTER TEXT SEARCH CONFIGURATION espanol_sin_acentos
+            ALTER MAPPING FOR hword, hword_part, word WITH unaccent, spanish_stem;
+    EXCEPTION WHEN unique_violation THEN NULL;
+    END $$;
+    """,
+    """
+    CREATE OR REPLACE FUNCTION eventos_evento_busqueda_actualizar() RETURNS trigger AS $$
+    BEGIN
+        NEW.busqueda :=
+            setweight(to_tsvector('espanol_sin_acentos', coalesce(NEW.nombre, '')), 'A') ||
+            setweight(to_tsvector('espanol_sin_acentos', coalesce(
+                (SELECT nombre FROM eventos_municipio WHERE id = NEW.municipio_id), '')), 'B') ||
+            setweight(to_tsvector('espanol_sin_acentos',
+                coalesce(NEW.lugar, '') || ' ' || coalesce(NEW.responsable, '') || ' ' ||
+                coalesce(NEW.representante, '')), 'B') ||
+            setweight(to_tsvector('espanol_sin_acentos',
+                coalesce(NEW.descripcion, '') || ' ' || coalesce(NEW.observaciones, '')), 'C');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql;
+    """,
+    """
+    CREATE TRIGGER eventos_evento_busqueda
+        BEFORE INSERT OR UPDATE ON eventos_evento
+        FOR EACH ROW EXECUTE FUNCTION eventos_evento_busqueda_actualizar();
+    """,
+    """
+    CREATE OR REPLACE FUNCTION eventos_municipio_busqueda_actualizar() RETURNS trigger AS $$
+    BEGIN
+        UPDATE eventos_evento SET municipio_id = municipio_id WHERE municipio_id = NEW.id;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql;
+    """,
+    """
+    CREATE TRIGGER eventos_municipio_busqueda
+        AFTER UPDATE OF nombre ON eventos_municipio
+        FOR EACH ROW EXECUTE FUNCTION eventos_municipio_busqueda_actualizar();
+    """,
+    "UPDATE eventos_evento SET id = id;",
+    "CREATE INDEX IF NOT EXISTS eventos_evento_busqueda_gin ON eventos_evento USING gin (busqueda);",
+]
+
+SQL_POSTGRES_REVERSA = [
+    "DROP INDEX IF EXISTS eventos_evento_busqueda_gin;",
+    "DROP TRIGGER IF EXISTS eventos_municipio_busqueda ON eventos_municipio;",
+    "DROP FUNCTION IF EXISTS eventos_municipio_busqueda_actualizar();",
+    "DROP TRIGGER IF EXISTS eventos_evento_busqueda ON eventos_evento;",
+    "DROP FUNCTION IF EXISTS eventos_evento_busqueda_actualizar();",
+]
+
+# SQLite (desarrollo y pruebas): tabla FTS5 sin acentos sincronizada por triggers
+_SQLITE_INSERTAR = """
+    INSERT INTO eventos_evento_fts (rowid, nombre, municipio, lugar, responsable, representante, descripcion, observaciones)
+    SELECT NEW.id, NEW.nombre, (SELECT nombre FROM eventos_municipio WHERE id = NEW.municipio_id),
+           NEW.lugar, NEW.responsable, NEW.representante, NEW.descripcion, NEW.observaciones;
+"""
+
+SQL_SQLITE = [
+    """
+    CREATE VIRTUAL TABLE eventos_evento_fts USING fts5(
+        nombre, municipio, lugar, responsable, representante, descripcion, observaciones,
+        tokenize = 'unicode61 remove_diacritics 2'
+    );
+    """,
+    f"CREATE TRIGGER eventos_evento_fts_ai AFTER INSERT ON eventos_evento BEGIN {_SQLITE_INSERTAR} END;",
+    f"""
+    CREATE TRIGGER eventos_evento_fts_au AFTER UPDATE ON eventos_evento BEGIN
+        DELETE FROM eventos_evento_fts WHERE rowid = OLD.id;
+        {_SQLITE_INSERTAR}
+    END;
+    """,
+    """
+    CREATE TRIGGER eventos_evento_fts_ad AFTER DELETE ON eventos_evento BEGIN
+        DELETE FROM eventos_evento_fts WHERE rowid = OLD.id;
+    END;
+    """,
+    """
+    CREATE TRIGGER eventos_municipio_fts_au AFTER UPDATE OF nombre ON eventos_municipio BEGIN
+        UPDATE eventos_evento_fts SET municipio = NEW.nombre
+        WHERE rowid IN (SELECT id FROM eventos_evento WHERE municipio_id = NEW.id);
+    END;
+    """,
+    """
+    INSERT INTO eventos_evento_fts (rowid, nombre, municipio, lugar, responsable, representante, descripcion, observaciones)
+    SELECT e.id, e.nombre, m.nombre, e.lugar, e.responsable, e.representante, e.descripcion, e.observaciones
+    FROM eventos_evento e JOIN eventos_municipio m ON m.id = e.municipio_id;
+    """,
+]
+
+SQL_SQLITE_REVERSA = [
+    "DROP TRIGGER IF EXISTS eventos_municipio_fts_au;",
+    "DROP TRIGGER IF EXISTS eventos_evento_fts_ad;",
+    "DROP TRIGGER IF EXISTS eventos_evento_fts_au;",
+    "DROP TRIGGER IF EXISTS eventos_evento_fts_ai;",
+    "DROP TABLE IF EXISTS eventos_evento_fts;",
+]
+
+
+def _ejecutar(schema_editor, sentencias_por_motor):
+    for sentencia in sentencias_por_motor.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sentencia, params=None)
+
+
+def crear_busqueda(apps, schema_editor):
+    _ejecutar(schema_editor, {'postgresql': SQL_POSTGRES, 'sqlite': SQL_SQLITE})
+
+
+def eliminar_busqueda(apps, schema_editor):
+    _ejecutar(schema_editor, {'postgresql': SQL_POSTGRES_REVERSA, 'sqlite': SQL_SQLITE_REVERSA})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('eventos', '0005_evento_fecha_evento_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='evento',
+            name='busqueda',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(crear_busqueda, eliminar_busqueda),
+    ]
@@ -0,0 +1,53 @@
+from django.db import migrations
+
+# PostgreSQL: índices de trigramas sin acentos para eventos.similitud.
+# unaccent() es STABLE; el envoltorio IMMUTABLE con diccionario explícito permite indexarlo.
+COLUMNAS_TRIGRAMAS = [
+    ('eventos_evento_lugar_trgm', 'eventos_evento', 'lugar'),
+    ('eventos_evento_responsable_trgm', 'eventos_evento', 'responsable'),
+    ('eventos_evento_representante_trgm', 'eventos_evento', 'representante'),
+    ('eventos_municipio_nombre_trgm', 'eventos_municipio', 'nombre'),
+]
+
+SQL_POSTGRES = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm;",
+    "CREATE EXTENSION IF NOT EXISTS unaccent;",
+    """
+    CREATE OR REPLACE FUNCTION eventos_unaccent(text) RETURNS text AS $$
+        SELECT public.unaccent('public.unaccent'::regdictionary, $1)
+    $$ LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT;
+    """,
+] + [
+    f"CREATE INDEX IF NOT EXISTS {indice} ON {tabla} USING gin (eventos_unaccent(lower({columna})) gin_trgm_ops);"
+    for indice, tabla, columna in COLUMNAS_TRIGRAMAS
+]
+
+SQL_POSTGRES_REVERSA = [
+    f"DROP INDEX IF EXISTS {indice};" for indice, _, _ in COLUMNAS_TRIGRAMAS
+] + [
+    "DROP FUNCTION IF EXISTS eventos_unaccent(text);",
+]
+
+
+def crear_trigramas(apps, schema_editor):
+    # SQLite usa el índice en memoria de eventos.similitud; no requiere esquema
+    if schema_editor.connection.vendor == 'postgresql':
+        for sentencia in SQL_POSTGRES:
+            schema_editor.execute(sentencia, params=None)
+
+
+def eliminar_trigramas(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        for sentencia in SQL_POSTGRES_REVERSA:
+            schema_editor.execute(sentencia, params=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('eventos', '0006_evento_busqueda'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_trigramas, eliminar_trigramas),
+    ]
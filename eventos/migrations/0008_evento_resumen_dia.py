@@ -0,0 +1,69 @@
+# Generated by Django 5.0.6 on 2026-10-17 01:18
+
+from zoneinfo import ZoneInfo
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q
+from django.db.models.functions import TruncDate
+
+
+def llenar_resumenes(apps, schema_editor):
+    """Resúmenes iniciales desde los eventos existentes (misma lógica que eventos.resumenes)"""
+    Evento = apps.get_model('eventos', 'Evento')
+    EventoResumenDia = apps.get_model('eventos', 'EventoResumenDia')
+    filas = (
+        Evento.objects.order_by()
+        .annotate(dia=TruncDate('fecha_evento', tzinfo=ZoneInfo('America/Mexico_City')))
+        .values('dia', 'municipio_id')
+        .annotate(
+            total=Count('pk'),
+            programados=Count('pk', filter=Q(estado='programado')),
+            en_curso=Count('pk', filter=Q(estado='en_curso')),
+            finalizados=Count('pk', filter=Q(estado='finalizado')),
+            cancelados=Count('pk', filter=Q(estado='cancelado')),
+            con_gobernador=Count('pk', filter=Q(asistio_gobernador=True)),
+            con_representante=Count('pk', filter=Q(asistio_gobernador=False)),
+            festivos=Count('pk', filter=Q(es_festivo=True)),
+        )
+    )
+    EventoResumenDia.objects.bulk_create(
+        [EventoResumenDia(fecha=fila.pop('dia'), **fila) for fila in filas],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('eventos', '0007_trigramas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventoResumenDia',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField(verbose_name='Fecha (hora de México)')),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('programados', models.PositiveIntegerField(default=0)),
+                ('en_curso', models.PositiveIntegerField(default=0)),
+                ('finalizados', models.PositiveIntegerField(default=0)),
+                ('cancelados', models.PositiveIntegerField(default=0)),
+                ('con_gobernador', models.PositiveIntegerField(default=0)),
+                ('con_representante', models.PositiveIntegerField(default=0)),
+                ('festivos', models.PositiveIntegerField(default=0)),
+                ('municipio', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumenes_dia', to='eventos.municipio', verbose_name='Municipio')),
+            ],
+            options={
+                'verbose_name': 'Resumen diario de eventos',
+                'verbose_name_plural': 'Resúmenes diarios de eventos',
+                'ordering': ['fecha'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='eventoresumendia',
+            constraint=models.UniqueConstraint(fields=('fecha', 'municipio'), name='evento_resumen_dia_unico'),
+        ),
+        migrations.RunPython(llenar_resumenes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.0.6 on 2026-10-17 01:25
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('eventos', '0008_evento_resumen_dia'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TokenCalendario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=64, unique=True, verbose_name='Token')),
+                ('fecha_creacion', models.DateTimeField(auto_now=True, verbose_name='Fecha de creación')),
+            ],
+            options={
+                'verbose_name': 'Token de calendario',
+                'verbose_name_plural': 'Tokens de calendario',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='evento',
+            index=models.Index(fields=['fecha_actualizacion'], name='evento_fecha_actualizacion_idx'),
+        ),
+        migrations.AddField(
+            model_name='tokencalendario',
+            name='usuario',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='token_calendario', to=settings.AUTH_USER_MODEL, verbose_name='Usuario'),
+        ),
+    ]
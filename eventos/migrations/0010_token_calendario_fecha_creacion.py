@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-17 01:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('eventos', '0009_token_calendario'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='tokencalendario',
+            name='fecha_creacion',
+            field=models.DateTimeField(auto_now_add=True, verbose_name='Fecha de creación'),
+        ),
+    ]
@@ -1,8 +1,51 @@
 # eventos/models.py
+import logging
+import secrets
+
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.db.models import Case, Count, F, Q, Value, When
+from django.db.models.functions import Left, TruncDate
+from django.dispatch import Signal
 from django.contrib.auth.models import User
 from django.utils import timezone
-import pytz
+
+from .broadcast import publicar_cambio_agenda
+from .busqueda import buscar_eventos
+from .cache import incrementar_version_agenda
+from .similitud import UMBRAL_SIMILITUD, buscar_similares
+from . import lookups  # noqa: F401  registra fecha_evento__dia_mx
+from .utils import (
+    MEXICO_TZ, convert_to_mexico_time, filtro_fechas_mexico, get_current_mexico_time, obtener_ahora,
+)
+
+logger = logging.getLogger(__name__)
+
+# Tiempo que un evento permanece "en curso" antes de considerarse finalizado
+DURACION_EVENTO = timezone.timedelta(hours=1)
+
+# Columnas de las proyecciones de listado: sin descripcion, observaciones ni el vector de búsqueda
+CAMPOS_LISTADO = (
+    'id', 'nombre', 'fecha_evento', 'municipio__nombre', 'lugar', 'responsable', 'estado',
+    'fecha_finalizacion_manual', 'es_festivo', 'asistio_gobernador', 'representante',
+    'fecha_actualizacion',
+)
+CAMPOS_CALENDARIO = (
+    'id', 'nombre', 'fecha_evento', 'municipio__nombre', 'lugar', 'responsable',
+    'es_festivo', 'asistio_gobernador',
+)
+CAMPOS_EXPORTAR = (
+    'nombre', 'fecha_evento', 'municipio__nombre', 'lugar', 'responsable', 'estado',
+    'asistio_gobernador', 'representante', 'es_festivo',
+    'creado_por__username', 'creado_por__first_name', 'creado_por__last_name',
+)
+
+# Se envía tras sincronizar_estados() (UPDATE sin señales por fila) con las celdas
+# (día local, municipio_id) que tienen eventos que cambiaron de estado
+estados_sincronizados = Signal()
+
+# Caracteres de la descripción que muestra la tarjeta del calendario (el modal trae el texto completo)
+LONGITUD_DESCRIPCION_CALENDARIO = 280
 
 class Municipio(models.Model):
     """Modelo para los municipios de Chiapas"""
@@ -17,6 +60,164 @@ class Municipio(models.Model):
     def __str__(self):
         return self.nombre
 
+class EventoQuerySet(models.QuerySet):
+    """Consultas de eventos con operaciones de estado por lotes"""
+
+    @staticmethod
+    def _ventanas_estado(ahora):
+        """Condiciones sobre fecha_evento que definen cada estado automático"""
+        return {
+            'programado': Q(fecha_evento__gt=ahora),
+            'en_curso': Q(fecha_evento__lte=ahora, fecha_evento__gt=ahora - DURACION_EVENTO),
+            'finalizado': Q(fecha_evento__lte=ahora - DURACION_EVENTO),
+        }
+
+    @classmethod
+    def _expresion_estado(cls, ahora):
+        """Expresión SQL (CASE) con el estado automático que corresponde a cada evento"""
+        return Case(
+            *[When(condicion, then=Value(estado)) for estado, condicion in cls._ventanas_estado(ahora).items()],
+            output_field=models.CharField(),
+        )
+
+    def _cambios_pendientes(self, ahora):
+        """Condición por estado de los eventos cuyo estado guardado no coincide con el automático"""
+        return {
+            estado: condicion & ~Q(estado=estado)
+            for estado, condicion in self._ventanas_estado(ahora).items()
+        }
+
+    def con_cambio_estado(self, ahora=None):
+        """Eventos no finalizados manualmente cuyo estado debe cambiar, anotados con ``nuevo_estado``"""
+        ahora = ahora or obtener_ahora()
+        condicion_cambio = Q()
+        for condicion in self._cambios_pendientes(ahora).values():
+            condicion_cambio |= condicion
+        return self.filter(fecha_finalizacion_manual__isnull=True).filter(condicion_cambio).annotate(
+            nuevo_estado=self._expresion_estado(ahora)
+        )
+
+    def contar_cambios_estado(self, ahora=None):
+        """Cuenta, por estado destino, los eventos que cambiarían al sincronizar (sin escribir)"""
+        ahora = ahora or obtener_ahora()
+        return self.filter(fecha_finalizacion_manual__isnull=True).aggregate(**{
+            estado: Count('pk', filter=condicion)
+            for estado, condicion in self._cambios_pendientes(ahora).items()
+        })
+
+    def con_estado_efectivo(self, ahora=None):
+        """Anota ``estado_efectivo``: el estado vigente calculado en SQL, sin escribir en la base.
+
+        Los eventos finalizados manualmente conservan su estado guardado.
+        """
+        ahora = ahora or obtener_ahora()
+        return self.annotate(estado_efectivo=Case(
+            When(fecha_finalizacion_manual__isnull=False, then=F('estado')),
+            default=self._expresion_estado(ahora),
+            output_field=models.CharField(),
+        ))
+
+    def sincronizar_estados(self, ahora=None):
+        """Actualiza en bloque el estado automático de los eventos no finalizados manualmente.
+
+        Un UPDATE por estado destino, sin importar cuántos eventos cambien; los conteos son
+        las filas que modificó cada UPDATE, sin una lectura previa que pueda quedar
+        desactualizada. Retorna un diccionario con el número de eventos que pasaron a cada estado.
+        """
+        ahora = ahora or obtener_ahora()
+        pendientes = self.filter(fecha_finalizacion_manual__isnull=True)
+        conteos = {
+            estado: pendientes.filter(condicion).update(estado=estado, fecha_actualizacion=ahora)
+            for estado, condicion in self._cambios_pendientes(ahora).items()
+        }
+        if any(conteos.values()):
+            # Celdas de los resúmenes afectadas: agrupadas por día y municipio, no una fila por evento
+            celdas = list(
+                pendientes.filter(fecha_actualizacion=ahora).order_by()
+                .annotate(dia=TruncDate('fecha_evento', tzinfo=MEXICO_TZ))
+                .values_list('dia', 'municipio_id').distinct()
+            )
+            # update() no emite señales: invalidar la caché y notificar explícitamente
+            incrementar_version_agenda()
+            estados_sincronizados.send(sender=Evento, celdas=celdas)
+            publicar_cambio_agenda('estados', cambios=conteos)
+        return conteos
+    
+    def para_listado(self):
+        """Modelos con solo las columnas de listas, tarjetas y el chatbot (municipio en el mismo JOIN)"""
+        return self.select_related('municipio').only(*CAMPOS_LISTADO)
+
+    def para_calendario(self, ahora=None):
+        """Tuplas para la API del calendario: ``CAMPOS_CALENDARIO``, ``estado_efectivo`` y la descripción recortada"""
+        return self.con_estado_efectivo(ahora).annotate(
+            descripcion_corta=Left('descripcion', LONGITUD_DESCRIPCION_CALENDARIO + 1),
+        ).values_list(*CAMPOS_CALENDARIO, 'estado_efectivo', 'descripcion_corta')
+
+    def para_exportar(self):
+        """Diccionarios con las columnas de los reportes exportados, sin instanciar modelos"""
+        return self.values(*CAMPOS_EXPORTAR)
+
+    @staticmethod
+    def normalizar_filtros(datos):
+        """Filtros de ``FiltroEventosForm.cleaned_data`` en forma canónica (solo los activos)"""
+        datos = datos or {}
+        filtros = {}
+        for campo in ('fecha_desde', 'fecha_hasta', 'estado'):
+            if datos.get(campo):
+                filtros[campo] = datos[campo]
+        if datos.get('municipio'):
+            municipio = datos['municipio']
+            filtros['municipio'] = getattr(municipio, 'pk', municipio)
+        asistencia = {'True': True, 'False': False}.get(str(datos.get('asistencia')))
+        if asistencia is not None:
+            filtros['asistio_gobernador'] = asistencia
+        es_festivo = {'festivo': True, 'regular': False}.get(datos.get('tipo_evento'))
+        if es_festivo is not None:
+            filtros['es_festivo'] = es_festivo
+        buscar = ' '.join((datos.get('buscar') or '').lower().split())
+        if buscar:
+            filtros['buscar'] = buscar
+        return filtros
+
+    def firma_filtros(self, datos):
+        """Firma hashable y estable de los filtros: igual para los mismos filtros en cualquier vista"""
+        return tuple(sorted(
+            (campo, valor.isoformat() if hasattr(valor, 'isoformat') else valor)
+            for campo, valor in self.normalizar_filtros(datos).items()
+        ))
+
+    def filtrar(self, datos):
+        """Aplica los filtros de ``FiltroEventosForm`` (lista, reportes y exportaciones)"""
+        filtros = self.normalizar_filtros(datos)
+        eventos = self
+        if 'fecha_desde' in filtros or 'fecha_hasta' in filtros:
+            eventos = eventos.filter(**filtro_fechas_mexico(filtros.get('fecha_desde'), filtros.get('fecha_hasta')))
+        for campo in ('municipio', 'estado', 'asistio_gobernador', 'es_festivo'):
+            if campo in filtros:
+                eventos = eventos.filter(**{campo: filtros[campo]})
+        if 'buscar' in filtros:
+            # Sin coincidencias de texto completo (p. ej. errores de escritura en un lugar o
+            # una persona) se recurre a la similitud por trigramas, en el orden original
+            coincidencias = eventos.buscar(filtros['buscar'])
+            if coincidencias.exists():
+                eventos = coincidencias
+            else:
+                eventos = eventos.buscar_similar(filtros['buscar']).order_by(*eventos.query.order_by)
+        return eventos
+
+    def buscar(self, texto, ordenar_por_relevancia=False, cualquiera=False):
+        """Búsqueda de texto completo sin acentos; anota ``relevancia`` (ver eventos.busqueda)"""
+        return buscar_eventos(self, texto, ordenar_por_relevancia, cualquiera)
+
+    def buscar_similar(self, texto, umbral=UMBRAL_SIMILITUD):
+        """Coincidencias aproximadas en lugar, responsable, representante y municipio,
+        anotadas con ``similitud`` y ordenadas de mayor a menor (ver eventos.similitud).
+
+        Se evalúa al llamarse: aplicar los demás filtros antes.
+        """
+        return buscar_similares(self, texto, umbral)
+
+
 class Evento(models.Model):
     """Modelo principal para los eventos del Gobernador"""
     
@@ -71,50 +272,57 @@ class Evento(models.Model):
     fecha_creacion = models.DateTimeField(auto_now_add=True, verbose_name="Fecha de creación")
     fecha_actualizacion = models.DateTimeField(auto_now=True, verbose_name="Última actualización")
     
+    # Vector de búsqueda (PostgreSQL), mantenido por trigger; ver migración 0006
+    busqueda = SearchVectorField(null=True, editable=False)
+    
+    objects = EventoQuerySet.as_manager()
+    
     class Meta:
         verbose_name = "Evento"
         verbose_name_plural = "Eventos"
         ordering = ['-fecha_evento']
+        indexes = [
+            # Filtros por día/rango de fechas (lookup dia_mx, rango_fechas_mexico) y
+            # paginación por cursor sobre (fecha_evento, id) en eventos.paginacion
+            models.Index(fields=['fecha_evento', 'id'], name='evento_fecha_evento_id_idx'),
+            # Última modificación de la agenda (validadores del feed iCalendar)
+            models.Index(fields=['fecha_actualizacion'], name='evento_fecha_actualizacion_idx'),
+        ]
     
     def __str__(self):
-        mexico_tz = pytz.timezone('America/Mexico_City')
-        fecha_mexico = self.fecha_evento.astimezone(mexico_tz)
+        fecha_mexico = self.get_fecha_mexico()
         return f"{self.nombre} - {self.municipio.nombre} - {fecha_mexico.strftime('%d/%m/%Y %H:%M')}"
     
     def get_fecha_mexico(self):
         """Retorna la fecha del evento en zona horaria de México"""
-        mexico_tz = pytz.timezone('America/Mexico_City')
-        return self.fecha_evento.astimezone(mexico_tz)
+        return convert_to_mexico_time(self.fecha_evento)
     
-    def actualizar_estado_automatico(self):
-        """Actualiza el estado del evento automáticamente basado en la fecha/hora"""
-        # Obtener fecha/hora actual en zona de México
-        mexico_tz = pytz.timezone('America/Mexico_City')
-        ahora_mexico = timezone.now().astimezone(mexico_tz)
-        fecha_evento_mexico = self.fecha_evento.astimezone(mexico_tz)
-        
+    def calcular_estado_automatico(self, ahora=None):
+        """Calcula el estado que corresponde al evento según la fecha/hora, sin guardarlo"""
         # Si el evento fue finalizado manualmente, no cambiar
         if self.fecha_finalizacion_manual:
             return self.estado
         
+        ahora = ahora or obtener_ahora()
+        
         # Si el evento aún no ha empezado
-        if ahora_mexico < fecha_evento_mexico:
-            nuevo_estado = 'programado'
+        if ahora < self.fecha_evento:
+            return 'programado'
         
         # Si el evento ya empezó pero no ha pasado 1 hora
-        elif (ahora_mexico >= fecha_evento_mexico and 
-              ahora_mexico < (fecha_evento_mexico + timezone.timedelta(hours=1))):
-            nuevo_estado = 'en_curso'
+        if ahora < self.fecha_evento + DURACION_EVENTO:
+            return 'en_curso'
         
         # Si ya pasó más de 1 hora desde que empezó
-        else:
-            nuevo_estado = 'finalizado'
+        return 'finalizado'
+    
+    def actualizar_estado_automatico(self):
+        """Actualiza el estado del evento automáticamente basado en la fecha/hora"""
+        nuevo_estado = self.calcular_estado_automatico()
         
         # Solo actualizar si el estado cambió
         if self.estado != nuevo_estado:
-            print(f"DEBUG MODEL - Actualizando estado de {self.nombre}: {self.estado} -> {nuevo_estado}")
-            print(f"DEBUG MODEL - Ahora México: {ahora_mexico}")
-            print(f"DEBUG MODEL - Evento México: {fecha_evento_mexico}")
+            logger.debug('Estado de evento %s actualizado: %s -> %s', self.pk, self.estado, nuevo_estado)
             self.estado = nuevo_estado
             self.save(update_fields=['estado', 'fecha_actualizacion'])
         
@@ -129,48 +337,42 @@ class Evento(models.Model):
     
     @property
     def estado_calculado(self):
-        """Retorna el estado actual del evento (calculado automáticamente)"""
-        return self.actualizar_estado_automatico()
+        """Retorna el estado actual del evento (calculado automáticamente, sin escribir)"""
+        estado_efectivo = getattr(self, 'estado_efectivo', None)
+        if estado_efectivo is not None:
+            return estado_efectivo
+        return self.calcular_estado_automatico()
+    
+    def get_estado_calculado_display(self):
+        """Etiqueta legible del estado calculado"""
+        return dict(self.ESTADO_CHOICES).get(self.estado_calculado, self.estado_calculado)
     
     @property
     def es_evento_hoy(self):
         """Verifica si el evento es hoy (en zona de México)"""
-        mexico_tz = pytz.timezone('America/Mexico_City')
-        ahora_mexico = timezone.now().astimezone(mexico_tz)
-        fecha_evento_mexico = self.fecha_evento.astimezone(mexico_tz)
-        return fecha_evento_mexico.date() == ahora_mexico.date()
+        return self.get_fecha_mexico().date() == get_current_mexico_time().date()
     
     @property
     def es_evento_proximo(self):
         """Verifica si el evento es en los próximos 7 días (en zona de México)"""
-        mexico_tz = pytz.timezone('America/Mexico_City')
-        ahora_mexico = timezone.now().astimezone(mexico_tz)
-        fecha_evento_mexico = self.fecha_evento.astimezone(mexico_tz)
-        fecha_limite = ahora_mexico.date() + timezone.timedelta(days=7)
-        return (fecha_evento_mexico.date() >= ahora_mexico.date() and 
-                fecha_evento_mexico.date() <= fecha_limite)
+        hoy = get_current_mexico_time().date()
+        fecha_limite = hoy + timezone.timedelta(days=7)
+        return hoy <= self.get_fecha_mexico().date() <= fecha_limite
     
     @property
     def puede_finalizar_manualmente(self):
         """Verifica si el evento puede ser finalizado manualmente"""
-        mexico_tz = pytz.timezone('America/Mexico_City')
-        ahora_mexico = timezone.now().astimezone(mexico_tz)
-        fecha_evento_mexico = self.fecha_evento.astimezone(mexico_tz)
-        
         # Puede finalizar si ya empezó y no está finalizado manualmente
-        return (ahora_mexico >= fecha_evento_mexico and 
-                self.estado != 'finalizado' and 
+        return (obtener_ahora() >= self.fecha_evento and 
+                self.estado_calculado != 'finalizado' and 
                 not self.fecha_finalizacion_manual)
     
     @property
     def tiempo_transcurrido(self):
         """Retorna el tiempo transcurrido desde que empezó el evento"""
-        mexico_tz = pytz.timezone('America/Mexico_City')
-        ahora_mexico = timezone.now().astimezone(mexico_tz)
-        fecha_evento_mexico = self.fecha_evento.astimezone(mexico_tz)
-        
-        if ahora_mexico >= fecha_evento_mexico:
-            return ahora_mexico - fecha_evento_mexico
+        ahora = obtener_ahora()
+        if ahora >= self.fecha_evento:
+            return ahora - self.fecha_evento
         return None
     
     def clean(self):
@@ -187,4 +389,70 @@ class Evento(models.Model):
         if self.asistio_gobernador and self.representante:
             raise ValidationError({
                 'representante': 'No debe especificar un representante si el Gobernador asistió.'
-            })
\ No newline at end of file
+            })
+
+
+class EventoResumenDia(models.Model):
+    """Conteos de eventos por día (hora de México) y municipio.
+
+    Se mantiene al guardar o eliminar eventos y al sincronizar estados (ver
+    eventos.resumenes); ``manage.py reconstruir_resumenes`` lo recalcula completo.
+    """
+    fecha = models.DateField(verbose_name="Fecha (hora de México)")
+    municipio = models.ForeignKey(
+        Municipio, on_delete=models.CASCADE, related_name='resumenes_dia', verbose_name="Municipio"
+    )
+    total = models.PositiveIntegerField(default=0)
+    programados = models.PositiveIntegerField(default=0)
+    en_curso = models.PositiveIntegerField(default=0)
+    finalizados = models.PositiveIntegerField(default=0)
+    cancelados = models.PositiveIntegerField(default=0)
+    con_gobernador = models.PositiveIntegerField(default=0)
+    con_representante = models.PositiveIntegerField(default=0)
+    festivos = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        verbose_name = "Resumen diario de eventos"
+        verbose_name_plural = "Resúmenes diarios de eventos"
+        ordering = ['fecha']
+        constraints = [
+            models.UniqueConstraint(fields=['fecha', 'municipio'], name='evento_resumen_dia_unico'),
+        ]
+    
+    def __str__(self):
+        return f"{self.fecha.isoformat()} - {self.municipio_id}: {self.total}"
+
+
+class TokenCalendario(models.Model):
+    """Token secreto por usuario para suscribirse al feed iCalendar (``calendario/feed.ics``).
+
+    Los clientes de calendario no pueden iniciar sesión: el token en la URL identifica al
+    usuario y se puede regenerar para revocar la suscripción anterior.
+    """
+    usuario = models.OneToOneField(
+        User, on_delete=models.CASCADE, related_name='token_calendario', verbose_name="Usuario"
+    )
+    token = models.CharField(max_length=64, unique=True, verbose_name="Token")
+    fecha_creacion = models.DateTimeField(auto_now_add=True, verbose_name="Fecha de creación")
+    
+    class Meta:
+        verbose_name = "Token de calendario"
+        verbose_name_plural = "Tokens de calendario"
+    
+    def __str__(self):
+        return f"{self.usuario.username}: {self.token[:8]}…"
+    
+    @staticmethod
+    def nuevo_token():
+        return secrets.token_urlsafe(32)
+    
+    @classmethod
+    def para_usuario(cls, usuario):
+        """Token del usuario, creado la primera vez que se pide"""
+        token, _ = cls.objects.get_or_create(usuario=usuario, defaults={'token': cls.nuevo_token()})
+        return token
+    
+    def regenerar(self):
+        """Reemplaza el token; la URL anterior deja de funcionar"""
+        self.token = self.nuevo_token()
+        self.save(update_fields=['token'])
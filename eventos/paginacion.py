@@ -0,0 +1,143 @@
+# eventos/paginacion.py
+"""Paginación por cursor (keyset) sobre ``(fecha_evento, id)`` descendente.
+
+A diferencia de OFFSET, cada página es un rango acotado del índice
+``evento_fecha_evento_id_idx`` y cuesta lo mismo sin importar la profundidad.
+Los cursores son tokens opacos (base64 de JSON) con la última fila vista, la
+dirección y la posición, usada solo para mostrar "Mostrando X-Y".
+"""
+import base64
+import json
+
+from django.db import connection
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+
+def codificar_cursor(evento, direccion, posicion):
+    """Token opaco que apunta antes (``'anterior'``) o después (``'siguiente'``) de ``evento``"""
+    datos = {
+        'd': direccion,
+        'f': evento.fecha_evento.isoformat(),
+        'i': evento.pk,
+        'p': posicion,
+    }
+    return base64.urlsafe_b64encode(json.dumps(datos).encode()).decode().rstrip('=')
+
+
+def decodificar_cursor(token):
+    """(direccion, fecha_evento, pk, posicion) o None si el token no es válido"""
+    if not token:
+        return None
+    try:
+        relleno = '=' * (-len(token) % 4)
+        datos = json.loads(base64.urlsafe_b64decode(token + relleno))
+        fecha = parse_datetime(datos['f'])
+        direccion = datos['d']
+        if fecha is None or direccion not in ('siguiente', 'anterior'):
+            return None
+        return direccion, fecha, int(datos['i']), max(0, int(datos['p']))
+    except (ValueError, TypeError, KeyError):
+        return None
+
+
+class PaginaCursor:
+    """Página obtenida por cursor, con los tokens para moverse a las vecinas"""
+
+    def __init__(self, eventos, posicion=0, por_pagina=4):
+        self.eventos = eventos
+        self.posicion = posicion
+        self.por_pagina = por_pagina
+        self.cursor_siguiente = None
+        self.cursor_anterior = None
+        self.total = None
+        self.total_estimado = False
+
+    @property
+    def tiene_siguiente(self):
+        return self.cursor_siguiente is not None
+
+    @property
+    def tiene_anterior(self):
+        return self.cursor_anterior is not None
+
+    @property
+    def numero(self):
+        return self.posicion // self.por_pagina + 1
+
+    @property
+    def total_paginas(self):
+        if self.total is None:
+            return None
+        return max(1, -(-self.total // self.por_pagina))
+
+    def info(self):
+        """Datos de "Mostrando X-Y de N" con las mismas llaves que la paginación clásica"""
+        return {
+            'showing_start': self.posicion + 1 if self.eventos else 0,
+            'showing_end': self.posicion + len(self.eventos),
+            'total_count': self.total,
+            'total_estimado': self.total_estimado,
+            'current_page': self.numero,
+            'total_pages': self.total_paginas,
+            'cursor_siguiente': self.cursor_siguiente,
+            'cursor_anterior': self.cursor_anterior,
+        }
+
+
+def paginar_por_cursor(queryset, cursor=None, por_pagina=4):
+    """Obtiene una página de ``queryset`` con una sola consulta de rango (LIMIT por_pagina + 1)"""
+    posicion_cursor = decodificar_cursor(cursor)
+    if posicion_cursor is None:
+        direccion, posicion = 'siguiente', 0
+        filas = list(queryset.order_by('-fecha_evento', '-id')[:por_pagina + 1])
+    else:
+        direccion, fecha, pk, posicion = posicion_cursor
+        if direccion == 'siguiente':
+            # (fecha_evento, id) < (fecha, pk); el primer término acota el rango del índice
+            filas = list(
+                queryset.filter(Q(fecha_evento__lte=fecha), Q(fecha_evento__lt=fecha) | Q(id__lt=pk))
+                .order_by('-fecha_evento', '-id')[:por_pagina + 1]
+            )
+        else:
+            filas = list(
+                queryset.filter(Q(fecha_evento__gte=fecha), Q(fecha_evento__gt=fecha) | Q(id__gt=pk))
+                .order_by('fecha_evento', 'id')[:por_pagina + 1]
+            )
+
+    hay_mas = len(filas) > por_pagina
+    eventos = filas[:por_pagina]
+    if direccion == 'anterior':
+        if not hay_mas:
+            # Se llegó al inicio: mostrar la primera página completa
+            return paginar_por_cursor(queryset, None, por_pagina)
+        eventos.reverse()
+        hay_anterior = True
+        hay_siguiente = True
+    else:
+        hay_anterior = posicion_cursor is not None and posicion > 0
+        hay_siguiente = hay_mas
+
+    pagina = PaginaCursor(eventos=eventos, posicion=posicion, por_pagina=por_pagina)
+    if eventos and hay_siguiente:
+        pagina.cursor_siguiente = codificar_cursor(eventos[-1], 'siguiente', posicion + len(eventos))
+    if eventos and hay_anterior:
+        pagina.cursor_anterior = codificar_cursor(eventos[0], 'anterior', max(0, posicion - por_pagina))
+    return pagina
+
+
+
+def estimar_total(queryset):
+    """Estimación del planificador de PostgreSQL sin recorrer la tabla; None en otros motores"""
+    if connection.vendor != 'postgresql':
+        return None
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    try:
+        return int(plan[0]['Plan']['Plan Rows'])
+    except (KeyError, IndexError, TypeError, ValueError):
+        return None
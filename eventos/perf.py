@@ -0,0 +1,197 @@
+# eventos/perf.py
+"""Instrumentación de rendimiento por solicitud.
+
+``RendimientoMiddleware`` mide por solicitud el tiempo total, las consultas SQL (número y
+tiempo), el tiempo de render de plantillas y el tamaño de la respuesta. Las muestras se
+acumulan por vista en una ventana móvil (``/debug/perf/``) y las solicitudes lentas se
+escriben como JSON en el logger ``eventos.perf``.
+
+El tiempo de plantillas se obtiene con el backend ``PlantillasMedidas`` configurado en
+``settings.TEMPLATES``.
+"""
+import json
+import logging
+import math
+import threading
+import time
+from collections import defaultdict, deque
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connection
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates, Template, reraise
+
+logger = logging.getLogger('eventos.perf')
+
+# Medición de la solicitud en curso (None fuera del middleware)
+_medicion_actual = ContextVar('medicion_actual', default=None)
+
+
+class PlantillaMedida(Template):
+    """Plantilla que suma su tiempo de render a la medición de la solicitud"""
+
+    def render(self, context=None, request=None):
+        medicion = _medicion_actual.get()
+        if medicion is None:
+            return super().render(context, request)
+        inicio = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            medicion['plantillas_ms'] += (time.perf_counter() - inicio) * 1000
+
+
+class PlantillasMedidas(DjangoTemplates):
+    """Backend DjangoTemplates que mide el render de cada plantilla de nivel superior"""
+
+    def from_string(self, template_code):
+        return PlantillaMedida(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return PlantillaMedida(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
+
+
+def _percentil(valores_ordenados, percentil):
+    """Percentil por rango más cercano de una lista ya ordenada"""
+    if not valores_ordenados:
+        return None
+    posicion = max(0, math.ceil(percentil / 100 * len(valores_ordenados)) - 1)
+    return valores_ordenados[posicion]
+
+
+class RegistroRendimiento:
+    """Ventana móvil de muestras por vista (en memoria, por proceso)"""
+
+    def __init__(self, ventana=500):
+        self.ventana = ventana
+        self._muestras = defaultdict(lambda: deque(maxlen=self.ventana))
+        self._lock = threading.Lock()
+
+    def registrar(self, muestra):
+        with self._lock:
+            self._muestras[muestra['vista']].append(muestra)
+
+    def limpiar(self):
+        with self._lock:
+            self._muestras.clear()
+
+    def resumen(self):
+        """Estadísticas por vista ordenadas por p95 descendente"""
+        with self._lock:
+            copias = {vista: list(muestras) for vista, muestras in self._muestras.items()}
+
+        filas = []
+        for vista, muestras in copias.items():
+            tiempos = sorted(muestra['duracion_ms'] for muestra in muestras)
+            tiempos_sql = sorted(muestra['sql_ms'] for muestra in muestras)
+            filas.append({
+                'vista': vista,
+                'solicitudes': len(muestras),
+                'p50_ms': _percentil(tiempos, 50),
+                'p95_ms': _percentil(tiempos, 95),
+                'max_ms': tiempos[-1],
+                'sql_p50_ms': _percentil(tiempos_sql, 50),
+                'consultas_promedio': sum(m['consultas'] for m in muestras) / len(muestras),
+                'plantillas_promedio_ms': sum(m['plantillas_ms'] for m in muestras) / len(muestras),
+                'bytes_promedio': sum(m['bytes'] or 0 for m in muestras) / len(muestras),
+            })
+        filas.sort(key=lambda fila: fila['p95_ms'], reverse=True)
+        return filas
+
+
+_registro = None
+_registro_lock = threading.Lock()
+
+
+def get_registro():
+    """Instancia única del registro de rendimiento del proceso"""
+    global _registro
+    if _registro is None:
+        with _registro_lock:
+            if _registro is None:
+                _registro = RegistroRendimiento(getattr(settings, 'PERF_VENTANA_MUESTRAS', 500))
+    return _registro
+
+
+class RendimientoMiddleware:
+    """Mide cada solicitud y la registra por vista; las lentas van al log rotativo.
+
+    Bajo ASGI se mide lo mismo que en WSGI: la medición viaja en un ContextVar y la
+    envoltura de consultas se instala en el hilo síncrono de la solicitud (las conexiones
+    son por hilo), el mismo donde ``sync_to_async`` ejecuta las vistas y el ORM. En
+    respuestas en streaming solo se mide hasta entregar la respuesta.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.umbral_lento_ms = getattr(settings, 'PERF_UMBRAL_LENTO_MS', 500)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        medicion = {'consultas': 0, 'sql_ms': 0.0, 'plantillas_ms': 0.0}
+        token = _medicion_actual.set(medicion)
+        inicio = time.perf_counter()
+        try:
+            with connection.execute_wrapper(self._medir_consulta(medicion)):
+                response = self.get_response(request)
+        finally:
+            _medicion_actual.reset(token)
+        self._registrar(request, response, inicio, medicion)
+        return response
+
+    async def __acall__(self, request):
+        medicion = {'consultas': 0, 'sql_ms': 0.0, 'plantillas_ms': 0.0}
+        envoltura = self._medir_consulta(medicion)
+        token = _medicion_actual.set(medicion)
+        inicio = time.perf_counter()
+        # ``connection`` se resuelve dentro de sync_to_async: la del hilo de la solicitud
+        await sync_to_async(lambda: connection.execute_wrappers.append(envoltura))()
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(lambda: connection.execute_wrappers.remove(envoltura))()
+            _medicion_actual.reset(token)
+        self._registrar(request, response, inicio, medicion)
+        return response
+
+    def _registrar(self, request, response, inicio, medicion):
+        duracion_ms = (time.perf_counter() - inicio) * 1000
+
+        match = getattr(request, 'resolver_match', None)
+        muestra = {
+            'vista': match.view_name if match else 'sin_ruta',
+            'metodo': request.method,
+            'ruta': request.path,
+            'estado': response.status_code,
+            'duracion_ms': round(duracion_ms, 2),
+            'consultas': medicion['consultas'],
+            'sql_ms': round(medicion['sql_ms'], 2),
+            'plantillas_ms': round(medicion['plantillas_ms'], 2),
+            'bytes': None if response.streaming else len(response.content),
+        }
+        get_registro().registrar(muestra)
+        if duracion_ms >= self.umbral_lento_ms:
+            logger.warning(json.dumps(muestra, ensure_ascii=False))
+
+    @staticmethod
+    def _medir_consulta(medicion):
+        def envoltura(execute, sql, params, many, context):
+            inicio = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                medicion['consultas'] += 1
+                medicion['sql_ms'] += (time.perf_counter() - inicio) * 1000
+        return envoltura
@@ -0,0 +1,122 @@
+# eventos/resumenes.py
+"""Mantenimiento de ``EventoResumenDia`` (conteos por día local y municipio).
+
+Cada cambio recalcula solo las celdas (día, municipio) afectadas con un aggregate
+agrupado acotado por el índice de ``fecha_evento`` (el día anterior y el nuevo si el
+evento se movió) y las escribe en bloque. La reconstrucción completa agrupa toda la tabla en una consulta.
+"""
+from django.db import transaction
+from django.db.models import Count, Q
+from django.db.models.functions import TruncDate
+
+from .models import Evento, EventoResumenDia
+from .utils import MEXICO_TZ, convert_to_mexico_time, filtro_fechas_mexico
+
+CAMPOS_CONTEO = (
+    'total', 'programados', 'en_curso', 'finalizados', 'cancelados',
+    'con_gobernador', 'con_representante', 'festivos',
+)
+
+
+def _conteos():
+    """Conteos condicionales de una celda, con los nombres de los campos del resumen"""
+    return {
+        'total': Count('pk'),
+        'programados': Count('pk', filter=Q(estado='programado')),
+        'en_curso': Count('pk', filter=Q(estado='en_curso')),
+        'finalizados': Count('pk', filter=Q(estado='finalizado')),
+        'cancelados': Count('pk', filter=Q(estado='cancelado')),
+        'con_gobernador': Count('pk', filter=Q(asistio_gobernador=True)),
+        'con_representante': Count('pk', filter=Q(asistio_gobernador=False)),
+        'festivos': Count('pk', filter=Q(es_festivo=True)),
+    }
+
+
+def celda_resumen(fecha_evento, municipio_id):
+    """Celda (día local, municipio) a la que pertenece un evento"""
+    return convert_to_mexico_time(fecha_evento).date(), municipio_id
+
+
+def recalcular_celdas(celdas):
+    """Recalcula las celdas indicadas desde ``Evento``; elimina las que quedaron vacías.
+
+    Costo fijo sin importar cuántas celdas cambien: un aggregate agrupado sobre los días y
+    municipios afectados, un upsert en bloque y, si alguna quedó vacía, un DELETE.
+    """
+    celdas = set(celdas)
+    if not celdas:
+        return
+    dias = {fecha for fecha, _ in celdas}
+    filas = (
+        Evento.objects.filter(
+            municipio_id__in={municipio_id for _, municipio_id in celdas},
+            **filtro_fechas_mexico(min(dias), max(dias)),
+        )
+        .order_by()
+        .annotate(dia=TruncDate('fecha_evento', tzinfo=MEXICO_TZ))
+        .filter(dia__in=dias)
+        .values('dia', 'municipio_id')
+        .annotate(**_conteos())
+    )
+    conteos = {
+        (fila['dia'], fila['municipio_id']): {campo: fila[campo] for campo in CAMPOS_CONTEO}
+        for fila in filas
+    }
+
+    resumenes = [
+        EventoResumenDia(fecha=fecha, municipio_id=municipio_id, **conteos[(fecha, municipio_id)])
+        for fecha, municipio_id in celdas if (fecha, municipio_id) in conteos
+    ]
+    if resumenes:
+        EventoResumenDia.objects.bulk_create(
+            resumenes,
+            update_conflicts=True,
+            unique_fields=['fecha', 'municipio'],
+            update_fields=list(CAMPOS_CONTEO),
+        )
+
+    vacias = Q()
+    for fecha, municipio_id in celdas - conteos.keys():
+        vacias |= Q(fecha=fecha, municipio_id=municipio_id)
+    if vacias:
+        EventoResumenDia.objects.filter(vacias).delete()
+
+
+def calcular_resumenes():
+    """Conteos esperados de todas las celdas, agrupando ``Evento`` en una sola consulta"""
+    filas = (
+        Evento.objects.order_by()
+        .annotate(dia=TruncDate('fecha_evento', tzinfo=MEXICO_TZ))
+        .values('dia', 'municipio_id')
+        .annotate(**_conteos())
+    )
+    return {
+        (fila['dia'], fila['municipio_id']): {campo: fila[campo] for campo in CAMPOS_CONTEO}
+        for fila in filas
+    }
+
+
+def diferencias_resumenes():
+    """Celdas cuyo resumen guardado no coincide con los eventos: [(celda, guardado, esperado)]"""
+    esperados = calcular_resumenes()
+    guardados = {
+        (fila['fecha'], fila['municipio_id']): {campo: fila[campo] for campo in CAMPOS_CONTEO}
+        for fila in EventoResumenDia.objects.values('fecha', 'municipio_id', *CAMPOS_CONTEO)
+    }
+    return [
+        (celda, guardados.get(celda), esperados.get(celda))
+        for celda in sorted(esperados.keys() | guardados.keys(), key=lambda c: (c[0], c[1]))
+        if guardados.get(celda) != esperados.get(celda)
+    ]
+
+
+@transaction.atomic
+def reconstruir_resumenes():
+    """Reemplaza todos los resúmenes por los calculados desde ``Evento``; retorna cuántos hay"""
+    resumenes = [
+        EventoResumenDia(fecha=fecha, municipio_id=municipio_id, **conteos)
+        for (fecha, municipio_id), conteos in calcular_resumenes().items()
+    ]
+    EventoResumenDia.objects.all().delete()
+    EventoResumenDia.objects.bulk_create(resumenes, batch_size=1000)
+    return len(resumenes)
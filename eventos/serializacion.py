@@ -0,0 +1,142 @@
+# eventos/serializacion.py
+"""Serialización rápida de eventos para las APIs JSON.
+
+Las filas llegan como tuplas de ``values_list`` (sin instancias del modelo), las fechas
+locales se convierten en una sola pasada y el JSON se codifica con orjson cuando está
+instalado; si no, con el módulo ``json`` de la biblioteca estándar.
+"""
+import json
+from datetime import date
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+
+from .utils import MEXICO_TZ
+
+try:
+    import orjson
+except ImportError:  # orjson es opcional: mismo resultado, más lento
+    orjson = None
+
+# Ordinal del 1 de enero de 1970, origen de los minutos del formato compacto
+ORDINAL_EPOCA = date(1970, 1, 1).toordinal()
+
+# 'HH:MM' de cada minuto del día, indexado por hora * 60 + minuto
+HORAS_DEL_DIA = tuple(f'{hora:02d}:{minuto:02d}' for hora in range(24) for minuto in range(60))
+
+
+def dumps(datos, ordenar=False):
+    """``datos`` codificados como JSON (bytes UTF-8)"""
+    if orjson is not None:
+        return orjson.dumps(datos, option=orjson.OPT_SORT_KEYS if ordenar else 0)
+    return json.dumps(
+        datos, cls=DjangoJSONEncoder, sort_keys=ordenar, ensure_ascii=False, separators=(',', ':'),
+    ).encode()
+
+
+class RespuestaJson(HttpResponse):
+    """Como ``JsonResponse``, pero codificada con ``dumps``"""
+
+    def __init__(self, datos, **kwargs):
+        kwargs.setdefault('content_type', 'application/json')
+        super().__init__(content=dumps(datos), **kwargs)
+
+
+def fechas_locales(instantes):
+    """Listas paralelas de fecha ('YYYY-MM-DD') y hora ('HH:MM') de México de cada instante.
+
+    Una conversión de zona por instante; las fechas ya formateadas se reutilizan entre
+    eventos del mismo día y las horas salen de una tabla, sin ``strftime``.
+    """
+    dias = {}
+    fechas, horas = [], []
+    for instante in instantes:
+        local = instante.astimezone(MEXICO_TZ)
+        dia = local.toordinal()
+        fecha = dias.get(dia)
+        if fecha is None:
+            fecha = dias[dia] = local.date().isoformat()
+        fechas.append(fecha)
+        horas.append(HORAS_DEL_DIA[local.hour * 60 + local.minute])
+    return fechas, horas
+
+
+def recortar_descripcion(descripcion, longitud):
+    """Descripción para el calendario: recortada a ``longitud`` caracteres con '…'"""
+    if not descripcion:
+        return 'Sin descripción'
+    if len(descripcion) > longitud:
+        return descripcion[:longitud].rstrip() + '…'
+    return descripcion
+
+
+def serializar_calendario(filas, longitud_descripcion):
+    """Tuplas de ``para_calendario()`` (``CAMPOS_CALENDARIO`` + estado y descripción) en el
+    formato que consume calendario.html"""
+    fechas, horas = fechas_locales([fila[2] for fila in filas])
+    return [
+        {
+            'id': pk,
+            'title': nombre,
+            'date': fecha,
+            'time': hora,
+            'location': f'{lugar}, {municipio}',
+            'description': recortar_descripcion(descripcion, longitud_descripcion),
+            'estado': estado,
+            'es_festivo': es_festivo,
+            'asistio_gobernador': asistio_gobernador,
+            'responsable': responsable,
+            'attendees': 0,
+            'municipio': municipio,
+            'full_location': lugar,
+        }
+        for (
+            pk, nombre, _, municipio, lugar, responsable,
+            es_festivo, asistio_gobernador, estado, descripcion,
+        ), fecha, hora in zip(filas, fechas, horas)
+    ]
+
+
+def compactar_calendario(eventos):
+    """Eventos de ``serializar_calendario`` en el formato compacto (``?formato=compacto``).
+
+    Una lista por columna; municipios, lugares, responsables y estados van como índices
+    a listas de valores únicos, y la fecha como minutos de reloj de México desde
+    1970-01-01 00:00 (el cliente la lee con los métodos UTC de ``Date`` sin convertir
+    zonas). Sin descripciones: se piden aparte al abrir un día.
+    """
+    diccionarios = {'municipios': {}, 'lugares': {}, 'responsables': {}, 'estados': {}}
+
+    def codificar(nombre, valor):
+        tabla = diccionarios[nombre]
+        indice = tabla.get(valor)
+        if indice is None:
+            indice = tabla[valor] = len(tabla)
+        return indice
+
+    dias = {}
+    columnas = {
+        'id': [], 'title': [], 'minuto': [], 'municipio': [], 'lugar': [],
+        'responsable': [], 'estado': [], 'es_festivo': [], 'asistio_gobernador': [],
+    }
+    for evento in eventos:
+        minuto_dia = dias.get(evento['date'])
+        if minuto_dia is None:
+            minuto_dia = dias[evento['date']] = (
+                (date.fromisoformat(evento['date']).toordinal() - ORDINAL_EPOCA) * 1440
+            )
+        hora = evento['time']
+        columnas['id'].append(evento['id'])
+        columnas['title'].append(evento['title'])
+        columnas['minuto'].append(minuto_dia + int(hora[:2]) * 60 + int(hora[3:]))
+        columnas['municipio'].append(codificar('municipios', evento['municipio']))
+        columnas['lugar'].append(codificar('lugares', evento['full_location']))
+        columnas['responsable'].append(codificar('responsables', evento['responsable']))
+        columnas['estado'].append(codificar('estados', evento['estado']))
+        columnas['es_festivo'].append(int(evento['es_festivo']))
+        columnas['asistio_gobernador'].append(int(evento['asistio_gobernador']))
+
+    return {
+        **{nombre: list(tabla) for nombre, tabla in diccionarios.items()},
+        'columnas': columnas,
+    }
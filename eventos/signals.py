@@ -0,0 +1,61 @@
+# eventos/signals.py
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .broadcast import publicar_cambio_agenda
+from .cache import incrementar_version_agenda
+from .models import Evento, Municipio, estados_sincronizados
+from .resumenes import celda_resumen, recalcular_celdas
+
+
+@receiver(post_save, sender=Evento)
+@receiver(post_delete, sender=Evento)
+@receiver(post_save, sender=Municipio)
+@receiver(post_delete, sender=Municipio)
+def invalidar_cache_agenda(sender, **kwargs):
+    """Cualquier cambio en eventos o municipios invalida la agenda cacheada"""
+    incrementar_version_agenda()
+
+
+@receiver(post_save, sender=Evento)
+def notificar_evento_guardado(sender, instance, created, **kwargs):
+    """Avisa a las pantallas conectadas que un evento se creó o actualizó"""
+    publicar_cambio_agenda('evento', id=instance.pk, accion='creado' if created else 'actualizado')
+
+
+@receiver(post_delete, sender=Evento)
+def notificar_evento_eliminado(sender, instance, **kwargs):
+    """Avisa a las pantallas conectadas que un evento se eliminó"""
+    publicar_cambio_agenda('evento', id=instance.pk, accion='eliminado')
+
+
+@receiver(pre_save, sender=Evento)
+def recordar_celda_resumen(sender, instance, raw=False, **kwargs):
+    """Guarda la celda de resumen previa por si el evento cambia de día o municipio"""
+    instance._celda_resumen_anterior = None
+    if instance.pk and not raw:
+        anterior = Evento.objects.filter(pk=instance.pk).values_list('fecha_evento', 'municipio_id').first()
+        if anterior:
+            instance._celda_resumen_anterior = celda_resumen(*anterior)
+
+
+@receiver(post_save, sender=Evento)
+def actualizar_resumen_guardado(sender, instance, raw=False, **kwargs):
+    """Recalcula el resumen diario del día/municipio del evento (y el anterior si se movió)"""
+    if raw:
+        return
+    celdas = [celda_resumen(instance.fecha_evento, instance.municipio_id)]
+    if getattr(instance, '_celda_resumen_anterior', None):
+        celdas.append(instance._celda_resumen_anterior)
+    recalcular_celdas(celdas)
+
+
+@receiver(post_delete, sender=Evento)
+def actualizar_resumen_eliminado(sender, instance, **kwargs):
+    recalcular_celdas([celda_resumen(instance.fecha_evento, instance.municipio_id)])
+
+
+@receiver(estados_sincronizados)
+def actualizar_resumen_estados(sender, celdas, **kwargs):
+    """Las transiciones de estado en bloque mueven conteos entre estados del mismo día"""
+    recalcular_celdas(celdas)
@@ -0,0 +1,231 @@
+# eventos/similitud.py
+"""Búsqueda aproximada por trigramas en personas y lugares.
+
+Tolera acentos y errores de escritura ("tuxtla gtz", "poliforum", "martinez gomes") en
+``lugar``, ``responsable``, ``representante`` y el nombre del municipio. La similitud es
+``word_similarity`` de pg_trgm: qué tanto se parece el texto buscado al mejor tramo
+continuo del campo, de modo que "cristobal" coincide por completo con
+"San Cristóbal de las Casas".
+
+* PostgreSQL: índices GIN ``gin_trgm_ops`` sobre ``eventos_unaccent(lower(campo))``
+  (migración 0007). El operador ``<%`` usa esos índices para descartar candidatos con el
+  umbral ``pg_trgm.word_similarity_threshold``, fijado con ``set_config(..., true)`` solo
+  durante la consulta de candidatos y restaurado después, y ``word_similarity()`` ordena.
+  Los municipios que coinciden se resuelven antes (tabla pequeña) para que el filtro sobre
+  eventos solo use columnas propias y el planificador combine los índices con BitmapOr.
+* SQLite (desarrollo y pruebas): índice invertido de trigramas en memoria, construido en
+  Python y reconstruido cuando cambian los eventos.
+
+Las coincidencias se calculan al llamar ``buscar_similares`` sobre el queryset recibido,
+así que los demás filtros deben aplicarse antes (como hace ``EventoQuerySet.filtrar``).
+"""
+import re
+import threading
+import unicodedata
+from collections import defaultdict
+
+from django.db import connections, transaction
+from django.db.models import (
+    BooleanField, Case, Count, F, FloatField, Func, Max, Q, Value, When,
+)
+from django.db.models.functions import Greatest, Lower
+
+from .cache import obtener_version_agenda
+
+UMBRAL_SIMILITUD = 0.5
+
+CAMPOS_SIMILITUD = ('lugar', 'responsable', 'representante', 'municipio__nombre')
+
+# Columnas propias del evento (el municipio se resuelve aparte, ver filtro_trigramas)
+CAMPOS_EVENTO_SIMILITUD = CAMPOS_SIMILITUD[:-1]
+
+# Máximo de coincidencias por búsqueda (las de mayor similitud dentro del queryset filtrado)
+LIMITE_SIMILARES = 500
+
+
+class SinAcentos(Func):
+    """``eventos_unaccent(lower(x))``: la misma expresión que indexa la migración 0007"""
+    function = 'eventos_unaccent'
+
+    def __init__(self, expresion, **extra):
+        super().__init__(Lower(expresion), **extra)
+
+
+class Similitud(Func):
+    function = 'word_similarity'
+    output_field = FloatField()
+
+
+class CoincideTrigramas(Func):
+    """``texto <% campo``: verdadero si la similitud supera el umbral de pg_trgm (usa el índice GIN)"""
+    arg_joiner = ' <%% '
+    template = '(%(expressions)s)'
+    output_field = BooleanField()
+
+
+def normalizar(texto):
+    """Minúsculas y sin acentos, como ``eventos_unaccent(lower(...))``"""
+    descompuesto = unicodedata.normalize('NFKD', (texto or '').lower())
+    return ''.join(caracter for caracter in descompuesto if not unicodedata.combining(caracter))
+
+
+def trigramas_ordenados(texto):
+    """Trigramas de ``texto`` en orden, con el relleno de pg_trgm ("  p", " pa", "pal", ..., "io ")"""
+    resultado = []
+    for palabra in re.findall(r'[^\W_]+', normalizar(texto)):
+        relleno = f'  {palabra} '
+        resultado.extend(relleno[i:i + 3] for i in range(len(relleno) - 2))
+    return tuple(resultado)
+
+
+def trigramas(texto):
+    """Conjunto de trigramas de ``texto``"""
+    return set(trigramas_ordenados(texto))
+
+
+def similitud(consulta, ordenados):
+    """``word_similarity``: mejor Jaccard entre el conjunto ``consulta`` y un tramo continuo de ``ordenados``"""
+    if not consulta or not ordenados:
+        return 0.0
+    mejor = 0.0
+    for inicio in range(len(ordenados)):
+        tramo = set()
+        comunes = 0
+        for trigrama in ordenados[inicio:]:
+            if trigrama in tramo:
+                continue
+            tramo.add(trigrama)
+            if trigrama in consulta:
+                comunes += 1
+                mejor = max(mejor, comunes / (len(consulta) + len(tramo) - comunes))
+        if mejor == 1.0:
+            break
+    return mejor
+
+
+class IndiceTrigramas:
+    """Índice invertido trigrama -> eventos para motores sin pg_trgm"""
+
+    def __init__(self, filas):
+        self.campos = {}
+        self.invertido = defaultdict(set)
+        for pk, *valores in filas:
+            ordenados = tuple(trigramas_ordenados(valor) for valor in valores)
+            self.campos[pk] = ordenados
+            for trigramas_campo in ordenados:
+                for trigrama in trigramas_campo:
+                    self.invertido[trigrama].add(pk)
+
+    def buscar(self, texto, umbral=UMBRAL_SIMILITUD):
+        """Lista de (pk, similitud) con similitud >= umbral, de mayor a menor"""
+        consulta = trigramas(texto)
+        if not consulta:
+            return []
+
+        compartidos = defaultdict(int)
+        for trigrama in consulta:
+            for pk in self.invertido.get(trigrama, ()):
+                compartidos[pk] += 1
+
+        # similitud <= comunes / |consulta|: descarta sin calcular la similitud exacta
+        minimo = umbral * len(consulta)
+        resultados = []
+        for pk, comunes in compartidos.items():
+            if comunes < minimo:
+                continue
+            mejor = max(similitud(consulta, ordenados) for ordenados in self.campos[pk])
+            if mejor >= umbral:
+                resultados.append((pk, mejor))
+        resultados.sort(key=lambda resultado: (-resultado[1], -resultado[0]))
+        return resultados
+
+
+_indice_local = {'firma': None, 'indice': None}
+_indice_lock = threading.Lock()
+
+
+def get_indice_local(modelo):
+    """Índice de trigramas del proceso, reconstruido si cambió la agenda.
+
+    La firma incluye conteo y máximos además de la versión de la agenda para detectar
+    también escrituras que no emiten señales (``bulk_create``, ``update``).
+    """
+    datos = modelo.objects.aggregate(
+        total=Count('id'), ultimo_id=Max('id'), actualizado=Max('fecha_actualizacion'),
+    )
+    firma = (obtener_version_agenda(), datos['total'], datos['ultimo_id'], datos['actualizado'])
+    with _indice_lock:
+        if _indice_local['firma'] != firma:
+            filas = modelo.objects.order_by().values_list('id', *CAMPOS_SIMILITUD)
+            _indice_local['indice'] = IndiceTrigramas(filas.iterator(chunk_size=5000))
+            _indice_local['firma'] = firma
+        return _indice_local['indice']
+
+
+def filtro_trigramas(consulta, municipios):
+    """Q de candidatos por ``<%`` sobre las columnas del evento o los ``municipios`` (ids)"""
+    coincide = Q(municipio_id__in=municipios)
+    for campo in CAMPOS_EVENTO_SIMILITUD:
+        coincide |= Q(CoincideTrigramas(consulta, SinAcentos(F(campo))))
+    return coincide
+
+
+def _coincidencias_postgres(queryset, texto, umbral):
+    """(pk, similitud) de ``queryset`` con los índices de pg_trgm, de mayor a menor"""
+    consulta = SinAcentos(Value(texto))
+    municipio = queryset.model._meta.get_field('municipio').related_model
+    with transaction.atomic(using=queryset.db), connections[queryset.db].cursor() as cursor:
+        # Umbral de <% local a la transacción; dentro de un atomic externo se restaura al
+        # terminar para no alterar otras consultas de la conexión
+        cursor.execute("SELECT current_setting('pg_trgm.word_similarity_threshold')")
+        anterior = cursor.fetchone()[0]
+        cursor.execute("SELECT set_config('pg_trgm.word_similarity_threshold', %s, true)", [str(umbral)])
+        try:
+            municipios = list(
+                municipio.objects.filter(CoincideTrigramas(consulta, SinAcentos(F('nombre'))))
+                .values_list('pk', flat=True)
+            )
+            return list(
+                queryset.filter(filtro_trigramas(consulta, municipios))
+                .annotate(similitud=Greatest(*[
+                    Similitud(consulta, SinAcentos(F(campo))) for campo in CAMPOS_SIMILITUD
+                ]))
+                .order_by('-similitud', '-fecha_evento')
+                .values_list('pk', 'similitud')[:LIMITE_SIMILARES]
+            )
+        finally:
+            cursor.execute("SELECT set_config('pg_trgm.word_similarity_threshold', %s, true)", [anterior])
+
+
+def _coincidencias_locales(queryset, texto, umbral):
+    """(pk, similitud) de ``queryset`` con el índice en memoria, de mayor a menor"""
+    permitidos = set(queryset.order_by().values_list('pk', flat=True))
+    coincidencias = get_indice_local(queryset.model).buscar(texto, umbral)
+    return [coincidencia for coincidencia in coincidencias if coincidencia[0] in permitidos][:LIMITE_SIMILARES]
+
+
+def buscar_similares(queryset, texto, umbral=UMBRAL_SIMILITUD):
+    """Filtra ``queryset`` a coincidencias aproximadas y anota ``similitud`` (mayor es mejor).
+
+    Evalúa las coincidencias al llamarse: los filtros aplicados después no amplían el
+    límite de ``LIMITE_SIMILARES``.
+    """
+    if not trigramas(texto):
+        return queryset.none()
+
+    if connections[queryset.db].vendor == 'postgresql':
+        coincidencias = _coincidencias_postgres(queryset, texto, umbral)
+    else:
+        coincidencias = _coincidencias_locales(queryset, texto, umbral)
+    if not coincidencias:
+        return queryset.none()
+
+    por_valor = defaultdict(list)
+    for pk, valor in coincidencias:
+        por_valor[valor].append(pk)
+    return queryset.filter(pk__in=[pk for pk, _ in coincidencias]).annotate(
+        similitud=Case(
+            *[When(pk__in=pks, then=Value(valor)) for valor, pks in por_valor.items()],
+            output_field=FloatField(),
+        ),
+    ).order_by('-similitud', '-fecha_evento')
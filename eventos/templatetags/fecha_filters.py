@@ -1,8 +1,8 @@
 # eventos/templatetags/fecha_filters.py
 from django import template
-from django.utils import timezone
 import datetime
-import pytz
+
+from eventos.utils import convert_to_mexico_time, obtener_ahora
 
 register = template.Library()
 
@@ -42,8 +42,7 @@ def fecha_espanol(fecha):
     try:
         # MEJORA: Mejor manejo de timezone de México
         if hasattr(fecha, 'astimezone'):
-            mexico_tz = pytz.timezone('America/Mexico_City')
-            fecha_mexico = fecha.astimezone(mexico_tz)
+            fecha_mexico = convert_to_mexico_time(fecha)
         else:
             fecha_mexico = fecha
         
@@ -82,8 +81,7 @@ def fecha_corta_espanol(fecha):
     try:
         # Convertir a timezone de México si es aware
         if hasattr(fecha, 'astimezone'):
-            mexico_tz = pytz.timezone('America/Mexico_City')
-            fecha_mexico = fecha.astimezone(mexico_tz)
+            fecha_mexico = convert_to_mexico_time(fecha)
         else:
             fecha_mexico = fecha
             
@@ -100,8 +98,7 @@ def hora_mexico(fecha):
     try:
         # Convertir a timezone de México si es aware
         if hasattr(fecha, 'astimezone'):
-            mexico_tz = pytz.timezone('America/Mexico_City')
-            fecha_mexico = fecha.astimezone(mexico_tz)
+            fecha_mexico = convert_to_mexico_time(fecha)
         else:
             fecha_mexico = fecha
             
@@ -127,9 +124,9 @@ def tiempo_hasta_evento(fecha_evento):
         return "Fecha no especificada"
     
     try:
-        ahora = timezone.now()
+        ahora = obtener_ahora()
         if hasattr(fecha_evento, 'astimezone'):
-            fecha_evento = fecha_evento.astimezone(timezone.get_current_timezone())
+            fecha_evento = convert_to_mexico_time(fecha_evento)
         
         diferencia = fecha_evento - ahora
         
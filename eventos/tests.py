@@ -1,3 +1,1497 @@
-from django.test import TestCase
+import asyncio
+import csv
+import gc
+import gzip
+import json
+import os
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from io import BytesIO, StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.models import Max, Value
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from openpyxl import load_workbook
+
+from .broadcast import BroadcasterLocal, BroadcasterPostgres
+from .chatbot import ChatbotAgenda
+from . import compresion
+from .compresion import elegir_codificacion
+from .cache import obtener_version_agenda
+from .middleware import reloj_solicitud_middleware
+from .models import DURACION_EVENTO, Evento, EventoResumenDia, Municipio, TokenCalendario
+from .paginacion import paginar_por_cursor
+from .perf import get_registro
+from .resumenes import diferencias_resumenes
+from .serializacion import compactar_calendario, dumps, fechas_locales, serializar_calendario
+from . import similitud
+from .utils import (
+    MEXICO_TZ, instantanea_reloj, localizar_mexico, obtener_ahora,
+    rango_dia_mexico,
+)
+from .views import _meses_calendario, dashboard
+
+# Las pruebas de rendimiento con volúmenes grandes solo corren bajo demanda
+requiere_benchmark = skipUnless(
+    os.environ.get('EVENTOS_BENCHMARK'), 'Benchmark opcional: exportar EVENTOS_BENCHMARK=1'
+)
+
+
+class EventoTestMixin:
+    """Datos base compartidos por las pruebas de eventos"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user('staff', password='clave-prueba')
+        cls.municipio = Municipio.objects.create(nombre='Tuxtla Gutiérrez')
+
+    def crear_evento(self, fecha_evento, **kwargs):
+        datos = {
+            'nombre': 'Evento de prueba',
+            'fecha_evento': fecha_evento,
+            'municipio': self.municipio,
+            'lugar': 'Palacio de Gobierno',
+            'responsable': 'Secretaría General',
+            'creado_por': self.usuario,
+        }
+        datos.update(kwargs)
+        return Evento.objects.create(**datos)
+
+
+class SincronizarEstadosTests(EventoTestMixin, TestCase):
+    def setUp(self):
+        self.ahora = timezone.now()
+        self.futuro = self.crear_evento(self.ahora + timedelta(hours=2), estado='finalizado')
+        self.en_curso = self.crear_evento(self.ahora - timedelta(minutes=30))
+        self.pasado = self.crear_evento(self.ahora - timedelta(hours=3))
+        self.manual = self.crear_evento(
+            self.ahora - timedelta(minutes=10),
+            estado='finalizado',
+            fecha_finalizacion_manual=self.ahora,
+        )
+
+    def test_actualiza_estados_en_bloque(self):
+        # Un UPDATE por estado y las celdas afectadas; los resúmenes, un aggregate agrupado y un upsert
+        with self.assertNumQueries(6):
+            cambios = Evento.objects.sincronizar_estados(self.ahora)
+        self.assertEqual(diferencias_resumenes(), [])
+
+        self.assertEqual(cambios, {'programado': 1, 'en_curso': 1, 'finalizado': 1})
+        estados = dict(Evento.objects.values_list('pk', 'estado'))
+        self.assertEqual(estados[self.futuro.pk], 'programado')
+        self.assertEqual(estados[self.en_curso.pk], 'en_curso')
+        self.assertEqual(estados[self.pasado.pk], 'finalizado')
+        self.assertEqual(estados[self.manual.pk], 'finalizado')
+
+    def test_sin_cambios_no_invalida_ni_notifica(self):
+        Evento.objects.sincronizar_estados(self.ahora)
+        version = obtener_version_agenda()
+
+        # Solo los UPDATE (sin filas afectadas): ni lectura de celdas ni resúmenes
+        with mock.patch('eventos.models.publicar_cambio_agenda') as publicar, self.assertNumQueries(3):
+            cambios = Evento.objects.sincronizar_estados(self.ahora)
+        self.assertEqual(sum(cambios.values()), 0)
+        self.assertEqual(obtener_version_agenda(), version)
+        publicar.assert_not_called()
+
+    def test_respeta_queryset_filtrado(self):
+        cambios = Evento.objects.filter(pk=self.pasado.pk).sincronizar_estados(self.ahora)
+
+        self.assertEqual(cambios['finalizado'], 1)
+        self.futuro.refresh_from_db()
+        self.assertEqual(self.futuro.estado, 'finalizado')
+
+
+
+class IndicesEventoTests(TestCase):
+    def test_un_solo_indice_sobre_fecha_evento(self):
+        with connection.cursor() as cursor:
+            indices = connection.introspection.get_constraints(cursor, Evento._meta.db_table)
+        sobre_fecha = [
+            nombre for nombre, datos in indices.items()
+            if datos['index'] and datos['columns'] and datos['columns'][0] == 'fecha_evento'
+            and datos['columns'] != ['fecha_evento', 'estado']
+        ]
+        self.assertEqual(sobre_fecha, ['evento_fecha_evento_id_idx'])
+
+class EstadoEfectivoTests(EventoTestMixin, TestCase):
+    def setUp(self):
+        self.ahora = timezone.now()
+        self.evento = self.crear_evento(self.ahora - timedelta(minutes=30))
+        self.client.force_login(self.usuario)
+
+    def test_anotacion_calcula_estado_sin_escribir(self):
+        evento = Evento.objects.con_estado_efectivo(self.ahora).get(pk=self.evento.pk)
+
+        self.assertEqual(evento.estado_efectivo, 'en_curso')
+        self.assertEqual(evento.estado_calculado, 'en_curso')
+        self.assertEqual(evento.estado, 'programado')
+
+    def test_finalizado_manual_conserva_estado(self):
+        self.evento.finalizar_manualmente()
+        evento = Evento.objects.con_estado_efectivo(self.ahora).get(pk=self.evento.pk)
+
+        self.assertEqual(evento.estado_efectivo, 'finalizado')
+
+    def test_vistas_get_no_escriben_estado(self):
+        fecha_actualizacion = self.evento.fecha_actualizacion
+
+        for url in (
+            reverse('dashboard'),
+            reverse('detalle_evento', args=[self.evento.pk]),
+            reverse('eventos_calendario_api'),
+        ):
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+        self.evento.refresh_from_db()
+        self.assertEqual(self.evento.estado, 'programado')
+        self.assertEqual(self.evento.fecha_actualizacion, fecha_actualizacion)
+
+
+class ProgramadorEstadosTests(EventoTestMixin, TestCase):
+    def test_una_vez_sincroniza_pendientes(self):
+        evento = self.crear_evento(timezone.now() - timedelta(minutes=5))
+
+        call_command('programador_estados', '--una-vez', stdout=StringIO())
+
+        evento.refresh_from_db()
+        self.assertEqual(evento.estado, 'en_curso')
+
+    def test_aplica_solo_fronteras_vencidas(self):
+        from .management.commands.programador_estados import Command
+
+        ahora = timezone.now()
+        proximo = self.crear_evento(ahora + timedelta(minutes=10))
+        lejano = self.crear_evento(ahora + timedelta(hours=5))
+
+        comando = Command(stdout=StringIO())
+        comando.heap, comando.programados = [], set()
+        for evento in (proximo, lejano):
+            comando._programar(evento.pk, evento.fecha_evento, ahora)
+        self.assertEqual(len(comando.heap), 4)
+
+        comando._aplicar_vencidos(ahora + timedelta(minutes=15))
+
+        proximo.refresh_from_db()
+        lejano.refresh_from_db()
+        self.assertEqual(proximo.estado, 'en_curso')
+        self.assertEqual(lejano.estado, 'programado')
+        self.assertEqual(len(comando.heap), 3)
+
+
+    def test_refrescar_sincroniza_eventos_editados_en_el_pasado(self):
+        from .management.commands.programador_estados import Command
+
+        ahora = timezone.now()
+        comando = Command(stdout=StringIO())
+        comando.heap, comando.programados = [], set()
+        comando.horizonte = comando.intervalo_refresco = timedelta(hours=1)
+        comando.limite_cargado = ahora + comando.horizonte
+        comando.marca_agua = Evento.objects.aggregate(ultima=Max('fecha_actualizacion'))['ultima']
+
+        # Capturado después de que pasaron sus dos fronteras: nunca entra al heap
+        pasado = self.crear_evento(ahora - timedelta(days=2))
+        self.assertEqual(pasado.estado, 'programado')
+
+        comando._refrescar(timezone.now())
+
+        pasado.refresh_from_db()
+        self.assertEqual(pasado.estado, 'finalizado')
+        self.assertEqual(comando.heap, [])
+
+    def test_refrescar_relee_transacciones_confirmadas_tarde(self):
+        from .management.commands.programador_estados import Command
+
+        ahora = timezone.now()
+        comando = Command(stdout=StringIO())
+        comando.heap, comando.programados = [], set()
+        comando.horizonte = comando.intervalo_refresco = timedelta(hours=1)
+        comando.margen_marca = timedelta(minutes=2)
+        comando.limite_cargado = ahora + comando.horizonte
+        comando.marca_agua = ahora
+
+        # Confirmado después de la revisión anterior, con fecha_actualizacion previa a la marca
+        tardio = self.crear_evento(ahora + timedelta(minutes=10))
+        Evento.objects.filter(pk=tardio.pk).update(fecha_actualizacion=ahora - timedelta(seconds=30))
+
+        comando._refrescar(ahora)
+        comando._refrescar(ahora)
+
+        self.assertEqual(sorted(comando.heap), [
+            (tardio.fecha_evento, tardio.pk), (tardio.fecha_evento + DURACION_EVENTO, tardio.pk),
+        ])
+        self.assertEqual(comando.marca_agua, ahora)
+
+class DashboardTests(EventoTestMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        ahora = timezone.now()
+        self.crear_evento(ahora - timedelta(minutes=20), nombre='Evento en curso')
+        for dias in range(1, 12):
+            self.crear_evento(ahora + timedelta(days=dias), nombre=f'Evento próximo {dias}')
+
+    def test_presupuesto_de_consultas(self):
+        request = RequestFactory().get(reverse('dashboard'))
+        request.user = self.usuario
+
+        with CaptureQueriesContext(connection) as consultas:
+            response = dashboard(request)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertLessEqual(len(consultas), 3)
+
+    def test_contadores_y_particiones(self):
+        self.client.force_login(self.usuario)
+        response = self.client.get(reverse('dashboard'))
+
+        self.assertContains(response, 'id="dashboardAgenda"')
+        contadores = response.context['contadores']
+        self.assertEqual(contadores['proximos'], len([
+            evento for evento in Evento.objects.all()
+            if 0 < (evento.get_fecha_mexico().date() - response.context['fecha_actual']).days <= 7
+        ]))
+        self.assertLessEqual(len(response.context['eventos_proximos']), 10)
+        self.assertEqual(
+            contadores['en_curso'] + contadores['hoy_proximos'] + contadores['hoy_finalizados'],
+            len(response.context['eventos_hoy_todos']),
+        )
+
+    def test_agenda_cacheada_hasta_cambio_de_version(self):
+        request = RequestFactory().get(reverse('dashboard'))
+        request.user = self.usuario
+        dashboard(request)
+
+        with CaptureQueriesContext(connection) as consultas:
+            dashboard(request)
+        self.assertEqual(len(consultas), 0)
+
+        version = obtener_version_agenda()
+        self.crear_evento(timezone.now() + timedelta(hours=1), nombre='Evento nuevo de hoy')
+        self.assertNotEqual(obtener_version_agenda(), version)
+
+        with CaptureQueriesContext(connection) as consultas:
+            dashboard(request)
+        self.assertGreater(len(consultas), 0)
+
+
+class DashboardCambiosApiTests(EventoTestMixin, TestCase):
+    def setUp(self):
+        self.client.force_login(self.usuario)
+        self.evento = self.crear_evento(timezone.now() + timedelta(days=2))
+        self.url = reverse('dashboard_cambios_api')
+
+    def test_etag_responde_304_sin_cambios(self):
+        response = self.client.get(self.url, {'desde': ''})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['recargar'])
+
+        response = self.client.get(self.url, {'desde': ''}, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_devuelve_solo_eventos_cambiados(self):
+        cache.clear()
+        token = self.client.get(reverse('dashboard')).context['token']
+        nuevo = self.crear_evento(timezone.now() + timedelta(days=3), nombre='Evento agregado')
+
+        datos = self.client.get(self.url, {'desde': token}).json()
+
+        self.assertFalse(datos['recargar'])
+        self.assertEqual([evento['id'] for evento in datos['eventos']], [nuevo.pk])
+        self.assertEqual(datos['eventos'][0]['seccion'], 'proximos')
+        self.assertIn('Evento agregado', datos['eventos'][0]['html'])
+        self.assertEqual(sorted(datos['ids']), sorted([self.evento.pk, nuevo.pk]))
+        self.assertEqual(datos['contadores']['proximos'], 2)
+
+    def test_token_invalido_pide_recargar(self):
+        hoy = timezone.now().astimezone(MEXICO_TZ).date().isoformat()
+        for marca in ('2026-99-99T00:00', '2026-10-17T00:00', 'no-es-fecha'):
+            response = self.client.get(self.url, {'desde': f'{hoy}|{marca}'})
+            self.assertEqual(response.status_code, 200, marca)
+            self.assertTrue(response.json()['recargar'], marca)
+
+
+class BroadcasterLocalTests(SimpleTestCase):
+    def test_difunde_a_suscriptores_y_limpia_al_cerrar(self):
+        broadcaster = BroadcasterLocal()
+
+        async def escenario():
+            suscripcion = broadcaster.suscribir(latido=1)
+            siguiente = asyncio.ensure_future(suscripcion.__anext__())
+            await asyncio.sleep(0)
+            broadcaster.publicar({'tipo': 'evento', 'id': 1})
+            mensaje = await asyncio.wait_for(siguiente, 1)
+            await suscripcion.aclose()
+            return mensaje
+
+        self.assertEqual(asyncio.run(escenario()), {'tipo': 'evento', 'id': 1})
+        self.assertEqual(broadcaster._suscriptores, set())
+
+    def test_latido_sin_actividad(self):
+        broadcaster = BroadcasterLocal()
+
+        async def escenario():
+            suscripcion = broadcaster.suscribir(latido=0.01)
+            mensaje = await suscripcion.__anext__()
+            await suscripcion.aclose()
+            return mensaje
+
+        self.assertIsNone(asyncio.run(escenario()))
+
+
+
+class BroadcasterPostgresTests(SimpleTestCase):
+    def test_escucha_registra_cierra_y_espera_exponencial(self):
+        class Detener(Exception):
+            pass
+
+        conexiones = []
+
+        def conectar(**parametros):
+            conexion = mock.MagicMock()
+            conexion.cursor.return_value.__enter__.return_value.execute.side_effect = RuntimeError('sin conexión')
+            conexiones.append(conexion)
+            return conexion
+
+        psycopg2 = mock.MagicMock(connect=conectar)
+        esperas = []
+
+        def dormir(segundos):
+            esperas.append(segundos)
+            if len(esperas) == 4:
+                raise Detener
+
+        broadcaster = BroadcasterPostgres()
+        broadcaster.espera_maxima = 4
+        with mock.patch.dict('sys.modules', {'psycopg2': psycopg2, 'psycopg2.extensions': psycopg2.extensions}), \
+                mock.patch('eventos.broadcast.connections') as conexiones_django, \
+                mock.patch('eventos.broadcast.time.sleep', side_effect=dormir), \
+                self.assertLogs('eventos.broadcast', 'ERROR') as registros:
+            conexiones_django.__getitem__.return_value.get_connection_params.return_value = {}
+            with self.assertRaises(Detener):
+                broadcaster._escuchar()
+
+        self.assertEqual(esperas, [1, 2, 4, 4])
+        self.assertEqual(len(registros.records), 4)
+        self.assertTrue(all(conexion.close.called for conexion in conexiones))
+
+class StreamAgendaTests(EventoTestMixin, TestCase):
+    async def test_requiere_sesion(self):
+        response = await self.async_client.get(reverse('stream_agenda'))
+        self.assertEqual(response.status_code, 401)
+
+    @override_settings(AGENDA_SSE_HABILITADO=False)
+    async def test_sin_asgi_responde_204_y_no_abre_el_canal(self):
+        await self.async_client.aforce_login(self.usuario)
+        response = await self.async_client.get(reverse('stream_agenda'))
+        self.assertEqual(response.status_code, 204)
+
+        response = await self.async_client.get(reverse('dashboard'))
+        self.assertNotContains(response, 'new EventSource')
+
+    @override_settings(AGENDA_SSE_HABILITADO=True)
+    def test_con_asgi_las_paginas_se_suscriben(self):
+        self.client.force_login(self.usuario)
+        self.assertContains(self.client.get(reverse('dashboard')), 'new EventSource')
+
+    def test_sincronizar_publica_transiciones(self):
+        self.crear_evento(timezone.now() - timedelta(hours=3))
+        publicados = []
+        broadcaster = BroadcasterLocal()
+        broadcaster.publicar = publicados.append
+
+        with mock.patch('eventos.broadcast.get_broadcaster', return_value=broadcaster):
+            with self.captureOnCommitCallbacks(execute=True):
+                Evento.objects.sincronizar_estados()
+
+        self.assertIn({'tipo': 'estados', 'cambios': {'programado': 0, 'en_curso': 0, 'finalizado': 1}}, publicados)
+
+
+class DiaMexicoTests(EventoTestMixin, TestCase):
+    def test_rango_semiabierto_en_utc(self):
+        inicio, fin = rango_dia_mexico(date(2025, 3, 10))
+
+        self.assertEqual(inicio, datetime(2025, 3, 10, 6, tzinfo=dt_timezone.utc))
+        self.assertEqual(fin - inicio, timedelta(days=1))
+
+    def test_lookup_agrupa_por_dia_local(self):
+        noche = self.crear_evento(localizar_mexico(datetime(2025, 3, 10, 23, 30)))
+        self.crear_evento(localizar_mexico(datetime(2025, 3, 11, 0, 0)))
+
+        eventos = Evento.objects.filter(fecha_evento__dia_mx=date(2025, 3, 10))
+        self.assertEqual(list(eventos), [noche])
+        self.assertEqual(Evento.objects.filter(fecha_evento__dia_mx='2025-03-11').count(), 1)
+
+    @skipUnless(connection.vendor == 'sqlite', 'Plan específico de SQLite')
+    def test_plan_usa_indice_de_fecha(self):
+        plan = Evento.objects.filter(fecha_evento__dia_mx=date(2025, 3, 10)).explain()
+
+        self.assertRegex(plan, r'SEARCH .*INDEX evento_fecha_evento')
+
+    def test_ultimo_dia_representable_deja_el_rango_abierto(self):
+        evento = self.crear_evento(timezone.now())
+        self.assertEqual(rango_dia_mexico(date.max)[1], None)
+        self.assertEqual(list(Evento.objects.filter(fecha_evento__dia_mx=date.max)), [])
+
+        self.client.force_login(self.usuario)
+        parametros = {'fecha_desde': '2000-01-01', 'fecha_hasta': '9999-12-31'}
+        self.assertEqual(self.client.get(reverse('lista_eventos'), parametros).context['total_eventos'], 1)
+        self.assertEqual(self.client.get(reverse('reportes'), parametros).context['total_eventos'], 1)
+        for nombre in ('exportar_csv', 'generar_excel'):
+            response = self.client.get(reverse(nombre), parametros)
+            self.assertEqual(response.status_code, 200, nombre)
+        filas = b''.join(self.client.get(reverse('exportar_csv'), parametros).streaming_content).splitlines()
+        self.assertEqual(filas[1].split(b',')[0], str(evento.pk).encode())
+
+
+@requiere_benchmark
+class DiaMexicoBenchmark(EventoTestMixin, TestCase):
+    """Compara ``__dia_mx`` contra ``__date`` sobre una tabla sintética de 1M de eventos"""
+
+    total = 1_000_000
+
+    def setUp(self):
+        columnas = (
+            'nombre, fecha_evento, municipio_id, lugar, es_festivo, responsable, '
+            'asistio_gobernador, estado, creado_por_id, fecha_creacion, fecha_actualizacion'
+        )
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute(
+                    f"INSERT INTO eventos_evento ({columnas}) "
+                    f"SELECT 'Evento ' || n, TIMESTAMPTZ '2015-01-01 00:00+00' + n * INTERVAL '7 minutes', "
+                    f"%s, 'Lugar', false, 'Responsable', true, 'finalizado', %s, now(), now() "
+                    f"FROM generate_series(1, %s) AS n",
+                    [self.municipio.pk, self.usuario.pk, self.total],
+                )
+                cursor.execute('ANALYZE eventos_evento')
+            else:
+                cursor.execute(
+                    f"WITH RECURSIVE serie(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM serie WHERE n < %s) "
+                    f"INSERT INTO eventos_evento ({columnas}) "
+                    f"SELECT 'Evento ' || n, datetime('2015-01-01', '+' || (n * 7) || ' minutes'), "
+                    f"%s, 'Lugar', 0, 'Responsable', 1, 'finalizado', %s, datetime('now'), datetime('now') "
+                    f"FROM serie",
+                    [self.total, self.municipio.pk, self.usuario.pk],
+                )
+                cursor.execute('ANALYZE')
+
+    def _medir(self, eventos, repeticiones=20):
+        inicio = time.perf_counter()
+        for _ in range(repeticiones):
+            total = eventos.count()
+        return total, (time.perf_counter() - inicio) / repeticiones
+
+    def test_rango_usa_indice_y_supera_a_date(self):
+        dia = date(2020, 6, 15)
+        por_rango = Evento.objects.filter(fecha_evento__dia_mx=dia)
+        por_date = Evento.objects.filter(fecha_evento__date=dia)
+
+        # Búsqueda acotada en el índice contra recorrido completo (tabla o índice)
+        if connection.vendor == 'postgresql':
+            self.assertIn('Index Cond', por_rango.explain())
+            self.assertNotIn('Index Cond', por_date.explain())
+        else:
+            self.assertIn('SEARCH', por_rango.explain())
+            self.assertIn('SCAN', por_date.explain())
+
+        total_rango, tiempo_rango = self._medir(por_rango)
+        total_date, tiempo_date = self._medir(por_date, repeticiones=3)
+        print(
+            f'\n{self.total:,} eventos | dia_mx: {tiempo_rango * 1000:.2f} ms '
+            f'({total_rango}) | __date: {tiempo_date * 1000:.2f} ms ({total_date})'
+        )
+        self.assertLess(tiempo_rango, tiempo_date)
+
+
+class RelojSolicitudTests(EventoTestMixin, TestCase):
+    def test_instantanea_fija_el_ahora(self):
+        instante = timezone.now() - timedelta(days=3)
+        evento = Evento(fecha_evento=instante - timedelta(minutes=45))
+
+        with instantanea_reloj(instante):
+            self.assertEqual(obtener_ahora(), instante)
+            self.assertEqual(evento.tiempo_transcurrido, timedelta(minutes=45))
+            self.assertEqual(evento.estado_calculado, 'en_curso')
+        self.assertNotEqual(obtener_ahora(), instante)
+
+    def test_middleware_fija_un_instante_por_solicitud(self):
+        instantes = []
+
+        def vista(request):
+            instantes.append(obtener_ahora())
+            time.sleep(0.01)
+            instantes.append(obtener_ahora())
+            return HttpResponse()
+
+        reloj_solicitud_middleware(vista)(RequestFactory().get('/'))
+
+        self.assertEqual(instantes[0], instantes[1])
+        self.assertGreater(obtener_ahora(), instantes[0])
+
+    def test_costo_del_dashboard_no_crece_con_los_eventos(self):
+        # Todas las filas usan el instante de la solicitud: ni consultas ni lecturas del
+        # reloj por evento al renderizar
+        self.client.force_login(self.usuario)
+        ahora = timezone.now()
+
+        def medir():
+            cache.clear()
+            with mock.patch('django.utils.timezone.now', wraps=timezone.now) as reloj:
+                with CaptureQueriesContext(connection) as consultas:
+                    self.assertEqual(self.client.get(reverse('dashboard')).status_code, 200)
+            return len(consultas), reloj.call_count
+
+        self.crear_evento(ahora + timedelta(hours=1))
+        consultas, lecturas = medir()
+        for n in range(30):
+            self.crear_evento(ahora + timedelta(hours=2, minutes=n) if n % 2 else ahora + timedelta(days=n % 7 + 1))
+        self.assertEqual(medir(), (consultas, lecturas))
+
+
+class RendimientoMiddlewareTests(EventoTestMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        get_registro().limpiar()
+        self.crear_evento(timezone.now() + timedelta(hours=2))
+        self.client.force_login(self.usuario)
+
+    def test_registra_muestra_por_vista(self):
+        response = self.client.get(reverse('dashboard'))
+
+        fila = next(fila for fila in get_registro().resumen() if fila['vista'] == 'dashboard')
+        self.assertEqual(fila['solicitudes'], 1)
+        self.assertGreater(fila['consultas_promedio'], 0)
+        self.assertGreater(fila['plantillas_promedio_ms'], 0)
+        self.assertEqual(fila['bytes_promedio'], len(response.content))
+
+    async def test_mide_consultas_y_plantillas_bajo_asgi(self):
+        await self.async_client.aforce_login(self.usuario)
+        await self.async_client.get(reverse('dashboard'))
+
+        fila = next(fila for fila in get_registro().resumen() if fila['vista'] == 'dashboard')
+        self.assertGreater(fila['consultas_promedio'], 0)
+        self.assertGreater(fila['sql_p50_ms'], 0)
+        self.assertGreater(fila['plantillas_promedio_ms'], 0)
+
+    @override_settings(PERF_UMBRAL_LENTO_MS=0)
+    def test_solicitudes_lentas_van_al_log(self):
+        with self.assertLogs('eventos.perf', 'WARNING') as logs:
+            self.client.get(reverse('lista_eventos'))
+
+        self.assertIn('"vista": "lista_eventos"', logs.output[0])
+
+    def test_pagina_solo_para_staff(self):
+        response = self.client.get(reverse('rendimiento_debug'))
+        self.assertEqual(response.status_code, 302)
+
+        self.usuario.is_staff = True
+        self.usuario.save()
+        self.client.get(reverse('dashboard'))
+        response = self.client.get(reverse('rendimiento_debug'))
+        self.assertContains(response, '<code>dashboard</code>', html=False)
+
+
+class PaginacionCursorTests(EventoTestMixin, TestCase):
+    def setUp(self):
+        base = timezone.now()
+        # Pares con la misma fecha para verificar el desempate por id
+        for n in range(10):
+            self.crear_evento(base - timedelta(hours=n // 2), nombre=f'Evento {n}')
+        self.orden = list(Evento.objects.order_by('-fecha_evento', '-id').values_list('pk', flat=True))
+
+    def test_recorre_todas_las_paginas_sin_repetir(self):
+        vistos, cursor = [], None
+        while True:
+            with self.assertNumQueries(1):
+                pagina = paginar_por_cursor(Evento.objects.all(), cursor, por_pagina=4)
+            vistos.extend(evento.pk for evento in pagina.eventos)
+            if not pagina.tiene_siguiente:
+                break
+            cursor = pagina.cursor_siguiente
+
+        self.assertEqual(vistos, self.orden)
+        self.assertEqual(pagina.info()['showing_start'], 9)
+
+        anterior = paginar_por_cursor(Evento.objects.all(), pagina.cursor_anterior, por_pagina=4)
+        self.assertEqual([evento.pk for evento in anterior.eventos], self.orden[4:8])
+        self.assertTrue(anterior.tiene_anterior)
+
+    def test_cursor_invalido_muestra_primera_pagina(self):
+        pagina = paginar_por_cursor(Evento.objects.all(), 'no-es-un-cursor', por_pagina=4)
+
+        self.assertEqual([evento.pk for evento in pagina.eventos], self.orden[:4])
+        self.assertFalse(pagina.tiene_anterior)
+
+    def test_lista_ajax_devuelve_cursores(self):
+        self.client.force_login(self.usuario)
+        response = self.client.get(
+            reverse('lista_eventos'), {'estado': 'programado'}, HTTP_X_REQUESTED_WITH='XMLHttpRequest'
+        )
+        info = response.json()['pagination_info']
+        self.assertEqual(info['total_count'], 10)
+
+        response = self.client.get(
+            reverse('lista_eventos'),
+            {'estado': 'programado', 'cursor': info['cursor_siguiente']},
+            HTTP_X_REQUESTED_WITH='XMLHttpRequest',
+        )
+        datos = response.json()
+        self.assertEqual(datos['pagination_info']['showing_start'], 5)
+        self.assertIn('?estado=programado&cursor=', datos['table_html'])
+
+
+class ResumenListaTests(EventoTestMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        ahora = timezone.now()
+        self.crear_evento(ahora + timedelta(days=2), nombre='Gira', estado='programado')
+        self.crear_evento(ahora + timedelta(days=3), nombre='Gira regional', estado='cancelado')
+        self.crear_evento(ahora - timedelta(days=3), nombre='Informe', estado='finalizado')
+        self.client.force_login(self.usuario)
+
+    def test_contadores_en_un_solo_aggregate(self):
+        response = self.client.get(reverse('lista_eventos'))
+        resumen = response.context['resumen']
+
+        self.assertEqual(resumen['total'], 3)
+        self.assertEqual(resumen['proximos'], 2)
+        self.assertEqual(resumen['finalizados'], 1)
+        self.assertEqual(resumen['estado_cancelado'], 1)
+        self.assertEqual(response.context['pagination_info']['total_count'], 3)
+
+    def test_cambiar_de_pagina_reutiliza_el_resumen(self):
+        for n in range(5):
+            self.crear_evento(timezone.now() + timedelta(hours=n + 1), nombre=f'Gira {n}')
+        parametros = {'buscar': 'gira', 'estado': ''}
+        info = self.client.get(
+            reverse('lista_eventos'), parametros, HTTP_X_REQUESTED_WITH='XMLHttpRequest'
+        ).json()['pagination_info']
+        self.assertEqual(info['total_count'], 7)
+
+        # Mismos filtros en otro orden: solo la consulta de la página (más la sesión y el usuario)
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get(
+                reverse('lista_eventos'),
+                {'cursor': info['cursor_siguiente'], 'buscar': 'gira'},
+                HTTP_X_REQUESTED_WITH='XMLHttpRequest',
+            )
+        self.assertEqual(response.json()['pagination_info']['total_count'], 7)
+        self.assertFalse(any('COUNT(' in consulta['sql'] for consulta in consultas.captured_queries))
+
+    def test_sin_filtros_usa_la_estimacion_salvo_contar(self):
+        with mock.patch('eventos.views.estimar_total', return_value=120) as estimar:
+            with CaptureQueriesContext(connection) as consultas:
+                response = self.client.get(reverse('lista_eventos'), HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+            info = response.json()['pagination_info']
+            self.assertEqual(info['total_count'], 120)
+            self.assertTrue(info['total_estimado'])
+            self.assertFalse(any('COUNT(' in consulta['sql'] for consulta in consultas.captured_queries))
+
+            # Con ?contar=1 o con filtros el total es exacto
+            for parametros in ({'contar': '1'}, {'estado': 'programado'}):
+                info = self.client.get(
+                    reverse('lista_eventos'), parametros, HTTP_X_REQUESTED_WITH='XMLHttpRequest'
+                ).json()['pagination_info']
+                self.assertFalse(info['total_estimado'])
+            self.assertEqual(estimar.call_count, 1)
+        self.assertEqual(info['total_count'], 1)
+
+
+class FiltrosCompartidosTests(EventoTestMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        ahora = timezone.now()
+        self.gira = self.crear_evento(ahora, nombre='Gira de trabajo', asistio_gobernador=True)
+        self.foro = self.crear_evento(
+            ahora - timedelta(days=1), nombre='Foro estatal', asistio_gobernador=False,
+            representante='Secretario de Gobierno', es_festivo=True,
+        )
+        self.client.force_login(self.usuario)
+
+    def test_firma_canonica_y_filtrado(self):
+        datos = {'asistencia': 'False', 'buscar': '  Foro   ', 'estado': '', 'tipo_evento': 'festivo'}
+        firma = Evento.objects.firma_filtros(datos)
+
+        self.assertEqual(firma, Evento.objects.firma_filtros({'tipo_evento': 'festivo', 'asistencia': 'False', 'buscar': 'foro'}))
+        self.assertEqual(hash(firma), hash(Evento.objects.firma_filtros(dict(reversed(list(datos.items()))))))
+        self.assertEqual(list(Evento.objects.filtrar(datos)), [self.foro])
+        self.assertEqual(list(Evento.objects.filtrar({'asistencia': 'True'})), [self.gira])
+        self.assertEqual(Evento.objects.filtrar(None).count(), 2)
+
+    def test_reportes_y_excel_filtran_por_asistencia(self):
+        response = self.client.get(reverse('reportes'), {'asistencia': 'False'})
+        self.assertEqual(response.context['total_eventos'], 1)
+        self.assertEqual(response.context['eventos_representante'], 1)
+
+        response = self.client.get(reverse('generar_excel'), {'asistencia': 'False'})
+        self.assertEqual(response.status_code, 200)
+        libro = load_workbook(BytesIO(b''.join(response.streaming_content)), read_only=True)
+        self.assertEqual(libro.sheetnames, ['Reporte de Eventos', 'Resumen'])
+        filas = list(libro['Reporte de Eventos'].values)
+        self.assertEqual(filas[0][0], 'Evento')
+        self.assertEqual([fila[0] for fila in filas[1:]], [self.foro.nombre])
+        self.assertEqual(filas[1][7], 'No')
+        self.assertEqual(list(libro['Resumen'].values)[0], ('Total de eventos', 1))
+
+    async def test_excel_asincrono_bajo_asgi(self):
+        await self.async_client.aforce_login(self.usuario)
+        response = await self.async_client.get(reverse('generar_excel'))
+        self.assertTrue(response.is_async)
+        contenido = b''.join([parte async for parte in response.streaming_content])
+        self.assertEqual(int(response['Content-Length']), len(contenido))
+        libro = load_workbook(BytesIO(contenido), read_only=True)
+        self.assertEqual(len(list(libro['Reporte de Eventos'].values)), 3)
+
+    def test_vistas_comparten_el_resumen_cacheado(self):
+        parametros = {'asistencia': 'False', 'buscar': 'foro'}
+        self.client.get(reverse('lista_eventos'), parametros)
+
+        for nombre in ('reportes', 'generar_excel'):
+            with CaptureQueriesContext(connection) as consultas:
+                self.client.get(reverse(nombre), {'buscar': 'Foro', 'asistencia': 'False'})
+            self.assertFalse(any('COUNT(' in consulta['sql'] for consulta in consultas.captured_queries), nombre)
+
+        self.crear_evento(timezone.now(), nombre='Foro regional', asistio_gobernador=False)
+        response = self.client.get(reverse('reportes'), parametros)
+        self.assertEqual(response.context['total_eventos'], 2)
+
+
+
+    def test_exportacion_csv_y_jsonl_en_streaming(self):
+        parametros = {'asistencia': 'False', 'buscar': 'foro'}
+        response = self.client.get(reverse('exportar_csv'), parametros)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        filas = list(csv.reader(b''.join(response.streaming_content).decode().splitlines()))
+        self.assertEqual(filas[0][:3], ['id', 'nombre', 'fecha_evento'])
+        self.assertEqual(len(filas), 2)
+        registro = dict(zip(filas[0], filas[1]))
+        self.assertEqual(registro['nombre'], self.foro.nombre)
+        self.assertEqual(registro['asistio_gobernador'], 'false')
+        self.assertEqual(datetime.fromisoformat(registro['fecha_evento']), self.foro.fecha_evento)
+        self.assertTrue(registro['fecha_evento'].endswith('-06:00'))
+
+        response = self.client.get(reverse('exportar_jsonl'), {'gzip': '1'})
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        self.assertIn('.jsonl.gz', response['Content-Disposition'])
+        registros = [json.loads(linea) for linea in gzip.decompress(b''.join(response.streaming_content)).splitlines()]
+        self.assertEqual({registro['id'] for registro in registros}, {self.foro.pk, self.gira.pk})
+        self.assertEqual(registros[0]['municipio__nombre'], 'Tuxtla Gutiérrez')
+
+    def test_csv_neutraliza_formulas(self):
+        self.foro.responsable = '=HYPERLINK("http://x","y")'
+        self.foro.lugar = '-2+3'
+        self.foro.save()
+        response = self.client.get(reverse('exportar_csv'), {'asistencia': 'False'})
+        filas = list(csv.reader(b''.join(response.streaming_content).decode().splitlines()))
+        registro = dict(zip(filas[0], filas[1]))
+        self.assertEqual(registro['responsable'], '\'=HYPERLINK("http://x","y")')
+        self.assertEqual(registro['lugar'], "'-2+3")
+        self.assertEqual(registro['fecha_evento'][0], '2')
+
+    async def test_exportacion_asincrona_bajo_asgi(self):
+        await self.async_client.aforce_login(self.usuario)
+        with mock.patch('eventos.exportacion.TAMANO_BLOQUE_EXPORTACION', 1):
+            response = await self.async_client.get(reverse('exportar_csv'))
+            # Un iterador asíncrono: Django no lo junta con sync_to_async(list)
+            self.assertTrue(response.is_async)
+            partes = [parte async for parte in response.streaming_content]
+        self.assertEqual(len(partes), 3)
+        self.assertEqual(len(list(csv.reader(b''.join(partes).decode().splitlines()))), 3)
+
+@requiere_benchmark
+@skipUnless(os.path.exists('/proc/self/statm'), 'La medición de RSS usa /proc')
+class ExportacionExcelBenchmark(EventoTestMixin, TestCase):
+    """Exportar 200k eventos a Excel con memoria residente acotada"""
+
+    total = 200_000
+    limite_mb = 64
+
+    @staticmethod
+    def rss_mb():
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1024 / 1024
+
+    def test_exportar_200k_filas(self):
+        base = timezone.now() - timedelta(days=3 * 365)
+        for inicio in range(0, self.total, 5000):
+            Evento.objects.bulk_create(
+                Evento(
+                    nombre=f'Evento {n}', fecha_evento=base + timedelta(minutes=8 * n), municipio=self.municipio,
+                    lugar='Palacio de Gobierno', responsable='Secretaría General', creado_por=self.usuario,
+                    asistio_gobernador=n % 3 != 0, representante='' if n % 3 else 'Secretario de Gobierno',
+                )
+                for n in range(inicio, min(inicio + 5000, self.total))
+            )
+        self.client.force_login(self.usuario)
+        gc.collect()
+
+        base_mb = self.rss_mb()
+        pico = {'mb': base_mb}
+        terminado = threading.Event()
+
+        def muestrear():
+            while not terminado.wait(0.02):
+                pico['mb'] = max(pico['mb'], self.rss_mb())
+
+        hilo = threading.Thread(target=muestrear)
+        hilo.start()
+        inicio = time.perf_counter()
+        try:
+            response = self.client.get(reverse('generar_excel'))
+            tamano = sum(len(parte) for parte in response.streaming_content)
+        finally:
+            terminado.set()
+            hilo.join()
+        segundos = time.perf_counter() - inicio
+
+        print(
+            f'\n{self.total:,} filas | {segundos:.1f} s | {tamano / 1024 / 1024:.1f} MB xlsx | '
+            f'RSS pico +{pico["mb"] - base_mb:.0f} MB'
+        )
+        self.assertLess(pico['mb'] - base_mb, self.limite_mb)
+
+class DetalleEventoTests(EventoTestMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.evento = self.crear_evento(timezone.now(), nombre='Informe de gobierno')
+        self.otro = self.crear_evento(timezone.now() - timedelta(days=1), nombre='Foro estatal')
+        self.client.force_login(self.usuario)
+
+    def test_responde_304_hasta_que_se_edita(self):
+        url = reverse('detalle_evento', args=[self.evento.pk])
+        response = self.client.get(url)
+        self.assertContains(response, 'Informe de gobierno')
+        self.assertIn('Last-Modified', response)
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+        etag = response['ETag']
+        self.evento.nombre = 'Informe anual'
+        self.evento.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, 'Informe anual')
+
+    def test_lote_devuelve_detalles_en_una_consulta(self):
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get(
+                reverse('detalles_eventos_api'), {'ids': f'{self.evento.pk},{self.otro.pk},x,999999'}
+            )
+        detalles = response.json()['detalles']
+
+        self.assertEqual(list(detalles), [str(self.evento.pk), str(self.otro.pk)])
+        self.assertIn('Foro estatal', detalles[str(self.otro.pk)]['html'])
+        self.assertEqual(sum('eventos_evento' in consulta['sql'] for consulta in consultas.captured_queries), 1)
+
+        response = self.client.get(
+            reverse('detalles_eventos_api'),
+            {'ids': f'{self.evento.pk},{self.otro.pk}'},
+            HTTP_IF_NONE_MATCH=response['ETag'],
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_lote_omite_ids_fuera_de_rango(self):
+        ids = f"{'9' * 40},{self.evento.pk},²,٣,{'1' * 19}"
+        for nombre in ('detalles_eventos_api', 'descripciones_calendario_api'):
+            response = self.client.get(reverse(nombre), {'ids': ids})
+            self.assertEqual(response.status_code, 200, nombre)
+            self.assertEqual(list(response.json()[nombre.split('_')[0]]), [str(self.evento.pk)], nombre)
+
+
+class ProyeccionesListadoTests(EventoTestMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        ahora = timezone.now()
+        for n in range(3):
+            self.crear_evento(
+                ahora + timedelta(hours=n + 1), nombre=f'Gira {n}',
+                descripcion='x' * 1000, observaciones='Notas internas',
+            )
+        self.client.force_login(self.usuario)
+
+    def _consultas(self, url, datos=None):
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get(url, datos or {})
+        self.assertEqual(response.status_code, 200)
+        return response, [consulta['sql'] for consulta in consultas.captured_queries]
+
+    def test_listas_no_leen_textos_largos(self):
+        for url in (reverse('lista_eventos'), reverse('dashboard')):
+            _, consultas = self._consultas(url)
+            eventos = [sql for sql in consultas if 'FROM "eventos_evento"' in sql]
+            self.assertTrue(eventos, url)
+            self.assertFalse(any('"observaciones"' in sql for sql in eventos), url)
+
+    def test_chatbot_y_excel_usan_proyecciones(self):
+        with CaptureQueriesContext(connection) as consultas:
+            respuesta = ChatbotAgenda()._busqueda_general('buscar gira')
+        self.assertIn('Gira 0', respuesta)
+        self.assertFalse(any('"descripcion"' in consulta['sql'] for consulta in consultas.captured_queries))
+
+        _, consultas = self._consultas(reverse('generar_excel'))
+        self.assertFalse(any('"observaciones"' in sql for sql in consultas))
+
+    def test_calendario_recorta_la_descripcion(self):
+        fecha = Evento.objects.get(nombre='Gira 0').get_fecha_mexico()
+        response, consultas = self._consultas(reverse('eventos_calendario_api'), {'year': fecha.year, 'month': fecha.month})
+        descripciones = [evento['description'] for evento in response.json()['eventos']]
+
+        self.assertTrue(descripciones)
+        self.assertTrue(all(len(descripcion) == 281 and descripcion.endswith('…') for descripcion in descripciones))
+        self.assertFalse(any('"observaciones"' in sql for sql in consultas))
+
+
+class ResumenDiaTests(EventoTestMixin, TestCase):
+    def setUp(self):
+        self.dia = localizar_mexico(datetime(2030, 5, 10, 12, 0))
+        self.evento = self.crear_evento(self.dia)
+        self.crear_evento(self.dia + timedelta(hours=2), asistio_gobernador=False, representante='Secretario', es_festivo=True)
+
+    def _resumen(self, fecha, municipio=None):
+        return EventoResumenDia.objects.filter(fecha=fecha, municipio=municipio or self.municipio).first()
+
+    def test_se_mantiene_al_guardar_mover_y_eliminar(self):
+        resumen = self._resumen(date(2030, 5, 10))
+        self.assertEqual(
+            (resumen.total, resumen.programados, resumen.con_gobernador, resumen.con_representante, resumen.festivos),
+            (2, 2, 1, 1, 1),
+        )
+
+        # 23:30 hora de México sigue siendo el mismo día local aunque en UTC ya es el siguiente
+        self.evento.fecha_evento = localizar_mexico(datetime(2030, 5, 11, 23, 30))
+        self.evento.save()
+        self.assertEqual(self._resumen(date(2030, 5, 10)).total, 1)
+        self.assertEqual(self._resumen(date(2030, 5, 11)).total, 1)
+
+        self.evento.delete()
+        self.assertIsNone(self._resumen(date(2030, 5, 11)))
+        self.assertFalse(call_command('reconstruir_resumenes', '--verificar', stdout=StringIO()))
+
+    def test_sincronizar_estados_actualiza_conteos(self):
+        Evento.objects.sincronizar_estados(self.dia + timedelta(hours=5))
+
+        resumen = self._resumen(date(2030, 5, 10))
+        self.assertEqual((resumen.programados, resumen.finalizados), (0, 2))
+
+    def test_reconstruir_y_verificar(self):
+        EventoResumenDia.objects.update(total=99)
+        with self.assertRaises(CommandError):
+            call_command('reconstruir_resumenes', '--verificar', stdout=StringIO())
+
+        salida = StringIO()
+        call_command('reconstruir_resumenes', stdout=salida)
+        self.assertIn('1 días/municipio', salida.getvalue())
+        self.assertEqual(self._resumen(date(2030, 5, 10)).total, 2)
+
+    def test_estadisticas_leen_resumenes(self):
+        self.client.force_login(self.usuario)
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get(reverse('estadisticas'))
+
+        self.assertEqual(response.context['total_eventos'], 2)
+        self.assertEqual(response.context['eventos_representante'], 1)
+        self.assertFalse(any('FROM "eventos_evento"' in consulta['sql'] for consulta in consultas.captured_queries))
+
+
+class CalendarioApiTests(EventoTestMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.mayo = self.crear_evento(localizar_mexico(datetime(2030, 5, 31, 23, 0)), nombre='Cierre de mayo')
+        self.junio = self.crear_evento(localizar_mexico(datetime(2030, 6, 1, 9, 0)), nombre='Inicio de junio')
+        self.julio = self.crear_evento(localizar_mexico(datetime(2030, 7, 15, 9, 0)), nombre='Julio')
+        self.client.force_login(self.usuario)
+
+    def _titulos(self, response):
+        return [evento['title'] for evento in response.json()['eventos']]
+
+    def test_rango_de_varios_meses(self):
+        response = self.client.get(reverse('eventos_calendario_api'), {'start': '2030-05-01', 'end': '2030-06-30'})
+        self.assertEqual(self._titulos(response), ['Cierre de mayo', 'Inicio de junio'])
+
+        response = self.client.get(reverse('eventos_calendario_api'), {'year': 2030, 'month': 6})
+        self.assertEqual(self._titulos(response), ['Inicio de junio'])
+
+        for parametros in ({'start': '2030-06-01', 'end': '2030-05-01'}, {'start': '2030-01-01', 'end': '2031-06-01'}, {'year': 'x', 'month': 1}):
+            self.assertEqual(self.client.get(reverse('eventos_calendario_api'), parametros).status_code, 400)
+
+    def test_years_fuera_de_rango_responden_400(self):
+        for parametros in (
+            {'year': 9999, 'month': 1}, {'year': 9999, 'month': 12}, {'year': 0, 'month': 1},
+            {'start': '9999-12-01', 'end': '9999-12-31'},
+        ):
+            self.assertEqual(self.client.get(reverse('eventos_calendario_api'), parametros).status_code, 400, parametros)
+        self.assertEqual(self.client.get(reverse('eventos_calendario_api'), {'year': 9998, 'month': 12}).status_code, 200)
+
+    def test_meses_cacheados_y_304(self):
+        parametros = {'start': '2030-05-01', 'end': '2030-07-31'}
+        response = self.client.get(reverse('eventos_calendario_api'), parametros)
+
+        with CaptureQueriesContext(connection) as consultas:
+            repetida = self.client.get(reverse('eventos_calendario_api'), parametros, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(repetida.status_code, 304)
+        self.assertFalse(any('FROM "eventos_evento"' in consulta['sql'] for consulta in consultas.captured_queries))
+
+        # Editar un evento de julio solo cambia el ETag del rango que lo incluye
+        self.julio.nombre = 'Julio editado'
+        self.julio.save()
+        response_junio = self.client.get(reverse('eventos_calendario_api'), {'year': 2030, 'month': 6})
+        self.assertNotEqual(
+            self.client.get(reverse('eventos_calendario_api'), parametros, HTTP_IF_NONE_MATCH=response['ETag']).status_code,
+            304,
+        )
+        self.assertEqual(
+            self.client.get(
+                reverse('eventos_calendario_api'), {'year': 2030, 'month': 6}, HTTP_IF_NONE_MATCH=response_junio['ETag']
+            ).status_code,
+            304,
+        )
+
+    def test_mes_cacheado_se_recalcula_al_cambiar_estado(self):
+        inicio = self.junio.fecha_evento
+        antes = _meses_calendario([(2030, 6)], inicio - timedelta(minutes=5))[(2030, 6)]
+        with CaptureQueriesContext(connection) as consultas:
+            cacheado = _meses_calendario([(2030, 6)], inicio - timedelta(minutes=1))[(2030, 6)]
+        despues = _meses_calendario([(2030, 6)], inicio + timedelta(minutes=5))[(2030, 6)]
+
+        self.assertEqual(antes['eventos'][0]['estado'], 'programado')
+        self.assertEqual(len(consultas.captured_queries), 0)
+        self.assertEqual(cacheado['huella'], antes['huella'])
+        self.assertEqual(despues['eventos'][0]['estado'], 'en_curso')
+
+
+    def test_fechas_locales_con_cambio_de_horario(self):
+        # Horario de verano 2022 en la Ciudad de México: 3 de abril a 30 de octubre
+        base = datetime(2022, 4, 2, 12, 0, tzinfo=dt_timezone.utc)
+        instantes = [base + timedelta(minutes=37 * n) for n in range(200)]
+        locales = [instante.astimezone(MEXICO_TZ) for instante in instantes]
+        self.assertEqual(
+            fechas_locales(instantes),
+            ([local.strftime('%Y-%m-%d') for local in locales], [local.strftime('%H:%M') for local in locales]),
+        )
+
+
+    def test_formato_compacto_equivale_al_completo(self):
+        parametros = {'start': '2030-05-01', 'end': '2030-07-31'}
+        completo = self.client.get(reverse('eventos_calendario_api'), parametros).json()
+        compacto = self.client.get(reverse('eventos_calendario_api'), {**parametros, 'formato': 'compacto'}).json()
+
+        columnas = compacto['columnas']
+        expandidos = []
+        for i, pk in enumerate(columnas['id']):
+            local = datetime(1970, 1, 1) + timedelta(minutes=columnas['minuto'][i])
+            expandidos.append({
+                'id': pk,
+                'date': local.date().isoformat(),
+                'time': local.strftime('%H:%M'),
+                'municipio': compacto['municipios'][columnas['municipio'][i]],
+                'full_location': compacto['lugares'][columnas['lugar'][i]],
+                'estado': compacto['estados'][columnas['estado'][i]],
+                'es_festivo': bool(columnas['es_festivo'][i]),
+            })
+        self.assertEqual(
+            expandidos,
+            [{clave: evento[clave] for clave in expandidos[0]} for evento in completo['eventos']],
+        )
+        self.assertEqual(compacto['municipios'], ['Tuxtla Gutiérrez'])
+        self.assertEqual(self.client.get(reverse('eventos_calendario_api'), {'formato': 'xml'}).status_code, 400)
+
+        descripciones = self.client.get(
+            reverse('descripciones_calendario_api'), {'ids': f'{self.mayo.pk},{self.julio.pk}'}
+        ).json()['descripciones']
+        self.assertEqual(descripciones, {str(self.mayo.pk): 'Sin descripción', str(self.julio.pk): 'Sin descripción'})
+
+    def test_compresion_negociada(self):
+        for n in range(20):
+            self.crear_evento(localizar_mexico(datetime(2030, 6, 2, 8, n)), descripcion='Recorrido ' * 20)
+        parametros = {'year': 2030, 'month': 6}
+
+        sin_comprimir = self.client.get(reverse('eventos_calendario_api'), parametros)
+        comprimida = self.client.get(reverse('eventos_calendario_api'), parametros, HTTP_ACCEPT_ENCODING='gzip, br;q=0')
+        self.assertNotIn('Content-Encoding', sin_comprimir)
+        self.assertEqual(comprimida['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', comprimida['Vary'])
+        self.assertEqual(gzip.decompress(comprimida.content), sin_comprimir.content)
+        self.assertLess(len(comprimida.content), len(sin_comprimir.content))
+        self.assertTrue(comprimida['ETag'].startswith('W/'))
+
+        repetida = self.client.get(
+            reverse('eventos_calendario_api'), parametros,
+            HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=comprimida['ETag'],
+        )
+        self.assertEqual(repetida.status_code, 304)
+        self.assertIsNone(elegir_codificacion('gzip;q=0, identity'))
+        self.assertEqual(elegir_codificacion('*'), 'br' if compresion.brotli else 'gzip')
+
+@requiere_benchmark
+class CalendarioSerializacionBenchmark(SimpleTestCase):
+    """Serialización de un mes de 2,000 eventos: filas de ``values_list`` contra el camino anterior"""
+
+    total = 2_000
+
+    def test_serializar_mes_2000_eventos(self):
+        base = datetime(2030, 5, 1, 6, 0, tzinfo=dt_timezone.utc)
+        filas = [
+            (
+                n, f'Evento {n}', base + timedelta(minutes=21 * n), 'Tuxtla Gutiérrez',
+                'Palacio de Gobierno', 'Secretaría General', n % 7 == 0, n % 2 == 0,
+                'programado', 'Descripción del evento ' * (n % 20),
+            )
+            for n in range(self.total)
+        ]
+        eventos = [
+            Evento(
+                pk=pk, nombre=nombre, fecha_evento=fecha_evento, lugar=lugar, responsable=responsable,
+                es_festivo=es_festivo, asistio_gobernador=asistio, estado=estado, descripcion=descripcion,
+            )
+            for pk, nombre, fecha_evento, _, lugar, responsable, es_festivo, asistio, estado, descripcion in filas
+        ]
+
+        def legado():
+            # Equivalente a la implementación anterior: instancias, strftime por campo y JsonResponse
+            from django.http import JsonResponse
+            datos = []
+            for evento in eventos:
+                fecha_mexico = evento.fecha_evento.astimezone(MEXICO_TZ)
+                datos.append({
+                    'id': evento.pk, 'title': evento.nombre,
+                    'date': fecha_mexico.strftime('%Y-%m-%d'), 'time': fecha_mexico.strftime('%H:%M'),
+                    'location': f'{evento.lugar}, Tuxtla Gutiérrez',
+                    'description': evento.descripcion[:280] or 'Sin descripción',
+                    'estado': evento.estado, 'es_festivo': evento.es_festivo,
+                    'asistio_gobernador': evento.asistio_gobernador, 'responsable': evento.responsable,
+                    'attendees': 0, 'municipio': 'Tuxtla Gutiérrez', 'full_location': evento.lugar,
+                    'fecha_completa': fecha_mexico.strftime('%d/%m/%Y %H:%M'),
+                })
+            return JsonResponse({'eventos': datos}).content
+
+        def nuevo():
+            return dumps({'eventos': serializar_calendario(filas, 280)})
+
+        repeticiones = 20
+        tiempos = {}
+        for nombre, funcion in (('legado', legado), ('nuevo', nuevo)):
+            inicio = time.perf_counter()
+            for _ in range(repeticiones):
+                funcion()
+            tiempos[nombre] = (time.perf_counter() - inicio) / repeticiones
+
+        por_segundo = lambda segundos: self.total / segundos
+        print(
+            f'\n{self.total:,} eventos/mes | nuevo: {tiempos["nuevo"] * 1000:.1f} ms '
+            f'({por_segundo(tiempos["nuevo"]):,.0f} eventos/s) | '
+            f'antes: {tiempos["legado"] * 1000:.1f} ms ({por_segundo(tiempos["legado"]):,.0f} eventos/s)'
+        )
+        self.assertLess(tiempos['nuevo'], tiempos['legado'])
+
+
+@requiere_benchmark
+class CalendarioCompactoBenchmark(SimpleTestCase):
+    """Bytes y tiempo de decodificación de un mes de 2,000 eventos: formato completo contra compacto"""
+
+    total = 2_000
+
+    def test_bytes_y_decodificacion(self):
+        base = datetime(2030, 5, 1, 6, 0, tzinfo=dt_timezone.utc)
+        municipios = [f'Municipio {n}' for n in range(40)]
+        lugares = [f'Salón {n} del Centro de Convenciones' for n in range(120)]
+        filas = [
+            (
+                n, f'Evento {n}', base + timedelta(minutes=21 * n), municipios[n % 40], lugares[n % 120],
+                f'Secretaría {n % 15}', n % 7 == 0, n % 2 == 0, 'programado', 'Descripción del evento ' * (n % 12),
+            )
+            for n in range(self.total)
+        ]
+        eventos = serializar_calendario(filas, 280)
+        cuerpos = {
+            'completo': dumps({'eventos': eventos}),
+            'compacto': dumps(compactar_calendario(eventos)),
+        }
+
+        resultados = {}
+        for nombre, cuerpo in cuerpos.items():
+            inicio = time.perf_counter()
+            for _ in range(20):
+                json.loads(cuerpo)
+            resultados[nombre] = (len(cuerpo), len(gzip.compress(cuerpo)), (time.perf_counter() - inicio) / 20)
+
+        for nombre, (crudo, comprimido, decodificar) in resultados.items():
+            print(
+                f'\n{self.total:,} eventos {nombre}: {crudo / 1024:.0f} KB | gzip {comprimido / 1024:.0f} KB | '
+                f'json.loads {decodificar * 1000:.1f} ms'
+            )
+        self.assertLess(resultados['compacto'][0], resultados['completo'][0] / 2)
+        self.assertLess(resultados['compacto'][1], resultados['completo'][1])
+        self.assertLess(resultados['compacto'][2], resultados['completo'][2])
+
+
+class FeedCalendarioTests(EventoTestMixin, TestCase):
+    def setUp(self):
+        self.token = TokenCalendario.para_usuario(self.usuario).token
+        self.evento = self.crear_evento(
+            timezone.now() + timedelta(days=1), nombre='Informe; avance, obras',
+            descripcion='Línea uno\n' + 'Texto largo con acentos á é í ó ú ' * 5,
+        )
+        self.cancelado = self.crear_evento(timezone.now() + timedelta(days=2), estado='cancelado')
+        self.antiguo = self.crear_evento(timezone.now() - timedelta(days=400))
+
+    def _feed(self, **parametros):
+        return self.client.get(reverse('feed_calendario'), {'token': self.token, **parametros})
+
+    def test_feed_ics_en_streaming(self):
+        response = self._feed()
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/calendar; charset=utf-8')
+        contenido = b''.join(response.streaming_content).decode()
+
+        self.assertTrue(contenido.startswith('BEGIN:VCALENDAR\r\n'))
+        self.assertTrue(contenido.endswith('END:VCALENDAR\r\n'))
+        self.assertEqual(contenido.count('BEGIN:VEVENT'), 2)
+        self.assertIn('SUMMARY:Informe\\; avance\\, obras', contenido)
+        self.assertIn('STATUS:CANCELLED', contenido)
+        self.assertNotIn(f'evento-{self.antiguo.pk}@', contenido)
+        self.assertTrue(all(len(linea.encode()) <= 75 for linea in contenido.split('\r\n')))
+
+        filtrado = b''.join(self._feed(estado='cancelado').streaming_content).decode()
+        self.assertEqual(filtrado.count('BEGIN:VEVENT'), 1)
+        self.assertEqual(self._feed(desde='2030-01-01', hasta='2029-01-01').status_code, 400)
+
+    def test_parametros_extremos_o_invalidos(self):
+        response = self._feed(hasta='9999-12-31')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content).decode().count('BEGIN:VEVENT'), 2)
+
+        for parametros in (
+            {'hasta': 'mañana'}, {'desde': '2025-02-30'}, {'desde': '20250101'},
+            {'municipio': '9' * 30}, {'municipio': '²'},
+        ):
+            self.assertEqual(self._feed(**parametros).status_code, 400, parametros)
+
+    def test_token_requerido_y_regenerable(self):
+        self.assertEqual(self.client.get(reverse('feed_calendario')).status_code, 404)
+        self.assertEqual(self.client.get(reverse('feed_calendario'), {'token': 'otro'}).status_code, 404)
+
+        creado = TokenCalendario.objects.get(usuario=self.usuario).fecha_creacion
+        self.client.force_login(self.usuario)
+        self.client.post(reverse('regenerar_feed_calendario'))
+        self.assertEqual(self._feed().status_code, 404)
+        registro = TokenCalendario.objects.get(usuario=self.usuario)
+        self.assertEqual(registro.fecha_creacion, creado)
+        self.token = registro.token
+        self.assertEqual(self._feed().status_code, 200)
+        self.assertIn(self.token, self.client.get(reverse('calendario')).context['feed_url'])
+
+    def test_304_hasta_que_cambia_la_agenda(self):
+        response = self._feed()
+        with CaptureQueriesContext(connection) as consultas:
+            repetida = self.client.get(
+                reverse('feed_calendario'), {'token': self.token}, HTTP_IF_NONE_MATCH=response['ETag'],
+            )
+        self.assertEqual(repetida.status_code, 304)
+        self.assertEqual(len(consultas.captured_queries), 3)
+        self.assertEqual(
+            self.client.get(
+                reverse('feed_calendario'), {'token': self.token}, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'],
+            ).status_code,
+            304,
+        )
+
+        self.cancelado.delete()
+        self.assertNotEqual(
+            self.client.get(
+                reverse('feed_calendario'), {'token': self.token}, HTTP_IF_NONE_MATCH=response['ETag'],
+            ).status_code,
+            304,
+        )
+
+    async def test_feed_asincrono_bajo_asgi(self):
+        response = await self.async_client.get(reverse('feed_calendario'), {'token': self.token})
+        self.assertTrue(response.is_async)
+        contenido = b''.join([parte async for parte in response.streaming_content]).decode()
+        self.assertEqual(contenido.count('BEGIN:VEVENT'), 2)
+        self.assertTrue(contenido.endswith('END:VCALENDAR\r\n'))
+
+
+class HeatmapTests(EventoTestMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.usuario)
+        # 31 de diciembre 23:30 en México es 1 de enero en UTC: cuenta en el año local
+        self.crear_evento(localizar_mexico(datetime(2028, 12, 31, 23, 30)))
+        self.crear_evento(localizar_mexico(datetime(2028, 1, 1, 0, 15)), asistio_gobernador=False)
+        self.crear_evento(localizar_mexico(datetime(2028, 1, 1, 18, 0)))
+        self.crear_evento(localizar_mexico(datetime(2029, 1, 1, 1, 0)))
+
+    def test_celdas_por_dia_local(self):
+        datos = self.client.get(reverse('heatmap_eventos_api'), {'year': 2028}).json()
+
+        self.assertEqual(datos['dias'], 366)
+        self.assertEqual(len(datos['gobernador']), 366)
+        self.assertEqual((datos['gobernador'][0], datos['representante'][0]), (1, 1))
+        self.assertEqual(datos['gobernador'][365], 1)
+        self.assertEqual(sum(datos['gobernador']) + sum(datos['representante']), 3)
+        self.assertEqual((datos['total_maximo'], datos['fecha_maximo']), (2, '2028-01-01'))
+        for year in ('x', '0', '9999', '10000'):
+            self.assertEqual(self.client.get(reverse('heatmap_eventos_api'), {'year': year}).status_code, 400, year)
+        vacio = self.client.get(reverse('heatmap_eventos_api'), {'year': 2040}).json()
+        self.assertEqual((vacio['total_maximo'], vacio['fecha_maximo']), (0, None))
+
+    def test_cache_por_year_y_version(self):
+        response = self.client.get(reverse('heatmap_eventos_api'), {'year': 2028})
+        with CaptureQueriesContext(connection) as consultas:
+            repetida = self.client.get(reverse('heatmap_eventos_api'), {'year': 2028}, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(repetida.status_code, 304)
+        self.assertFalse(any('FROM "eventos_evento"' in consulta['sql'] for consulta in consultas.captured_queries))
+
+        self.crear_evento(localizar_mexico(datetime(2028, 3, 1, 10, 0)))
+        datos = self.client.get(reverse('heatmap_eventos_api'), {'year': 2028}).json()
+        self.assertEqual(datos['gobernador'][31 + 29], 1)
+
+class BusquedaTextoTests(EventoTestMixin, TestCase):
+    def setUp(self):
+        ahora = timezone.now()
+        self.informe = self.crear_evento(
+            ahora, nombre='Informe de gobierno', lugar='Auditorio Municipal',
+            descripcion='Presentación del informe anual',
+        )
+        self.inauguracion = self.crear_evento(
+            ahora - timedelta(days=1), nombre='Inauguración de hospital', lugar='Hospital regional',
+            responsable='Secretaría de Salud',
+        )
+        comitan = Municipio.objects.create(nombre='Comitán de Domínguez')
+        self.visita = self.crear_evento(
+            ahora - timedelta(days=2), nombre='Visita de trabajo', municipio=comitan,
+            observaciones='Recorrido por la feria',
+        )
+
+    def test_ignora_acentos_y_busca_prefijos(self):
+        self.assertEqual(list(Evento.objects.buscar('inauguracion')), [self.inauguracion])
+        self.assertEqual(list(Evento.objects.buscar('COMITAN')), [self.visita])
+        self.assertEqual(list(Evento.objects.buscar('hosp salud')), [self.inauguracion])
+        self.assertEqual(Evento.objects.buscar('informe hospital').count(), 0)
+
+    def test_se_actualiza_al_guardar_y_al_renombrar_municipio(self):
+        self.visita.nombre = 'Gira de supervisión'
+        self.visita.save()
+        self.assertEqual(list(Evento.objects.buscar('supervision')), [self.visita])
+        self.assertFalse(Evento.objects.buscar('visita').exists())
+
+        Municipio.objects.filter(nombre='Comitán de Domínguez').update(nombre='Ocosingo')
+        self.assertEqual(list(Evento.objects.buscar('ocosingo')), [self.visita])
+
+    def test_relevancia_y_busqueda_en_lista(self):
+        eventos = list(Evento.objects.buscar('informe gobierno', ordenar_por_relevancia=True, cualquiera=True))
+        self.assertEqual(eventos, [self.informe, self.visita])
+
+        self.client.force_login(self.usuario)
+        response = self.client.get(reverse('lista_eventos'), {'buscar': 'Domínguez'})
+        self.assertEqual(list(response.context['eventos']), [self.visita])
+
+    def test_chatbot_usa_busqueda(self):
+        respuesta = ChatbotAgenda()._busqueda_general('buscar eventos de hospital')
+
+        self.assertIn('Inauguración de hospital', respuesta)
+
+
+class SimilitudTrigramasTests(EventoTestMixin, TestCase):
+    def setUp(self):
+        ahora = timezone.now()
+        self.polyforum = self.crear_evento(
+            ahora, lugar='Centro de Convenciones Polyforum', responsable='Secretaría de Turismo',
+        )
+        self.hospital = self.crear_evento(
+            ahora - timedelta(days=1), lugar='Hospital Regional', responsable='Secretaría de Salud',
+            representante='Dra. Martínez Gómez',
+        )
+        sancris = Municipio.objects.create(nombre='San Cristóbal de las Casas')
+        self.teatro = self.crear_evento(
+            ahora - timedelta(days=2), municipio=sancris, lugar='Teatro Hermanos Domínguez',
+        )
+
+    def test_trigramas_con_relleno_de_pg_trgm(self):
+        self.assertEqual(similitud.trigramas_ordenados('Sí'), ('  s', ' si', 'si '))
+        # Ejemplo de la documentación de pg_trgm: word_similarity('word', 'two words') = 0.8
+        self.assertAlmostEqual(similitud.similitud(similitud.trigramas('word'), similitud.trigramas_ordenados('two words')), 0.8)
+
+    def test_tolera_acentos_y_errores(self):
+        self.assertEqual(list(Evento.objects.buscar_similar('poliforum')), [self.polyforum])
+        self.assertEqual(Evento.objects.buscar_similar('secretaria de salu').first(), self.hospital)
+        self.assertEqual(list(Evento.objects.buscar_similar('martinez gomes')), [self.hospital])
+        self.assertEqual(list(Evento.objects.buscar_similar('cristobal')), [self.teatro])
+        self.assertFalse(Evento.objects.buscar_similar('zzz').exists())
+
+    def test_ordena_por_similitud_y_respeta_umbral(self):
+        eventos = list(Evento.objects.buscar_similar('Secretaría de Turismo'))
+        self.assertEqual(eventos[0], self.polyforum)
+        self.assertEqual(eventos[0].similitud, 1.0)
+        self.assertTrue(all(evento.similitud >= 0.5 for evento in eventos))
+        self.assertEqual(list(Evento.objects.buscar_similar('Secretaría de Turismo', umbral=0.9)), [self.polyforum])
+
+    def test_indice_local_se_reconstruye_con_cambios(self):
+        self.assertFalse(Evento.objects.buscar_similar('estadio').exists())
+        Evento.objects.filter(pk=self.teatro.pk).update(
+            lugar='Estadio Víctor Manuel Reyna', fecha_actualizacion=timezone.now() + timedelta(seconds=1),
+        )
+        self.assertEqual(list(Evento.objects.buscar_similar('estadio victor')), [self.teatro])
+
+    def test_filtros_se_aplican_antes_del_limite(self):
+        # Con límite 1 la coincidencia más similar es de otro municipio: no debe desplazar a la filtrada
+        with mock.patch('eventos.similitud.LIMITE_SIMILARES', 1):
+            eventos = Evento.objects.filter(municipio=self.municipio).buscar_similar('secretaria de salud')
+            self.assertEqual(list(eventos), [self.hospital])
+
+            datos = {'buscar': 'secretaria de turismo', 'municipio': self.municipio.pk}
+            self.assertEqual(list(Evento.objects.filtrar(datos)), [self.polyforum])
+
+    def test_lista_y_chatbot_recurren_a_la_similitud(self):
+        self.client.force_login(self.usuario)
+        response = self.client.get(reverse('lista_eventos'), {'buscar': 'poliforum'})
+        self.assertEqual([evento.pk for evento in response.context['eventos']], [self.polyforum.pk])
+        self.assertEqual(response.context['total_eventos'], 1)
+
+        self.assertIn('Polyforum', ChatbotAgenda()._busqueda_general('buscar eventos poliforum'))
+
+
+@requiere_benchmark
+@skipUnless(connection.vendor == 'postgresql', 'Los índices de trigramas requieren PostgreSQL')
+class SimilitudTrigramasBenchmark(EventoTestMixin, TestCase):
+    """``buscar_similar`` sobre 500k eventos debe usar los índices GIN y responder en <100 ms"""
+
+    total = 500_000
+
+    def setUp(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "INSERT INTO eventos_evento (nombre, fecha_evento, municipio_id, lugar, es_festivo, "
+                "responsable, asistio_gobernador, estado, creado_por_id, fecha_creacion, fecha_actualizacion) "
+                "SELECT 'Evento ' || n, now() - n * INTERVAL '7 minutes', %s, 'Salón ' || md5(n::text), "
+                "false, 'Dependencia ' || md5((n % 997)::text), true, 'finalizado', %s, now(), now() "
+                "FROM generate_series(1, %s) AS n",
+                [self.municipio.pk, self.usuario.pk, self.total],
+            )
+            cursor.execute('ANALYZE eventos_evento')
+        self.objetivo = self.crear_evento(timezone.now(), lugar='Centro de Convenciones Polyforum')
+
+    def test_busqueda_usa_indices_y_responde_rapido(self):
+        consulta = similitud.SinAcentos(Value('poliforum convenciones'))
+        plan = Evento.objects.filter(similitud.filtro_trigramas(consulta, [self.municipio.pk])).explain()
+        self.assertIn('BitmapOr', plan)
+        self.assertIn('eventos_evento_lugar_trgm', plan)
+
+        inicio = time.perf_counter()
+        for _ in range(10):
+            resultado = list(Evento.objects.buscar_similar('poliforum convenciones')[:10])
+        promedio = (time.perf_counter() - inicio) / 10
+        print(f'\n{self.total:,} eventos | buscar_similar: {promedio * 1000:.2f} ms')
+        self.assertEqual(resultado[0], self.objetivo)
+        self.assertLess(promedio, 0.1)
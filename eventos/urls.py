@@ -5,11 +5,14 @@ from . import views
 urlpatterns = [
     # Dashboard principal
     path('', views.dashboard, name='dashboard'),
+    path('api/dashboard/cambios/', views.dashboard_cambios_api, name='dashboard_cambios_api'),
+    path('api/stream/agenda/', views.stream_agenda, name='stream_agenda'),
     
     # Gestión básica de eventos
     path('eventos/crear/', views.crear_evento, name='crear_evento'),
     path('eventos/editar/<int:pk>/', views.editar_evento, name='editar_evento'),
     path('eventos/detalle/<int:pk>/', views.detalle_evento, name='detalle_evento'),
+    path('api/eventos/detalles/', views.detalles_eventos_api, name='detalles_eventos_api'),
     path('eventos/lista/', views.lista_eventos, name='lista_eventos'),
 
 
@@ -17,6 +20,10 @@ urlpatterns = [
     # NUEVA RUTA PARA EL CALENDARIO
     path('calendario/', views.calendario, name='calendario'),
     path('api/eventos-calendario/', views.eventos_calendario_api, name='eventos_calendario_api'),
+    path('calendario/feed.ics', views.feed_calendario, name='feed_calendario'),
+    path('calendario/feed/regenerar/', views.regenerar_feed_calendario, name='regenerar_feed_calendario'),
+    path('api/eventos/heatmap/', views.heatmap_eventos_api, name='heatmap_eventos_api'),
+    path('api/eventos-calendario/descripciones/', views.descripciones_calendario_api, name='descripciones_calendario_api'),
     
     # Acciones de eventos
     path('eventos/finalizar/<int:pk>/', views.finalizar_evento, name='finalizar_evento'),
@@ -27,10 +34,13 @@ urlpatterns = [
     path('debug/fechas/', views.verificar_fechas_eventos, name='verificar_fechas_eventos'),
     path('debug/cambiar-fecha/<int:pk>/', views.cambiar_fecha_evento_debug, name='cambiar_fecha_evento_debug'),
     path('debug/crear-eventos-prueba/', views.crear_eventos_prueba, name='crear_eventos_prueba'),
+    path('debug/perf/', views.rendimiento_debug, name='rendimiento_debug'),
     
     # Reportes y estadísticas
     path('reportes/', views.reportes, name='reportes'),
     path('reportes/excel/', views.generar_excel, name='generar_excel'),
+    path('reportes/csv/', views.exportar_eventos, {'formato': 'csv'}, name='exportar_csv'),
+    path('reportes/jsonl/', views.exportar_eventos, {'formato': 'jsonl'}, name='exportar_jsonl'),
     path('estadisticas/', views.estadisticas, name='estadisticas'),
 
     # APIs del chatbot
@@ -1,28 +1,58 @@
 # eventos/utils.py
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, date, time, timedelta, timezone as dt_timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+
 from django.utils import timezone
-import pytz
-from datetime import datetime, date
+
+# Zona horaria única del proceso (zoneinfo no requiere localize() como pytz)
+MEXICO_TZ = ZoneInfo('America/Mexico_City')
+
+# Instante fijado para la solicitud en curso (ver eventos.middleware.reloj_solicitud_middleware)
+_ahora_solicitud = ContextVar('ahora_solicitud', default=None)
 
 def get_mexico_timezone():
     """Obtiene la zona horaria de México"""
-    return pytz.timezone('America/Mexico_City')
+    return MEXICO_TZ
+
+def obtener_ahora():
+    """Instante actual; dentro de una solicitud es el mismo para toda la solicitud"""
+    instante = _ahora_solicitud.get()
+    return instante if instante is not None else timezone.now()
+
+@contextmanager
+def instantanea_reloj(instante=None):
+    """Fija el instante que devuelve obtener_ahora() mientras dure el bloque"""
+    token = _ahora_solicitud.set(instante or timezone.now())
+    try:
+        yield
+    finally:
+        _ahora_solicitud.reset(token)
 
 def get_current_mexico_time():
     """Obtiene la fecha y hora actual en zona horaria de México"""
-    mexico_tz = get_mexico_timezone()
-    return timezone.now().astimezone(mexico_tz)
+    return obtener_ahora().astimezone(MEXICO_TZ)
+
+def hoy_mexico():
+    """Fecha de hoy en México"""
+    return get_current_mexico_time().date()
+
+def localizar_mexico(dt):
+    """Interpreta un datetime naive como hora de México"""
+    return dt.replace(tzinfo=MEXICO_TZ)
 
 def convert_to_mexico_time(dt):
     """Convierte un datetime a zona horaria de México"""
     if dt is None:
         return None
     
-    mexico_tz = get_mexico_timezone()
     if dt.tzinfo is None:
         # Si no tiene timezone, asumimos que es UTC
-        dt = pytz.UTC.localize(dt)
+        dt = dt.replace(tzinfo=dt_timezone.utc)
     
-    return dt.astimezone(mexico_tz)
+    return dt.astimezone(MEXICO_TZ)
 
 def format_event_date(evento):
     """Formatea la fecha de un evento para mostrar en el calendario"""
@@ -38,9 +68,45 @@ def parse_calendar_date(date_string):
     """Convierte una fecha en formato YYYY-MM-DD a datetime con timezone de México"""
     try:
         date_obj = datetime.strptime(date_string, '%Y-%m-%d').date()
-        mexico_tz = get_mexico_timezone()
         # Crear datetime al inicio del día en México
-        dt = datetime.combine(date_obj, datetime.min.time())
-        return mexico_tz.localize(dt)
+        return datetime.combine(date_obj, time.min, tzinfo=MEXICO_TZ)
     except (ValueError, TypeError):
-        return None
\ No newline at end of file
+        return None
+
+@lru_cache(maxsize=1024)
+def inicio_dia_mexico(fecha):
+    """Instante UTC en que inicia el día ``fecha`` en hora de México (memoizado)"""
+    return datetime.combine(fecha, time.min, tzinfo=MEXICO_TZ).astimezone(dt_timezone.utc)
+
+def fin_dia_mexico(fecha):
+    """Instante UTC en que termina el día ``fecha`` en México (inicio del siguiente).
+
+    None para el último día representable (9999-12-31): el día siguiente no existe en
+    ``date`` y ningún instante posterior cabe en ``datetime``, así que el rango queda abierto.
+    """
+    if fecha >= date.max:
+        return None
+    return inicio_dia_mexico(fecha + timedelta(days=1))
+
+def rango_dia_mexico(fecha):
+    """Límites [inicio_utc, fin_utc) del día local de México ``fecha`` (fin None en 9999-12-31)"""
+    return inicio_dia_mexico(fecha), fin_dia_mexico(fecha)
+
+def rango_fechas_mexico(desde=None, hasta=None):
+    """Límites [inicio_utc, fin_utc) que cubren los días locales desde..hasta (inclusivos).
+
+    Un extremo en None deja el rango abierto por ese lado.
+    """
+    inicio = inicio_dia_mexico(desde) if desde else None
+    fin = fin_dia_mexico(hasta) if hasta else None
+    return inicio, fin
+
+def filtro_fechas_mexico(desde=None, hasta=None, campo='fecha_evento'):
+    """kwargs de filter() para un rango de días locales que aprovecha el índice del campo"""
+    inicio, fin = rango_fechas_mexico(desde, hasta)
+    filtros = {}
+    if inicio is not None:
+        filtros[f'{campo}__gte'] = inicio
+    if fin is not None:
+        filtros[f'{campo}__lt'] = fin
+    return filtros
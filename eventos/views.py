@@ -1,26 +1,56 @@
 # eventos/views.py
 from django.shortcuts import render, get_object_or_404, redirect
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
-from django.http import HttpResponse, JsonResponse
+from django.http import FileResponse, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.dateparse import parse_datetime
+from django.utils.http import http_date, quote_etag
 from django.utils import timezone
 from django.contrib import messages
-from django.db.models import Q, Count
-from django.db.models.functions import TruncMonth
+from django.core.cache import cache
+from django.db.models import Q, Count, Max, Sum
+from django.db.models.functions import Coalesce, Left
+from django.db.models.functions import TruncDate, TruncMonth
 from django.template.loader import render_to_string
-from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
-from datetime import timedelta, datetime
+from datetime import date, timedelta, datetime
+import calendar
+import hashlib
 import json
-import pytz
-from .utils import get_mexico_timezone, convert_to_mexico_time, format_event_date
+import logging
+import re
+from .utils import (
+    MEXICO_TZ, convert_to_mexico_time, get_current_mexico_time, filtro_fechas_mexico,
+    rango_dia_mexico, localizar_mexico, obtener_ahora,
+)
+from .cache import clave_agenda, get_agenda_cache_timeout
+from .broadcast import get_broadcaster
+from .paginacion import estimar_total, paginar_por_cursor
+from .perf import get_registro
+from .compresion import comprimir_json
+from .exportacion import (
+    TAMANO_BLOQUE_EXPORTACION, comprimir_gzip, generar_csv, generar_jsonl, transmitir,
+)
+from .ical import generar_feed
+from .serializacion import (
+    HORAS_DEL_DIA, RespuestaJson, compactar_calendario, dumps, recortar_descripcion,
+    serializar_calendario,
+)
 
 # Importaciones para reportes
 from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Font, PatternFill, Alignment
 from openpyxl.utils import get_column_letter
 import io
+import tempfile
 
-from .models import Evento, Municipio
+from .models import (
+    DURACION_EVENTO, LONGITUD_DESCRIPCION_CALENDARIO, Evento, EventoResumenDia, Municipio,
+    TokenCalendario,
+)
+from .resumenes import CAMPOS_CONTEO
 from .forms import EventoForm, FiltroEventosForm
 
 #importacion Chatbot
@@ -29,72 +59,196 @@ from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from .chatbot import ChatbotAgenda
 
+logger = logging.getLogger(__name__)
+
+def _ventana_dashboard(ahora_mexico):
+    """Eventos de hoy y los próximos 7 días (hora de México) con su estado vigente"""
+    hoy = ahora_mexico.date()
+    fin_hoy = rango_dia_mexico(hoy)[1]
+    
+    eventos_ventana = Evento.objects.filter(
+        **filtro_fechas_mexico(hoy, hoy + timedelta(days=7))
+    ).con_estado_efectivo(ahora_mexico)
+    return eventos_ventana, fin_hoy
+
+def _contadores_dashboard(eventos_ventana, fin_hoy):
+    """Contadores del dashboard en un solo aggregate condicional"""
+    return eventos_ventana.aggregate(
+        en_curso=Count('pk', filter=Q(fecha_evento__lt=fin_hoy, estado_efectivo='en_curso')),
+        hoy_proximos=Count('pk', filter=Q(fecha_evento__lt=fin_hoy, estado_efectivo='programado')),
+        hoy_finalizados=Count('pk', filter=Q(fecha_evento__lt=fin_hoy, estado_efectivo='finalizado')),
+        proximos=Count('pk', filter=Q(fecha_evento__gte=fin_hoy)),
+        total=Count('pk'),
+        ultima_actualizacion=Max('fecha_actualizacion'),
+    )
+
+def _seccion_dashboard(evento, fin_hoy):
+    """Sección del dashboard en la que se muestra un evento (None si no se muestra)"""
+    if evento.fecha_evento >= fin_hoy:
+        return 'proximos'
+    return {
+        'en_curso': 'en_curso',
+        'programado': 'hoy_proximos',
+        'finalizado': 'hoy_finalizados',
+    }.get(evento.estado_efectivo)
+
+def _token_dashboard(hoy, contadores):
+    """Token opaco para /api/dashboard/cambios/: fecha de la agenda y marca de agua"""
+    ultima = contadores['ultima_actualizacion']
+    return f"{hoy.isoformat()}|{ultima.isoformat() if ultima else ''}"
+
+def _contexto_agenda_dashboard(ahora_mexico):
+    """Consulta y agrupa los eventos de hoy y los próximos 7 días para el dashboard"""
+    hoy = ahora_mexico.date()
+    eventos_ventana, fin_hoy = _ventana_dashboard(ahora_mexico)
+    
+    # Separar en memoria por día y estado calculado
+    secciones = {
+        'en_curso': [],
+        'hoy_proximos': [],
+        'hoy_finalizados': [],
+        'proximos': [],
+    }
+    eventos_hoy_todos = []
+    for evento in eventos_ventana.para_listado().order_by('fecha_evento'):
+        seccion = _seccion_dashboard(evento, fin_hoy)
+        if seccion != 'proximos':
+            eventos_hoy_todos.append(evento)
+        if seccion and not (seccion == 'proximos' and len(secciones['proximos']) >= 10):
+            secciones[seccion].append(evento)
+    
+    contadores = _contadores_dashboard(eventos_ventana, fin_hoy)
+    
+    context = {
+        'eventos_hoy_todos': eventos_hoy_todos,
+        'eventos_en_curso': secciones['en_curso'],
+        'eventos_hoy_proximos': secciones['hoy_proximos'],
+        'eventos_hoy_finalizados': secciones['hoy_finalizados'],
+        'eventos_proximos': secciones['proximos'],
+        'contadores': contadores,
+        'token': _token_dashboard(hoy, contadores),
+        'fecha_actual': hoy,
+        'ahora_mexico': ahora_mexico,
+    }
+    return context
+
 # Vista principal - Dashboard
 @login_required
 def dashboard(request):
     """Dashboard principal con eventos del día y próximos"""
     # Obtener fecha actual en zona horaria de México
-    mexico_tz = pytz.timezone('America/Mexico_City')
-    ahora_mexico = timezone.now().astimezone(mexico_tz)
+    ahora_mexico = get_current_mexico_time()
     hoy = ahora_mexico.date()
     
-    print(f"DEBUG - Fecha/hora actual en México: {ahora_mexico}")
-    print(f"DEBUG - Fecha de hoy: {hoy}")
-    
-    # Obtener todos los eventos de hoy
-    eventos_hoy_todos = Evento.objects.filter(
-        fecha_evento__date=hoy
-    ).select_related('municipio', 'creado_por').order_by('fecha_evento')
-    
-    print(f"DEBUG - Eventos encontrados para hoy: {eventos_hoy_todos.count()}")
-    
-    # Actualizar estados automáticamente antes de mostrar
-    for evento in eventos_hoy_todos:
-        estado_anterior = evento.estado
-        evento.actualizar_estado_automatico()
-        if estado_anterior != evento.estado:
-            print(f"DEBUG - Estado actualizado: {evento.nombre} {estado_anterior} -> {evento.estado}")
-    
-    # Refrescar desde la base de datos después de actualizar
-    eventos_hoy_todos = Evento.objects.filter(
-        fecha_evento__date=hoy
-    ).select_related('municipio', 'creado_por').order_by('fecha_evento')
-    
-    # Separar por estados calculados
-    eventos_en_curso = eventos_hoy_todos.filter(estado='en_curso')
-    eventos_hoy_proximos = eventos_hoy_todos.filter(estado='programado')
-    eventos_hoy_finalizados = eventos_hoy_todos.filter(estado='finalizado')
-    
-    # Eventos próximos (siguientes 7 días, excluyendo hoy)
-    fecha_limite = hoy + timedelta(days=7)
-    eventos_proximos = Evento.objects.filter(
-        fecha_evento__date__gt=hoy,
-        fecha_evento__date__lte=fecha_limite
-    ).select_related('municipio', 'creado_por').order_by('fecha_evento')[:10]
-    
-    # También actualizar estados de eventos próximos
-    for evento in eventos_proximos:
-        evento.actualizar_estado_automatico()
-    
-    # Debug: Imprimir información para verificar
-    print(f"DEBUG - Total eventos hoy: {eventos_hoy_todos.count()}")
-    print(f"DEBUG - En curso: {eventos_en_curso.count()}")
-    print(f"DEBUG - Próximos hoy: {eventos_hoy_proximos.count()}")
-    print(f"DEBUG - Finalizados hoy: {eventos_hoy_finalizados.count()}")
-    print(f"DEBUG - Próximos 7 días: {eventos_proximos.count()}")
+    # La agenda es igual para todo el personal: se cachea por fecha y versión de la agenda
+    clave = clave_agenda('dashboard', hoy.isoformat())
+    agenda_html = cache.get(clave)
+    if agenda_html is None:
+        agenda_html = render_to_string(
+            'eventos/partials/dashboard_agenda.html',
+            _contexto_agenda_dashboard(ahora_mexico)
+        )
+        cache.set(clave, agenda_html, get_agenda_cache_timeout())
     
     context = {
-        'eventos_hoy_todos': eventos_hoy_todos,
-        'eventos_en_curso': eventos_en_curso,
-        'eventos_hoy_proximos': eventos_hoy_proximos,
-        'eventos_hoy_finalizados': eventos_hoy_finalizados,
-        'eventos_proximos': eventos_proximos,
+        'agenda_html': agenda_html,
         'fecha_actual': hoy,
         'ahora_mexico': ahora_mexico,
     }
     
     return render(request, 'eventos/dashboard.html', context)
 
+@login_required
+@comprimir_json
+def dashboard_cambios_api(request):
+    """Cambios del dashboard desde el token del cliente, con soporte de ETag (304)"""
+    ahora_mexico = get_current_mexico_time()
+    hoy = ahora_mexico.date()
+    
+    eventos_ventana, fin_hoy = _ventana_dashboard(ahora_mexico)
+    contadores = _contadores_dashboard(eventos_ventana, fin_hoy)
+    
+    # El ETag cambia con altas, bajas, ediciones y transiciones de estado de la ventana
+    firma = f"{hoy.isoformat()}:" + ':'.join(str(contadores[clave]) for clave in sorted(contadores))
+    etag = quote_etag(hashlib.md5(firma.encode()).hexdigest())
+    no_modificado = get_conditional_response(request, etag=etag)
+    if no_modificado is not None:
+        return no_modificado
+    
+    fecha_token, _, marca = request.GET.get('desde', '').partition('|')
+    try:
+        desde = parse_datetime(marca) if marca else None
+        # La marca de _token_dashboard siempre lleva zona horaria
+        token_valido = not marca or (desde is not None and timezone.is_aware(desde))
+    except (ValueError, TypeError):
+        # Bien formada pero inexistente (2026-99-99T00:00)
+        token_valido = False
+    
+    # Cambió el día o el token no es válido: la página debe recargarse completa una vez
+    if fecha_token != hoy.isoformat() or not token_valido:
+        response = JsonResponse({'recargar': True})
+        response['ETag'] = etag
+        return response
+    
+    ids = []
+    eventos = []
+    for evento in eventos_ventana.para_listado().order_by('fecha_evento'):
+        ids.append(evento.pk)
+        cambio = (
+            desde is None or
+            evento.fecha_actualizacion > desde or
+            evento.estado_efectivo != evento.estado
+        )
+        if cambio:
+            seccion = _seccion_dashboard(evento, fin_hoy)
+            eventos.append({
+                'id': evento.pk,
+                'seccion': seccion,
+                'fecha': int(evento.fecha_evento.timestamp()),
+                'html': render_to_string('eventos/partials/dashboard_tarjeta.html', {
+                    'evento': evento,
+                    'seccion': seccion,
+                }) if seccion else '',
+            })
+    
+    response = JsonResponse({
+        'recargar': False,
+        'token': _token_dashboard(hoy, contadores),
+        'ids': ids,
+        'eventos': eventos,
+        'contadores': {
+            clave: contadores[clave]
+            for clave in ('en_curso', 'hoy_proximos', 'hoy_finalizados', 'proximos')
+        },
+    })
+    response['ETag'] = etag
+    return response
+
+# Canal de notificaciones en vivo (servido por ASGI, ver config/asgi.py)
+async def stream_agenda(request):
+    """Server-Sent Events con los cambios de la agenda (eventos y estados)"""
+    user = await request.auser()
+    if not user.is_authenticated:
+        return HttpResponse(status=401)
+    if not settings.AGENDA_SSE_HABILITADO:
+        # 204: EventSource no reintenta y el cliente sigue con el sondeo de dashboard_cambios_api
+        return HttpResponse(status=204)
+    
+    async def mensajes():
+        # Reintento del navegador si se corta la conexión
+        yield 'retry: 5000\n\n'
+        async for mensaje in get_broadcaster().suscribir():
+            if mensaje is None:
+                # Comentario SSE para mantener viva la conexión a través de proxies
+                yield ': latido\n\n'
+            else:
+                yield f'event: agenda\ndata: {json.dumps(mensaje)}\n\n'
+    
+    response = StreamingHttpResponse(mensajes(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
 # Vista para crear eventos
 @login_required
 def crear_evento(request):
@@ -121,9 +275,8 @@ def crear_evento(request):
                 
                 return redirect('dashboard')
                     
-            except Exception as e:
-                # Log del error para debugging
-                print(f"Error al crear evento: {e}")
+            except Exception:
+                logger.exception('Error al crear evento')
                 messages.error(
                     request, 
                     '❌ Ocurrió un error al crear el evento. Por favor, inténtelo nuevamente.'
@@ -169,7 +322,7 @@ def crear_evento(request):
     context = {
         'form': form,
         'municipios_activos': Municipio.objects.filter(activo=True).count(),
-        'hora_actual': timezone.now().astimezone(pytz.timezone('America/Mexico_City')),
+        'hora_actual': get_current_mexico_time(),
     }
     
     return render(request, 'eventos/crear_evento.html', context)
@@ -213,14 +366,8 @@ def cambiar_estado_evento(request, pk):
 def actualizar_estados_eventos(request):
     """Actualiza todos los estados de eventos automáticamente"""
     if request.method == 'POST':
-        eventos = Evento.objects.filter(fecha_finalizacion_manual__isnull=True)
-        contador = 0
-        
-        for evento in eventos:
-            estado_anterior = evento.estado
-            evento.actualizar_estado_automatico()
-            if evento.estado != estado_anterior:
-                contador += 1
+        cambios = Evento.objects.sincronizar_estados()
+        contador = sum(cambios.values())
         
         messages.success(request, f'Se actualizaron {contador} eventos automáticamente.')
     
@@ -282,101 +429,154 @@ def editar_evento(request, pk):
 # Vista para detalle de evento (versión modal)
 @login_required
 def detalle_evento(request, pk):
-    """Muestra el detalle completo de un evento para modal"""
-    evento = get_object_or_404(Evento, pk=pk)
-    evento.actualizar_estado_automatico()
+    """Muestra el detalle completo de un evento para modal (304 si no cambió)"""
+    evento = get_object_or_404(Evento.objects.select_related('municipio'), pk=pk)
     
-    # Siempre usar el template del modal
-    return render(request, 'eventos/detalle_evento_modal.html', {'evento': evento})
+    etag, ultima_modificacion = _validadores_detalle(evento)
+    no_modificado = get_conditional_response(
+        request, etag=etag, last_modified=ultima_modificacion.timestamp()
+    )
+    response = no_modificado or HttpResponse(_html_detalle(request, evento, etag))
+    _marcar_validadores_detalle(response, etag, ultima_modificacion)
+    return response
+
+# Máximo de eventos por solicitud de precarga
+MAX_DETALLES_LOTE = 50
+
+# Ids aceptados en parámetros: dígitos ASCII que caben en un bigint
+PATRON_ID = re.compile(r'\d{1,18}', re.ASCII)
+
+def _ids_lote(valor):
+    """Ids únicos de ``?ids=1,2,3`` en orden, hasta ``MAX_DETALLES_LOTE``; se omiten los no válidos"""
+    ids = []
+    for parte in valor.split(','):
+        parte = parte.strip()
+        if PATRON_ID.fullmatch(parte) and int(parte) not in ids:
+            ids.append(int(parte))
+            if len(ids) == MAX_DETALLES_LOTE:
+                break
+    return ids
+
+@login_required
+@comprimir_json
+def detalles_eventos_api(request):
+    """Detalles de varios eventos (?ids=1,2,3) en una sola solicitud para precargar modales"""
+    ids = _ids_lote(request.GET.get('ids', ''))
+    eventos = Evento.objects.select_related('municipio').filter(pk__in=ids).in_bulk()
+    validadores = {pk: _validadores_detalle(evento) for pk, evento in eventos.items()}
+    
+    etag = quote_etag(hashlib.md5(
+        ','.join(f'{pk}:{validadores[pk][0]}' for pk in ids if pk in validadores).encode()
+    ).hexdigest())
+    response = get_conditional_response(request, etag=etag) or JsonResponse({
+        'detalles': {
+            str(pk): {
+                'html': _html_detalle(request, eventos[pk], validadores[pk][0]),
+                'etag': validadores[pk][0],
+            }
+            for pk in ids if pk in eventos
+        },
+    })
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+def _validadores_detalle(evento):
+    """ETag y Last-Modified del modal: la edición del evento y el nombre de su municipio"""
+    firma = f'{evento.pk}:{evento.fecha_actualizacion.isoformat()}:{evento.municipio.nombre}'
+    return quote_etag(hashlib.md5(firma.encode()).hexdigest()), evento.fecha_actualizacion
+
+def _marcar_validadores_detalle(response, etag, ultima_modificacion):
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(ultima_modificacion.timestamp())
+    # Privado y revalidado en cada apertura: el navegador reutiliza el cuerpo con un 304
+    response['Cache-Control'] = 'private, no-cache'
+
+def _html_detalle(request, evento, etag):
+    """HTML del modal, cacheado por ETag (cambia con cada edición del evento)"""
+    clave = f'detalle_evento:{evento.pk}:{etag.strip(chr(34))}'
+    html = cache.get(clave)
+    if html is None:
+        html = render_to_string('eventos/detalle_evento_modal.html', {'evento': evento}, request)
+        cache.set(clave, html, get_agenda_cache_timeout())
+    return html
 
 # Vista para lista de eventos
+# Parámetros de la lista que no cambian el conjunto filtrado
+PARAMETROS_NAVEGACION = ('cursor', 'page')
+
+def _eventos_filtrados(form):
+    """Eventos con los filtros válidos de ``form`` y la firma de esos filtros"""
+    datos = form.cleaned_data if form.is_valid() else {}
+    eventos = Evento.objects.order_by('-fecha_evento')
+    return eventos.filtrar(datos), Evento.objects.firma_filtros(datos)
+
+def _resumen_filtrado(eventos, firma, hoy):
+    """Contadores de un conjunto filtrado en un solo aggregate condicional.
+    
+    Se cachea por versión de la agenda, fecha y firma de filtros, así que la lista, los
+    reportes y la exportación con los mismos filtros comparten el mismo cálculo.
+    """
+    huella = hashlib.sha1(json.dumps(firma).encode()).hexdigest()
+    clave = clave_agenda('resumen_filtros', hoy.isoformat(), huella)
+    resumen = cache.get(clave)
+    if resumen is None:
+        fin_hoy = rango_dia_mexico(hoy)[1]
+        estados = {
+            f'estado_{estado}': Count('pk', filter=Q(estado=estado))
+            for estado, _ in Evento.ESTADO_CHOICES
+        }
+        resumen = eventos.order_by().aggregate(
+            total=Count('pk'),
+            hoy=Count('pk', filter=Q(fecha_evento__dia_mx=hoy)),
+            proximos=Count('pk', filter=Q(fecha_evento__gte=fin_hoy)),
+            gobernador=Count('pk', filter=Q(asistio_gobernador=True)),
+            representante=Count('pk', filter=Q(asistio_gobernador=False)),
+            festivos=Count('pk', filter=Q(es_festivo=True)),
+            **estados,
+        )
+        resumen['finalizados'] = resumen['estado_finalizado']
+        cache.set(clave, resumen, get_agenda_cache_timeout())
+    return resumen
+
 @login_required
 def lista_eventos(request):
     """Lista todos los eventos con filtros y paginación AJAX"""
     form = FiltroEventosForm(request.GET or None)
-    eventos = Evento.objects.select_related('municipio', 'creado_por').order_by('-fecha_evento')
-    
-    # Aplicar filtros
-    if form.is_valid():
-        # Filtro por fecha desde
-        if form.cleaned_data.get('fecha_desde'):
-            eventos = eventos.filter(fecha_evento__date__gte=form.cleaned_data['fecha_desde'])
-        
-        # Filtro por fecha hasta
-        if form.cleaned_data.get('fecha_hasta'):
-            eventos = eventos.filter(fecha_evento__date__lte=form.cleaned_data['fecha_hasta'])
-        
-        # Filtro por municipio
-        if form.cleaned_data.get('municipio'):
-            eventos = eventos.filter(municipio=form.cleaned_data['municipio'])
-        
-        # Filtro por estado
-        if form.cleaned_data.get('estado'):
-            eventos = eventos.filter(estado=form.cleaned_data['estado'])
-        
-        # Filtro por asistencia del gobernador
-        asistencia = form.cleaned_data.get('asistencia')
-        if asistencia:
-            if asistencia == 'True':
-                eventos = eventos.filter(asistio_gobernador=True)
-            elif asistencia == 'False':
-                eventos = eventos.filter(asistio_gobernador=False)
-        
-        # Filtro por tipo de evento
-        tipo_evento = form.cleaned_data.get('tipo_evento')
-        if tipo_evento:
-            if tipo_evento == 'festivo':
-                eventos = eventos.filter(es_festivo=True)
-            elif tipo_evento == 'regular':
-                eventos = eventos.filter(es_festivo=False)
-        
-        # Filtro por búsqueda de texto
-        buscar = form.cleaned_data.get('buscar')
-        if buscar:
-            from django.db.models import Q
-            eventos = eventos.filter(
-                Q(nombre__icontains=buscar) |
-                Q(lugar__icontains=buscar) |
-                Q(responsable__icontains=buscar) |
-                Q(municipio__nombre__icontains=buscar) |
-                Q(representante__icontains=buscar) |
-                Q(descripcion__icontains=buscar) |
-                Q(observaciones__icontains=buscar)
-            )
+    eventos, firma = _eventos_filtrados(form)
+    
+    # Paginación por cursor sobre (fecha_evento, id): cada página es un rango del índice
+    pagina = paginar_por_cursor(eventos.para_listado(), request.GET.get('cursor'), por_pagina=4)
+    
+    # Sin filtros el conteo exacto recorre todo el historial (y se invalida con cada edición):
+    # en PostgreSQL se usa la estimación del planificador salvo que se pida ?contar=1
+    resumen = None
+    total_eventos = None
+    if not firma and not request.GET.get('contar'):
+        total_eventos = estimar_total(eventos)
+    if total_eventos is None:
+        # Contadores en un solo aggregate, cacheados por filtros: cambiar de página no los recalcula
+        resumen = _resumen_filtrado(eventos, firma, get_current_mexico_time().date())
+        total_eventos = resumen['total']
+    else:
+        pagina.total_estimado = True
+    pagina.total = total_eventos
     
-    # Implementar paginación
-    paginator = Paginator(eventos, 4)  # 4 eventos por página
-    page_number = request.GET.get('page', 1)
+    # Filtros actuales para construir los enlaces de paginación
+    parametros = request.GET.copy()
+    for parametro in PARAMETROS_NAVEGACION:
+        parametros.pop(parametro, None)
+    parametros_filtro = parametros.urlencode()
     
-    try:
-        page_obj = paginator.get_page(page_number)
-    except PageNotAnInteger:
-        page_obj = paginator.get_page(1)
-    except EmptyPage:
-        page_obj = paginator.get_page(paginator.num_pages)
-    
-    # Calcular estadísticas
-    total_eventos = eventos.count()
-    hoy = timezone.now().date()
-    eventos_hoy = eventos.filter(fecha_evento__date=hoy)
-    eventos_proximos = eventos.filter(fecha_evento__date__gt=hoy)
-    eventos_finalizados = eventos.filter(estado='finalizado')
-    
-    # Info de paginación
-    pagination_info = {
-        'showing_start': (page_obj.number - 1) * 4 + 1 if page_obj.object_list else 0,
-        'showing_end': min(page_obj.number * 4, total_eventos),
-        'total_count': total_eventos,
-        'current_page': page_obj.number,
-        'total_pages': paginator.num_pages,
-    }
+    pagination_info = pagina.info()
     
     # NUEVO: Manejar peticiones AJAX
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
         # Para peticiones AJAX, devolver solo el HTML de la tabla y paginación
         table_html = render_to_string('eventos/partials/events_table.html', {
-            'eventos': page_obj.object_list,
-            'page_obj': page_obj,
+            'eventos': pagina.eventos,
+            'pagina': pagina,
+            'parametros_filtro': parametros_filtro,
             'pagination_info': pagination_info,
             'request': request,
         })
@@ -390,13 +590,12 @@ def lista_eventos(request):
     
     # Para peticiones normales, renderizar la página completa
     context = {
-        'eventos': page_obj.object_list,
-        'page_obj': page_obj,
+        'eventos': pagina.eventos,
+        'pagina': pagina,
+        'parametros_filtro': parametros_filtro,
         'form': form,
         'total_eventos': total_eventos,
-        'eventos_hoy': eventos_hoy,
-        'eventos_proximos': eventos_proximos,
-        'eventos_finalizados': eventos_finalizados,
+        'resumen': resumen,
         'pagination_info': pagination_info,
     }
     
@@ -410,15 +609,14 @@ def lista_eventos(request):
 @login_required
 def verificar_fechas_eventos(request):
     """Vista para debug de fechas de eventos"""
-    mexico_tz = pytz.timezone('America/Mexico_City')
-    ahora_mexico = timezone.now().astimezone(mexico_tz)
+    ahora_mexico = get_current_mexico_time()
     hoy = ahora_mexico.date()
     
     eventos = Evento.objects.all().order_by('fecha_evento')
     
     info_eventos = []
     for evento in eventos:
-        evento_fecha_mexico = evento.fecha_evento.astimezone(mexico_tz)
+        evento_fecha_mexico = evento.get_fecha_mexico()
         info_eventos.append({
             'evento': evento,
             'fecha_utc': evento.fecha_evento,
@@ -436,6 +634,21 @@ def verificar_fechas_eventos(request):
     
     return render(request, 'eventos/debug_fechas.html', context)
 
+@staff_member_required
+def rendimiento_debug(request):
+    """Percentiles p50/p95 por vista de las últimas solicitudes de este proceso"""
+    registro = get_registro()
+    if request.method == 'POST':
+        registro.limpiar()
+        return redirect('rendimiento_debug')
+    
+    context = {
+        'vistas': registro.resumen(),
+        'ventana': registro.ventana,
+        'umbral_lento_ms': settings.PERF_UMBRAL_LENTO_MS,
+    }
+    return render(request, 'eventos/debug_perf.html', context)
+
 @login_required
 def cambiar_fecha_evento_debug(request, pk):
     """Cambia la fecha de un evento para testing"""
@@ -446,9 +659,8 @@ def cambiar_fecha_evento_debug(request, pk):
         
         if nueva_fecha and nueva_hora:
             try:
-                mexico_tz = pytz.timezone('America/Mexico_City')
                 fecha_naive = datetime.strptime(f"{nueva_fecha} {nueva_hora}", "%Y-%m-%d %H:%M")
-                fecha_mexico = mexico_tz.localize(fecha_naive)
+                fecha_mexico = localizar_mexico(fecha_naive)
                 
                 evento.fecha_evento = fecha_mexico
                 evento.save()
@@ -463,14 +675,13 @@ def cambiar_fecha_evento_debug(request, pk):
 def crear_eventos_prueba(request):
     """Crea eventos de prueba para hoy"""
     if request.method == 'POST':
-        mexico_tz = pytz.timezone('America/Mexico_City')
-        ahora_mexico = timezone.now().astimezone(mexico_tz)
+        ahora_mexico = get_current_mexico_time()
         hoy = ahora_mexico.date()
         
         # Crear evento en curso (hace 30 minutos)
         evento_en_curso = Evento.objects.create(
             nombre="Evento en Curso - Prueba",
-            fecha_evento=mexico_tz.localize(datetime.combine(hoy, datetime.min.time().replace(hour=max(0, ahora_mexico.hour-1), minute=30))),
+            fecha_evento=localizar_mexico(datetime.combine(hoy, datetime.min.time().replace(hour=max(0, ahora_mexico.hour-1), minute=30))),
             municipio=Municipio.objects.first(),
             lugar="Lugar de prueba",
             responsable="Responsable de prueba",
@@ -481,7 +692,7 @@ def crear_eventos_prueba(request):
         # Crear evento próximo (en 2 horas)
         evento_proximo = Evento.objects.create(
             nombre="Evento Próximo - Prueba",
-            fecha_evento=mexico_tz.localize(datetime.combine(hoy, datetime.min.time().replace(hour=min(23, ahora_mexico.hour+2), minute=0))),
+            fecha_evento=localizar_mexico(datetime.combine(hoy, datetime.min.time().replace(hour=min(23, ahora_mexico.hour+2), minute=0))),
             municipio=Municipio.objects.first(),
             lugar="Lugar de prueba 2",
             responsable="Responsable de prueba 2",
@@ -492,7 +703,7 @@ def crear_eventos_prueba(request):
         # Crear evento finalizado (hace 3 horas)
         evento_finalizado = Evento.objects.create(
             nombre="Evento Finalizado - Prueba",
-            fecha_evento=mexico_tz.localize(datetime.combine(hoy, datetime.min.time().replace(hour=max(0, ahora_mexico.hour-3), minute=0))),
+            fecha_evento=localizar_mexico(datetime.combine(hoy, datetime.min.time().replace(hour=max(0, ahora_mexico.hour-3), minute=0))),
             municipio=Municipio.objects.first(),
             lugar="Lugar de prueba 3",
             responsable="Responsable de prueba 3",
@@ -509,66 +720,40 @@ def crear_eventos_prueba(request):
 def reportes(request):
     """Genera reportes con filtros"""
     form = FiltroEventosForm(request.GET or None)
-    eventos = Evento.objects.select_related('municipio', 'creado_por').order_by('-fecha_evento')
+    eventos, firma = _eventos_filtrados(form)
     
-    if form.is_valid():
-        if form.cleaned_data['fecha_desde']:
-            eventos = eventos.filter(fecha_evento__date__gte=form.cleaned_data['fecha_desde'])
-        
-        if form.cleaned_data['fecha_hasta']:
-            eventos = eventos.filter(fecha_evento__date__lte=form.cleaned_data['fecha_hasta'])
-        
-        if form.cleaned_data['municipio']:
-            eventos = eventos.filter(municipio=form.cleaned_data['municipio'])
-        
-        if form.cleaned_data['estado']:
-            eventos = eventos.filter(estado=form.cleaned_data['estado'])
-        
-        if form.cleaned_data['asistio_gobernador'] is not None:
-            eventos = eventos.filter(asistio_gobernador=form.cleaned_data['asistio_gobernador'])
-    
-    # Estadísticas
-    total_eventos = eventos.count()
-    eventos_gobernador = eventos.filter(asistio_gobernador=True).count()
-    eventos_representante = eventos.filter(asistio_gobernador=False).count()
-    eventos_festivos = eventos.filter(es_festivo=True).count()
+    # Estadísticas (compartidas con la lista y la exportación para los mismos filtros)
+    resumen = _resumen_filtrado(eventos, firma, get_current_mexico_time().date())
     
     return render(request, 'reportes/reportes.html', {
         'form': form,
         'eventos': eventos,
-        'total_eventos': total_eventos,
-        'eventos_gobernador': eventos_gobernador,
-        'eventos_representante': eventos_representante,
-        'eventos_festivos': eventos_festivos,
+        'total_eventos': resumen['total'],
+        'eventos_gobernador': resumen['gobernador'],
+        'eventos_representante': resumen['representante'],
+        'eventos_festivos': resumen['festivos'],
     })
 
+# Tamaño del archivo Excel que se mantiene en memoria antes de pasar a disco
+EXCEL_MAX_MEMORIA = 8 * 1024 * 1024
+
 # Vista para generar Excel
 @login_required
 def generar_excel(request):
-    """Genera reporte en Excel"""
-    form = FiltroEventosForm(request.GET or None)
-    eventos = Evento.objects.select_related('municipio', 'creado_por').order_by('-fecha_evento')
+    """Genera reporte en Excel.
     
-    if form.is_valid():
-        if form.cleaned_data['fecha_desde']:
-            eventos = eventos.filter(fecha_evento__date__gte=form.cleaned_data['fecha_desde'])
-        
-        if form.cleaned_data['fecha_hasta']:
-            eventos = eventos.filter(fecha_evento__date__lte=form.cleaned_data['fecha_hasta'])
-        
-        if form.cleaned_data['municipio']:
-            eventos = eventos.filter(municipio=form.cleaned_data['municipio'])
-        
-        if form.cleaned_data['estado']:
-            eventos = eventos.filter(estado=form.cleaned_data['estado'])
-        
-        if form.cleaned_data['asistio_gobernador'] is not None:
-            eventos = eventos.filter(asistio_gobernador=form.cleaned_data['asistio_gobernador'])
+    Memoria constante: openpyxl en modo ``write_only`` (cada hoja se escribe a disco fila
+    por fila), eventos leídos por bloques con ``iterator()`` sobre diccionarios y el
+    archivo final en un temporal que pasa a disco si excede ``EXCEL_MAX_MEMORIA``; la
+    respuesta lo envía por partes.
+    """
+    form = FiltroEventosForm(request.GET or None)
+    eventos, firma = _eventos_filtrados(form)
+    resumen = _resumen_filtrado(eventos, firma, get_current_mexico_time().date())
     
     # Crear workbook
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Reporte de Eventos"
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Reporte de Eventos")
     
     # Estilos
     header_font = Font(bold=True, color="FFFFFF")
@@ -580,49 +765,104 @@ def generar_excel(request):
         'Estado', 'Asistió Gobernador', 'Representante', 'Es Festivo', 'Creado Por'
     ]
     
-    for col, header in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=col, value=header)
-        cell.font = header_font
-        cell.fill = header_fill
-    
-    # Datos
-    for row, evento in enumerate(eventos, 2):
-        fecha_mexico = evento.get_fecha_mexico()
-        ws.cell(row=row, column=1, value=evento.nombre)
-        ws.cell(row=row, column=2, value=fecha_mexico.strftime('%d/%m/%Y'))
-        ws.cell(row=row, column=3, value=fecha_mexico.strftime('%H:%M'))
-        ws.cell(row=row, column=4, value=evento.municipio.nombre)
-        ws.cell(row=row, column=5, value=evento.lugar)
-        ws.cell(row=row, column=6, value=evento.responsable)
-        ws.cell(row=row, column=7, value=evento.get_estado_display())
-        ws.cell(row=row, column=8, value="Sí" if evento.asistio_gobernador else "No")
-        ws.cell(row=row, column=9, value=evento.representante or "N/A")
-        ws.cell(row=row, column=10, value="Sí" if evento.es_festivo else "No")
-        ws.cell(row=row, column=11, value=evento.creado_por.get_full_name() or evento.creado_por.username)
-    
-    # Ajustar ancho de columnas
+    # En modo write_only el ancho de columnas se fija antes de escribir filas
     for col in range(1, len(headers) + 1):
         ws.column_dimensions[get_column_letter(col)].width = 15
     
-    # Crear respuesta HTTP
-    response = HttpResponse(
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    encabezados = []
+    for header in headers:
+        cell = WriteOnlyCell(ws, value=header)
+        cell.font = header_font
+        cell.fill = header_fill
+        encabezados.append(cell)
+    ws.append(encabezados)
+    
+    # Datos (diccionarios con solo las columnas exportadas, por bloques)
+    estados = dict(Evento.ESTADO_CHOICES)
+    for evento in eventos.para_exportar().iterator(chunk_size=TAMANO_BLOQUE_EXPORTACION):
+        fecha_mexico = convert_to_mexico_time(evento['fecha_evento'])
+        creado_por = f"{evento['creado_por__first_name']} {evento['creado_por__last_name']}".strip()
+        ws.append([
+            evento['nombre'],
+            f'{fecha_mexico.day:02d}/{fecha_mexico.month:02d}/{fecha_mexico.year}',
+            HORAS_DEL_DIA[fecha_mexico.hour * 60 + fecha_mexico.minute],
+            evento['municipio__nombre'],
+            evento['lugar'],
+            evento['responsable'],
+            estados.get(evento['estado'], evento['estado']),
+            "Sí" if evento['asistio_gobernador'] else "No",
+            evento['representante'] or "N/A",
+            "Sí" if evento['es_festivo'] else "No",
+            creado_por or evento['creado_por__username'],
+        ])
+    
+    # Hoja de resumen con las mismas estadísticas que la página de reportes
+    ws_resumen = wb.create_sheet("Resumen")
+    ws_resumen.column_dimensions['A'].width = 25
+    for etiqueta, valor in [
+        ('Total de eventos', resumen['total']),
+        ('Asistió el Gobernador', resumen['gobernador']),
+        ('Asistió Representante', resumen['representante']),
+        ('Eventos festivos', resumen['festivos']),
+    ]:
+        cell = WriteOnlyCell(ws_resumen, value=etiqueta)
+        cell.font = Font(bold=True)
+        ws_resumen.append([cell, valor])
+    
+    # Guardar en un temporal y enviarlo por partes
+    archivo = tempfile.SpooledTemporaryFile(max_size=EXCEL_MAX_MEMORIA)
+    wb.save(archivo)
+    archivo.seek(0)
+    response = FileResponse(
+        archivo,
+        as_attachment=True,
+        filename=f'reporte_eventos_{get_current_mexico_time().strftime("%Y%m%d_%H%M")}.xlsx',
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
     )
-    response['Content-Disposition'] = f'attachment; filename="reporte_eventos_{timezone.now().strftime("%Y%m%d_%H%M")}.xlsx"'
+    # Bajo ASGI el archivo se lee por bloques en lugar de cargarse completo en memoria
+    return transmitir(request, response)
+
+FORMATOS_EXPORTACION = {
+    'csv': (generar_csv, 'text/csv; charset=utf-8'),
+    'jsonl': (generar_jsonl, 'application/x-ndjson'),
+}
+
+@login_required
+def exportar_eventos(request, formato):
+    """Eventos filtrados (mismos filtros que reportes) en CSV o JSON Lines, en streaming.
     
-    # Guardar workbook en respuesta
-    wb.save(response)
-    return response
+    Con ``gzip=1`` se descarga el archivo comprimido (.csv.gz / .jsonl.gz).
+    """
+    generador, content_type = FORMATOS_EXPORTACION[formato]
+    form = FiltroEventosForm(request.GET or None)
+    eventos, _ = _eventos_filtrados(form)
+    
+    nombre = f'eventos_{get_current_mexico_time().strftime("%Y%m%d_%H%M")}.{formato}'
+    partes = generador(eventos)
+    if request.GET.get('gzip') in ('1', 'true'):
+        partes = comprimir_gzip(partes)
+        content_type = 'application/gzip'
+        nombre += '.gz'
+    
+    response = StreamingHttpResponse(partes, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{nombre}"'
+    response['Cache-Control'] = 'private, no-store'
+    # Sin búfer en el proxy: cada bloque llega al cliente en cuanto se genera
+    response['X-Accel-Buffering'] = 'no'
+    return transmitir(request, response)
 
 # Vista para estadísticas
 @login_required
 def estadisticas(request):
     """Muestra estadísticas generales"""
-    # Estadísticas básicas
-    total_eventos = Evento.objects.count()
-    eventos_gobernador = Evento.objects.filter(asistio_gobernador=True).count()
-    eventos_representante = Evento.objects.filter(asistio_gobernador=False).count()
-    eventos_festivos = Evento.objects.filter(es_festivo=True).count()
+    # Se leen los resúmenes por día y municipio, no el historial completo de eventos
+    totales = EventoResumenDia.objects.aggregate(**{
+        campo: Coalesce(Sum(campo), 0) for campo in CAMPOS_CONTEO
+    })
+    total_eventos = totales['total']
+    eventos_gobernador = totales['con_gobernador']
+    eventos_representante = totales['con_representante']
+    eventos_festivos = totales['festivos']
     
     # Calcular porcentajes
     porcentaje_gobernador = round((eventos_gobernador / total_eventos * 100), 1) if total_eventos > 0 else 0
@@ -630,13 +870,21 @@ def estadisticas(request):
     porcentaje_festivos = round((eventos_festivos / total_eventos * 100), 1) if total_eventos > 0 else 0
     
     # Eventos por estado
-    eventos_por_estado = Evento.objects.values('estado').annotate(
-        total=Count('id')
-    ).order_by('-total')
+    eventos_por_estado = sorted(
+        (
+            {'estado': estado, 'total': totales[campo]}
+            for estado, campo in (
+                ('programado', 'programados'), ('en_curso', 'en_curso'),
+                ('finalizado', 'finalizados'), ('cancelado', 'cancelados'),
+            )
+            if totales[campo]
+        ),
+        key=lambda item: -item['total'],
+    )
     
     # Eventos por municipio (top 10 para gráfica de donut)
-    eventos_por_municipio = Evento.objects.values('municipio__nombre').annotate(
-        total=Count('id')
+    eventos_por_municipio = EventoResumenDia.objects.values('municipio__nombre').annotate(
+        total=Sum('total')
     ).order_by('-total')[:10]
     
     # Datos para gráfica de municipios (Doughnut)
@@ -646,10 +894,10 @@ def estadisticas(request):
     }
     
     # MEJORADO: Datos para gráfico de asistencia por municipio (Top 20 con mejor información)
-    asistencia_por_municipio = Evento.objects.values('municipio__nombre').annotate(
-        total_gobernador=Count('id', filter=Q(asistio_gobernador=True)),
-        total_representante=Count('id', filter=Q(asistio_gobernador=False)),
-        total_eventos=Count('id')
+    asistencia_por_municipio = EventoResumenDia.objects.values('municipio__nombre').annotate(
+        total_gobernador=Sum('con_gobernador'),
+        total_representante=Sum('con_representante'),
+        total_eventos=Sum('total')
     ).filter(total_eventos__gt=0).order_by('-total_eventos')[:20]
     
     # Preparar datos mejorados para la gráfica de barras
@@ -681,74 +929,298 @@ def estadisticas(request):
 @login_required
 def calendario(request):
     """Vista para mostrar el calendario de eventos"""
-    return render(request, 'eventos/calendario.html')
+    token = TokenCalendario.para_usuario(request.user)
+    feed_url = request.build_absolute_uri(reverse('feed_calendario')) + f'?token={token.token}'
+    return render(request, 'eventos/calendario.html', {'feed_url': feed_url})
 
 @login_required
-def eventos_calendario_api(request):
-    """API para obtener eventos del calendario en formato JSON"""
-    # Obtener parámetros de fecha del request
-    year = request.GET.get('year')
-    month = request.GET.get('month')
-    
-    # Si no se especifica año/mes, usar el actual
-    if not year or not month:
-        from .utils import get_current_mexico_time
+def regenerar_feed_calendario(request):
+    """Reemplaza el token del feed iCalendar del usuario (revoca la URL anterior)"""
+    if request.method == 'POST':
+        TokenCalendario.para_usuario(request.user).regenerar()
+        messages.success(request, 'Se generó una nueva dirección de suscripción. Actualízala en tu calendario.')
+    return redirect('calendario')
+
+# Días hacia atrás que incluye el feed iCalendar si no se indica ``desde``
+DIAS_FEED_PASADOS = 180
+
+def _fecha_parametro(parametros, nombre):
+    """Fecha YYYY-MM-DD del parámetro ``nombre`` (None si falta); ValueError si no es válida"""
+    valor = parametros.get(nombre)
+    if not valor:
+        return None
+    try:
+        return datetime.strptime(valor, '%Y-%m-%d').date()
+    except ValueError:
+        raise ValueError(f'Fecha no válida en {nombre}: {valor}') from None
+
+def _filtros_feed(parametros):
+    """Filtros del feed (municipio, estado, desde, hasta); ValueError si no son válidos"""
+    filtros = {}
+    if parametros.get('municipio'):
+        if not PATRON_ID.fullmatch(parametros['municipio']):
+            raise ValueError(f"Municipio no válido: {parametros['municipio']}")
+        filtros['municipio_id'] = int(parametros['municipio'])
+    if parametros.get('estado'):
+        if parametros['estado'] not in dict(Evento.ESTADO_CHOICES):
+            raise ValueError(f"Estado no válido: {parametros['estado']}")
+        filtros['estado'] = parametros['estado']
+    
+    desde = _fecha_parametro(parametros, 'desde')
+    if desde is None:
+        desde = get_current_mexico_time().date() - timedelta(days=DIAS_FEED_PASADOS)
+    # 9999-12-31 es válido: filtro_fechas_mexico deja abierto el límite superior
+    hasta = _fecha_parametro(parametros, 'hasta')
+    if hasta and hasta < desde:
+        raise ValueError('hasta anterior a desde')
+    filtros.update(filtro_fechas_mexico(desde, hasta))
+    return filtros
+
+def feed_calendario(request):
+    """Feed iCalendar (.ics) de la agenda, autenticado con el token del usuario.
+    
+    Se genera en streaming con un ``iterator()`` por bloques. ETag y Last-Modified salen
+    de la última ``fecha_actualizacion`` de la agenda y del conteo filtrado (que detecta
+    eliminaciones), así que los sondeos de los clientes terminan casi siempre en un 304.
+    """
+    get_object_or_404(TokenCalendario, token=request.GET.get('token', ''), usuario__is_active=True)
+    try:
+        filtros = _filtros_feed(request.GET)
+    except ValueError as error:
+        return HttpResponse(str(error), status=400, content_type='text/plain; charset=utf-8')
+    
+    eventos = Evento.objects.filter(**filtros).order_by('fecha_evento', 'id')
+    ultima_modificacion = Evento.objects.aggregate(ultima=Max('fecha_actualizacion'))['ultima']
+    total = eventos.count()
+    
+    firma = ':'.join([
+        *(f'{clave}={valor}' for clave, valor in sorted(request.GET.items()) if clave != 'token'),
+        ultima_modificacion.isoformat() if ultima_modificacion else '',
+        str(total),
+    ])
+    etag = quote_etag(hashlib.md5(firma.encode()).hexdigest())
+    # Last-Modified tiene resolución de segundos
+    marca = int(ultima_modificacion.timestamp()) if ultima_modificacion else None
+    
+    response = get_conditional_response(request, etag=etag, last_modified=marca)
+    if response is None:
+        response = StreamingHttpResponse(
+            generar_feed(eventos, request.get_host().split(':')[0]),
+            content_type='text/calendar; charset=utf-8',
+        )
+        response['Content-Disposition'] = 'inline; filename="agenda-gobernador.ics"'
+        transmitir(request, response)
+    response['ETag'] = etag
+    if marca is not None:
+        response['Last-Modified'] = http_date(marca)
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+# Meses máximos por solicitud de rango del calendario (start/end)
+MAX_MESES_CALENDARIO = 12
+
+FORMATOS_CALENDARIO = ('completo', 'compacto')
+
+# Años aceptados por las APIs: los límites UTC del 31/12/9999 ya no caben en datetime
+YEAR_MINIMO, YEAR_MAXIMO = 1, 9998
+
+def _validar_year(year):
+    """``year`` si está en el rango soportado; ValueError si no"""
+    if not YEAR_MINIMO <= year <= YEAR_MAXIMO:
+        raise ValueError(f'El año debe estar entre {YEAR_MINIMO} y {YEAR_MAXIMO}')
+    return year
+
+def _meses_entre(inicio, fin):
+    """(año, mes) de cada mes que toca el rango de días [inicio, fin]"""
+    year, month = inicio.year, inicio.month
+    while (year, month) <= (fin.year, fin.month):
+        yield year, month
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+def _siguiente_transicion(fechas_evento, ahora):
+    """Primer instante posterior a ``ahora`` en que cambia el estado automático de algún evento"""
+    transiciones = [
+        instante
+        for fecha_evento in fechas_evento
+        for instante in (fecha_evento, fecha_evento + DURACION_EVENTO)
+        if instante > ahora
+    ]
+    return min(transiciones, default=None)
+
+def _calcular_mes_calendario(year, month, ahora):
+    """Payload serializado de un mes, con su huella y hasta cuándo siguen vigentes los estados"""
+    ultimo_dia = calendar.monthrange(year, month)[1]
+    filas = list(
+        Evento.objects.filter(
+            **filtro_fechas_mexico(date(year, month, 1), date(year, month, ultimo_dia))
+        ).order_by('fecha_evento').para_calendario(ahora)
+    )
+    eventos = serializar_calendario(filas, LONGITUD_DESCRIPCION_CALENDARIO)
+    return {
+        'eventos': eventos,
+        'huella': hashlib.md5(dumps(eventos, ordenar=True)).hexdigest(),
+        'vigente_hasta': _siguiente_transicion((fila[2] for fila in filas), ahora),
+    }
+
+def _meses_calendario(meses, ahora):
+    """Payloads de varios meses desde la caché (por versión de la agenda); calcula los faltantes.
+    
+    Un mes cacheado se recalcula también cuando alguno de sus eventos cambió de estado
+    automático por el paso del tiempo (``vigente_hasta``).
+    """
+    claves = {mes: clave_agenda('calendario_mes', f'{mes[0]}-{mes[1]:02d}') for mes in meses}
+    cacheados = cache.get_many(claves.values())
+    
+    payloads, nuevos = {}, {}
+    for mes, clave in claves.items():
+        payload = cacheados.get(clave)
+        if payload is None or (payload['vigente_hasta'] is not None and ahora >= payload['vigente_hasta']):
+            payload = nuevos[clave] = _calcular_mes_calendario(*mes, ahora)
+        payloads[mes] = payload
+    if nuevos:
+        cache.set_many(nuevos, get_agenda_cache_timeout())
+    return payloads
+
+def _rango_calendario(parametros):
+    """Días [inicio, fin] pedidos por start/end (ISO) o year/month; ValueError si no son válidos"""
+    if parametros.get('start') or parametros.get('end'):
+        inicio = date.fromisoformat(parametros.get('start', '')[:10])
+        fin = date.fromisoformat(parametros.get('end', '')[:10])
+        _validar_year(inicio.year)
+        _validar_year(fin.year)
+        if fin < inicio:
+            raise ValueError('end anterior a start')
+        if len(list(_meses_entre(inicio, fin))) > MAX_MESES_CALENDARIO:
+            raise ValueError(f'El rango no puede abarcar más de {MAX_MESES_CALENDARIO} meses')
+        return inicio, fin
+    
+    if parametros.get('year') and parametros.get('month'):
+        year, month = _validar_year(int(parametros['year'])), int(parametros['month'])
+    else:
+        # Si no se especifica año/mes, usar el actual
         now = get_current_mexico_time()
-        year = now.year
-        month = now.month
+        year, month = now.year, now.month
+    return date(year, month, 1), date(year, month, calendar.monthrange(year, month)[1])
+
+@login_required
+@comprimir_json
+def eventos_calendario_api(request):
+    """API para obtener eventos del calendario en formato JSON.
+    
+    Acepta ``year``/``month`` o un rango ``start``/``end`` (YYYY-MM-DD) para precargar
+    varios meses en una solicitud. Cada mes se sirve desde caché y la respuesta lleva
+    ETag, así que navegar entre meses ya vistos termina en caché o en un 304.
+    
+    Con ``formato=compacto`` responde columnas con valores codificados por diccionario y
+    sin descripciones (ver ``compactar_calendario`` y ``descripciones_calendario_api``).
+    """
+    formato = request.GET.get('formato', 'completo')
+    if formato not in FORMATOS_CALENDARIO:
+        return JsonResponse({'error': f'Formato no válido: {formato}'}, status=400)
+    try:
+        inicio, fin = _rango_calendario(request.GET)
+    except ValueError as error:
+        return JsonResponse({'error': str(error)}, status=400)
+    
+    payloads = _meses_calendario(list(_meses_entre(inicio, fin)), obtener_ahora())
+    
+    etag = quote_etag(hashlib.md5(
+        f"{formato}:{inicio.isoformat()}:{fin.isoformat()}:".encode() +
+        ':'.join(payload['huella'] for payload in payloads.values()).encode()
+    ).hexdigest())
+    no_modificado = get_conditional_response(request, etag=etag)
+    
+    if no_modificado is None:
+        desde, hasta = inicio.isoformat(), fin.isoformat()
+        eventos_data = [
+            evento
+            for payload in payloads.values()
+            for evento in payload['eventos']
+            if desde <= evento['date'] <= hasta
+        ]
+        if formato == 'compacto':
+            datos = {'formato': formato, **compactar_calendario(eventos_data)}
+        else:
+            datos = {'eventos': eventos_data}
+        response = RespuestaJson({**datos, 'start': desde, 'end': hasta})
     else:
-        year = int(year)
-        month = int(month)
-    
-    # Crear fechas de inicio y fin del mes
-    from datetime import datetime
-    import calendar
-    from .utils import get_mexico_timezone
-    
-    # Primer día del mes
-    fecha_inicio = datetime(year, month, 1)
-    
-    # Último día del mes
-    ultimo_dia = calendar.monthrange(year, month)[1]
-    fecha_fin = datetime(year, month, ultimo_dia, 23, 59, 59)
-    
-    # Obtener eventos del mes con timezone awareness
-    mexico_tz = get_mexico_timezone()
-    fecha_inicio = mexico_tz.localize(fecha_inicio)
-    fecha_fin = mexico_tz.localize(fecha_fin)
-    
-    eventos = Evento.objects.filter(
-        fecha_evento__gte=fecha_inicio,
-        fecha_evento__lte=fecha_fin
-    ).select_related('municipio', 'creado_por').order_by('fecha_evento')
-    
-    # Preparar datos para el calendario
-    eventos_data = []
-    for evento in eventos:
-        # Actualizar estado automáticamente
-        evento.actualizar_estado_automatico()
-        
-        # Usar utilidad para formatear fecha
-        from .utils import format_event_date
-        fecha_formateada = format_event_date(evento)
-        
-        eventos_data.append({
-            'id': evento.id,
-            'title': evento.nombre,
-            'date': fecha_formateada['date'],
-            'time': fecha_formateada['time'],
-            'location': f"{evento.lugar}, {evento.municipio.nombre}",
-            'description': evento.descripcion or 'Sin descripción',
-            'estado': evento.estado,
-            'es_festivo': evento.es_festivo,
-            'asistio_gobernador': evento.asistio_gobernador,
-            'responsable': evento.responsable,
-            'attendees': 0,
-            'municipio': evento.municipio.nombre,
-            'full_location': evento.lugar,
-        })
+        response = no_modificado
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+@login_required
+@comprimir_json
+def descripciones_calendario_api(request):
+    """Descripciones recortadas de varios eventos (?ids=1,2,3) para el formato compacto"""
+    ids = _ids_lote(request.GET.get('ids', ''))
+    filas = Evento.objects.filter(pk__in=ids).annotate(
+        descripcion_corta=Left('descripcion', LONGITUD_DESCRIPCION_CALENDARIO + 1),
+    ).values_list('pk', 'descripcion_corta')
+    return RespuestaJson({
+        'descripciones': {
+            str(pk): recortar_descripcion(descripcion, LONGITUD_DESCRIPCION_CALENDARIO)
+            for pk, descripcion in filas
+        },
+    })
+
+def _calcular_heatmap(year):
+    """Eventos por día local del año en dos listas de 366 celdas (día del año - 1)"""
+    gobernador, representante = [0] * 366, [0] * 366
+    filas = (
+        Evento.objects.filter(**filtro_fechas_mexico(date(year, 1, 1), date(year, 12, 31)))
+        .order_by()
+        .annotate(dia=TruncDate('fecha_evento', tzinfo=MEXICO_TZ))
+        .values('dia')
+        .annotate(
+            con_gobernador=Count('pk', filter=Q(asistio_gobernador=True)),
+            con_representante=Count('pk', filter=Q(asistio_gobernador=False)),
+        )
+    )
+    for fila in filas:
+        indice = fila['dia'].timetuple().tm_yday - 1
+        gobernador[indice] = fila['con_gobernador']
+        representante[indice] = fila['con_representante']
+    # Día con más eventos (el primero en caso de empate) y su total
+    totales = [g + r for g, r in zip(gobernador, representante)]
+    total_maximo = max(totales)
+    return {
+        'year': year,
+        'dias': 366 if calendar.isleap(year) else 365,
+        'gobernador': gobernador,
+        'representante': representante,
+        'total_maximo': total_maximo,
+        'fecha_maximo': (
+            (date(year, 1, 1) + timedelta(days=totales.index(total_maximo))).isoformat()
+            if total_maximo else None
+        ),
+    }
+
+@login_required
+@comprimir_json
+def heatmap_eventos_api(request):
+    """Actividad del año por día (hora de México), separada en gobernador y representante.
     
-    return JsonResponse({'eventos': eventos_data}) 
+    Una sola consulta agrupada por día local; el resultado se cachea por año con la
+    versión de la agenda y lleva ETag.
+    """
+    try:
+        year = _validar_year(int(request.GET.get('year') or get_current_mexico_time().year))
+    except ValueError:
+        return JsonResponse({'error': 'Año no válido'}, status=400)
+    
+    clave = clave_agenda('heatmap', year)
+    datos = cache.get(clave)
+    if datos is None:
+        datos = _calcular_heatmap(year)
+        cache.set(clave, datos, get_agenda_cache_timeout())
+    
+    cuerpo = dumps(datos)
+    etag = quote_etag(hashlib.md5(cuerpo).hexdigest())
+    response = get_conditional_response(request, etag=etag) or HttpResponse(cuerpo, content_type='application/json')
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    return response
 
 @login_required
 @require_http_methods(["POST"])
@@ -771,7 +1243,7 @@ def chatbot_api(request):
         respuesta = chatbot.procesar_consulta(mensaje)
         
         # Log de la consulta (opcional, para mejorar el chatbot)
-        print(f"CHATBOT - Usuario: {request.user.username} | Consulta: {mensaje}")
+        logger.info('Consulta al chatbot usuario=%s consulta=%r', request.user.username, mensaje)
         
         return JsonResponse({
             'success': True,
@@ -787,7 +1259,7 @@ def chatbot_api(request):
         }, status=400)
         
     except Exception as e:
-        print(f"ERROR CHATBOT: {str(e)}")
+        logger.exception('Error procesando consulta del chatbot')
         return JsonResponse({
             'success': False,
             'respuesta': 'Ocurrió un error procesando tu consulta. Inténtalo de nuevo.',